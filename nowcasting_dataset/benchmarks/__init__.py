@@ -0,0 +1 @@
+""" Offline benchmarks of the hot paths of making batches """
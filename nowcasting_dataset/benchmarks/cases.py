@@ -0,0 +1,356 @@
+""" The benchmark cases.
+
+Each case is a function which takes the benchmark settings, does any set up (which is not timed),
+and returns a function with no arguments, which is the code that is timed.
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from nowcasting_dataset.config.model import Configuration, InputData
+from nowcasting_dataset.data_sources import (
+    GSPDataSource,
+    HRVSatelliteDataSource,
+    NWPDataSource,
+    PVDataSource,
+    SatelliteDataSource,
+    SunDataSource,
+    TopographicDataSource,
+)
+from nowcasting_dataset.data_sources.data_source import DataSource
+from nowcasting_dataset.data_sources.fake import create_image_array
+from nowcasting_dataset.data_sources.gsp.gsp_data_source import load_solar_gsp_data
+from nowcasting_dataset.data_sources.pv.pv_data_source import (
+    load_solar_pv_data,
+    resample_and_interpolate,
+)
+from nowcasting_dataset.data_sources.sun.raw_data_load_save import get_azimuth_and_elevation
+from nowcasting_dataset.dataset.batch import Batch
+from nowcasting_dataset.dataset.xr_utils import (
+    convert_coordinates_to_indexes_for_list_datasets,
+    join_list_dataset_to_batch_dataset,
+)
+from nowcasting_dataset.time import (
+    get_contiguous_time_periods,
+    intersection_of_multiple_dataframes_of_periods,
+    time_periods_to_datetime_index,
+)
+
+
+@dataclass
+class BenchmarkSettings:
+    """Settings shared by all the benchmark cases.
+
+    Attributes:
+      data_path: The folder of input data, with the same layout as `tests/data`.
+      tmp_path: An empty folder that the benchmark cases can write to.
+      batch_size: The number of examples in each batch.
+    """
+
+    data_path: Path
+    tmp_path: Path
+    batch_size: int = 4
+
+
+class SkipBenchmark(Exception):
+    """Raised when a benchmark case can not run, for example because its data is missing."""
+
+
+BenchmarkCase = Callable[[BenchmarkSettings], Callable[[], Any]]
+
+#: Map from the name of each benchmark case to the function which sets it up.
+BENCHMARK_CASES: Dict[str, BenchmarkCase] = {}
+
+
+def benchmark_case(name: str) -> Callable[[BenchmarkCase], BenchmarkCase]:
+    """Register a benchmark case under `name`"""
+
+    def register(case: BenchmarkCase) -> BenchmarkCase:
+        assert name not in BENCHMARK_CASES, f"{name} is already a benchmark case"
+        BENCHMARK_CASES[name] = case
+        return case
+
+    return register
+
+
+def _check_path_exists(path: Path) -> Path:
+    if not os.path.exists(path):
+        raise SkipBenchmark(f"{path} does not exist")
+    return path
+
+
+def _first_t0_datetimes(data_source: DataSource, freq: str, n: int) -> pd.DatetimeIndex:
+    """Get the first `n` t0 datetimes, at `freq`, for which `data_source` has data"""
+    t0_datetimes = time_periods_to_datetime_index(
+        data_source.get_contiguous_t0_time_periods(), freq=freq
+    )
+    if len(t0_datetimes) < n:
+        raise SkipBenchmark(f"Only found {len(t0_datetimes)} t0 datetimes, but need {n}")
+    return t0_datetimes[:n]
+
+
+def _image_batch_case(data_source: DataSource, settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Benchmark `get_batch` for an image data source, at the center of the data"""
+    data_source.open()
+    t0_datetimes = _first_t0_datetimes(data_source, freq="5T", n=settings.batch_size)
+    x_locations = [float(data_source.data.x.mean())] * settings.batch_size
+    y_locations = [float(data_source.data.y.mean())] * settings.batch_size
+    return lambda: data_source.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+def _satellite_data_source(settings: BenchmarkSettings) -> SatelliteDataSource:
+    return SatelliteDataSource(
+        zarr_path=_check_path_exists(settings.data_path / "sat_data.zarr"),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        channels=("IR_016",),
+    )
+
+
+@benchmark_case("satellite_open")
+def satellite_open(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Open the satellite data, as each worker process does, once the metadata is known"""
+    data_source = _satellite_data_source(settings)
+    data_source.datetime_index(remove_night=False)
+    return data_source.open
+
+
+@benchmark_case("satellite_get_example")
+def satellite_get_example(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get one satellite example"""
+    data_source = _satellite_data_source(settings)
+    data_source.open()
+    t0_datetime = _first_t0_datetimes(data_source, freq="5T", n=1)[0]
+    x, y = float(data_source.data.x.mean()), float(data_source.data.y.mean())
+    return lambda: data_source.get_example(t0_datetime, x, y)
+
+
+@benchmark_case("satellite_get_batch")
+def satellite_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of satellite data"""
+    return _image_batch_case(_satellite_data_source(settings), settings)
+
+
+@benchmark_case("hrvsatellite_get_batch")
+def hrvsatellite_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of HRV satellite data"""
+    data_source = HRVSatelliteDataSource(
+        zarr_path=_check_path_exists(settings.data_path / "hrv_sat_data.zarr"),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        channels=("HRV",),
+    )
+    return _image_batch_case(data_source, settings)
+
+
+@benchmark_case("nwp_get_batch")
+def nwp_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of NWP data"""
+    data_source = NWPDataSource(
+        zarr_path=_check_path_exists(settings.data_path / "nwp_data" / "test.zarr"),
+        history_minutes=60,
+        forecast_minutes=60,
+        image_size_pixels=2,
+        meters_per_pixel=2000,
+        channels=["t"],
+    )
+    return _image_batch_case(data_source, settings)
+
+
+@benchmark_case("gsp_get_batch")
+def gsp_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of GSP data"""
+    data_source = GSPDataSource(
+        zarr_path=_check_path_exists(settings.data_path / "gsp" / "test.zarr"),
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+    data_source.open()
+    t0_datetimes = _first_t0_datetimes(data_source, freq="30T", n=settings.batch_size)
+    x_locations, y_locations = data_source.get_locations(t0_datetimes)
+    return lambda: data_source.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+@benchmark_case("gsp_load")
+def gsp_load(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Load all the GSP power and capacity data"""
+    zarr_path = _check_path_exists(settings.data_path / "gsp" / "test.zarr")
+    return lambda: load_solar_gsp_data(zarr_path)
+
+
+@benchmark_case("pv_load")
+def pv_load(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Load all the PV power data"""
+    filename = str(_check_path_exists(settings.data_path / "pv_data" / "test.nc"))
+    return lambda: load_solar_pv_data(filename)
+
+
+@benchmark_case("pv_get_batch")
+def pv_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of PV data"""
+    data_source = PVDataSource(
+        filename=str(_check_path_exists(settings.data_path / "pv_data" / "test.nc")),
+        metadata_filename=str(
+            _check_path_exists(settings.data_path / "pv_metadata" / "UK_PV_metadata.csv")
+        ),
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        load_azimuth_and_elevation=False,
+        load_from_gcs=False,
+    )
+    data_source.open()
+    t0_datetimes = _first_t0_datetimes(data_source, freq="5T", n=settings.batch_size)
+    x_locations, y_locations = data_source.get_locations(t0_datetimes)
+    return lambda: data_source.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+@benchmark_case("pv_resample_and_interpolate")
+def pv_resample_and_interpolate(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Resample one week of 1,000 PV systems to 5 minutes, and interpolate gaps"""
+    rng = np.random.default_rng(seed=0)
+    datetimes = pd.date_range("2020-04-01", "2020-04-08", freq="5T")
+    pv_power = rng.uniform(0, 5, size=(len(datetimes), 1_000)).astype(np.float32)
+    pv_power[rng.random(pv_power.shape) < 0.05] = np.nan
+    pv_power = pd.DataFrame(pv_power, index=datetimes)
+    return lambda: resample_and_interpolate(pv_power, freq="5T", limit=3)
+
+
+@benchmark_case("sun_get_batch")
+def sun_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of sun data"""
+    data_source = SunDataSource(
+        zarr_path=_check_path_exists(settings.data_path / "sun" / "test.zarr"),
+        history_minutes=30,
+        forecast_minutes=60,
+    )
+    x_locations = data_source.sun_store.x[: settings.batch_size]
+    y_locations = data_source.sun_store.y[: settings.batch_size]
+    t0_datetimes = [pd.Timestamp("2020-04-01 12:00")] * len(x_locations)
+    return lambda: data_source.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+@benchmark_case("sun_calculate_azimuth_and_elevation")
+def sun_calculate_azimuth_and_elevation(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Calculate one day of sun angles for every location (PV system and GSP) in the sun data"""
+    sun = xr.open_dataset(
+        _check_path_exists(settings.data_path / "sun" / "test.zarr"), engine="zarr"
+    )
+    x_centers, y_centers = zip(
+        *[[float(coordinate) for coordinate in name.split(",")] for name in sun.locations.values]
+    )
+    datestamps = pd.date_range("2019-04-01", "2019-04-02", freq="5T")
+    return lambda: get_azimuth_and_elevation(
+        datestamps=datestamps, x_centers=x_centers, y_centers=y_centers
+    )
+
+
+@benchmark_case("topographic_get_batch")
+def topographic_get_batch(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Get a batch of topographic data"""
+    data_source = TopographicDataSource(
+        filename=str(_check_path_exists(settings.data_path / "europe_dem_2km_osgb.tif")),
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        history_minutes=30,
+        forecast_minutes=60,
+    )
+    t0_datetimes = [pd.Timestamp("2020-04-01 12:00")] * settings.batch_size
+    x_locations = [float(data_source._data.x.mean())] * settings.batch_size
+    y_locations = [float(data_source._data.y.mean())] * settings.batch_size
+    return lambda: data_source.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+@benchmark_case("join_list_dataset_to_batch_dataset")
+def join_list_dataset_to_batch_dataset_case(
+    settings: BenchmarkSettings,
+) -> Callable[[], Any]:
+    """Join satellite-sized examples into a batch"""
+    examples = [
+        create_image_array(seq_length_5=19, image_size_pixels=64).to_dataset()
+        for _ in range(settings.batch_size)
+    ]
+    examples = convert_coordinates_to_indexes_for_list_datasets(examples)
+    return lambda: join_list_dataset_to_batch_dataset(examples)
+
+
+def _datetimes_with_gaps() -> pd.DatetimeIndex:
+    """One year of 5 minute datetimes, with a 1 hour gap every day"""
+    datetimes = pd.date_range("2020-01-01", "2021-01-01", freq="5T")
+    return datetimes[(datetimes.hour != 3)]
+
+
+@benchmark_case("time_get_contiguous_time_periods")
+def time_get_contiguous_time_periods(
+    settings: BenchmarkSettings,
+) -> Callable[[], Any]:
+    """Find contiguous periods in one year of 5 minute data"""
+    datetimes = _datetimes_with_gaps()
+    return lambda: get_contiguous_time_periods(
+        datetimes=datetimes, min_seq_length=19, max_gap_duration=pd.Timedelta("5 minutes")
+    )
+
+
+@benchmark_case("time_intersection_of_multiple_dataframes_of_periods")
+def time_intersection_of_multiple_dataframes_of_periods(
+    settings: BenchmarkSettings,
+) -> Callable[[], Any]:
+    """Intersect the contiguous periods of 3 data sources"""
+    datetimes = _datetimes_with_gaps()
+    periods = [
+        get_contiguous_time_periods(
+            datetimes=datetimes[offset:],
+            min_seq_length=19,
+            max_gap_duration=pd.Timedelta("5 minutes"),
+        )
+        for offset in (0, 100, 1000)
+    ]
+    return lambda: intersection_of_multiple_dataframes_of_periods(periods)
+
+
+def _fake_batch(settings: BenchmarkSettings) -> Batch:
+    configuration = Configuration()
+    configuration.input_data = InputData.set_all_to_defaults()
+    configuration.process.batch_size = settings.batch_size
+    return Batch.fake(configuration=configuration)
+
+
+@benchmark_case("batch_save_netcdf")
+def batch_save_netcdf(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Save a fake batch to netcdf"""
+    batch = _fake_batch(settings)
+    path = settings.tmp_path / "batch_save_netcdf"
+    return lambda: batch.save_netcdf(batch_i=0, path=path)
+
+
+@benchmark_case("batch_load_netcdf")
+def batch_load_netcdf(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Load a fake batch from netcdf"""
+    path = settings.tmp_path / "batch_load_netcdf"
+    _fake_batch(settings).save_netcdf(batch_i=0, path=path)
+    return lambda: Batch.load_netcdf(local_netcdf_path=path, batch_idx=0)
+
+
+@benchmark_case("batch_load_npy")
+def batch_load_npy(settings: BenchmarkSettings) -> Callable[[], Any]:
+    """Load a fake batch from memory-mapped .npy files"""
+    path = settings.tmp_path / "batch_load_npy"
+    _fake_batch(settings).save_npy(batch_i=0, path=path)
+    return lambda: Batch.load_npy(local_npy_path=path, batch_idx=0)
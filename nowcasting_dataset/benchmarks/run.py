@@ -0,0 +1,158 @@
+""" Run the benchmark cases, save the results, and compare them with earlier results """
+import json
+import logging
+import platform
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import fsspec
+import numpy as np
+
+import nowcasting_dataset
+from nowcasting_dataset.benchmarks.cases import (
+    BENCHMARK_CASES,
+    BenchmarkSettings,
+    SkipBenchmark,
+)
+
+logger = logging.getLogger(__name__)
+
+#: The folder of small test datasets, which the benchmarks use by default.
+DEFAULT_DATA_PATH = Path(nowcasting_dataset.__file__).parent.parent / "tests" / "data"
+
+
+def run_benchmarks(
+    names: Optional[Iterable[str]] = None,
+    data_path: Union[str, Path] = DEFAULT_DATA_PATH,
+    batch_size: int = 4,
+    repeat: int = 5,
+    number: int = 1,
+) -> Dict:
+    """
+    Run the benchmark cases.
+
+    Args:
+        names: The names of the benchmark cases to run.  Defaults to all of them.
+        data_path: The folder of input data, with the same layout as `tests/data`.
+        batch_size: The number of examples in each batch.
+        repeat: The number of times each case is timed.
+        number: The number of calls in each timing.
+
+    Returns: Dict with the `settings` used, and the `results` of each benchmark case.
+        Each result has the `name` of the case, and the `status` ("ok" or "skipped").
+        The timings of each call, in seconds, are `min_seconds`, `median_seconds`,
+        `mean_seconds` and `max_seconds`.
+    """
+    if names is None:
+        names = BENCHMARK_CASES.keys()
+    names = list(names)
+    for name in names:
+        assert name in BENCHMARK_CASES, f"Unknown benchmark case {name}"
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_path:
+        for name in names:
+            settings = BenchmarkSettings(
+                data_path=Path(data_path),
+                tmp_path=Path(tmp_path) / name,
+                batch_size=batch_size,
+            )
+            settings.tmp_path.mkdir()
+            results.append(_run_one_benchmark(name, settings, repeat=repeat, number=number))
+
+    return dict(
+        settings=dict(
+            data_path=str(data_path),
+            batch_size=batch_size,
+            repeat=repeat,
+            number=number,
+            datetime=datetime.now(timezone.utc).isoformat(),
+            python_version=platform.python_version(),
+            platform=platform.platform(),
+            nowcasting_dataset_version=_get_version(),
+        ),
+        results=results,
+    )
+
+
+def _run_one_benchmark(name: str, settings: BenchmarkSettings, repeat: int, number: int) -> Dict:
+    logger.info(f"Running benchmark {name}")
+    try:
+        function = BENCHMARK_CASES[name](settings)
+    except SkipBenchmark as error:
+        logger.warning(f"Skipping benchmark {name}: {error}")
+        return dict(name=name, status="skipped", reason=str(error))
+
+    seconds_per_call = np.array(timeit.repeat(function, repeat=repeat, number=number)) / number
+    result = dict(
+        name=name,
+        status="ok",
+        min_seconds=float(seconds_per_call.min()),
+        median_seconds=float(np.median(seconds_per_call)),
+        mean_seconds=float(seconds_per_call.mean()),
+        max_seconds=float(seconds_per_call.max()),
+    )
+    logger.info(f"Benchmark {name} took {result['min_seconds']:.4f} seconds (min)")
+    return result
+
+
+def _get_version() -> Optional[str]:
+    try:
+        from importlib.metadata import version
+
+        return version("nowcasting_dataset")
+    except Exception:
+        return None
+
+
+def save_results(results: Dict, filename: Union[str, Path]) -> None:
+    """Save the results of `run_benchmarks` as json.  `filename` can be local or in the cloud."""
+    with fsspec.open(str(filename), mode="w") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(filename: Union[str, Path]) -> Dict:
+    """Load results saved by `save_results`"""
+    with fsspec.open(str(filename), mode="r") as file:
+        return json.load(file)
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = 1.2) -> List[Dict]:
+    """
+    Find the benchmark cases which are slower now than in the baseline.
+
+    The fastest call (`min_seconds`) is compared, as it is the least noisy timing.
+
+    Args:
+        baseline: Earlier results, from `run_benchmarks`.
+        current: Current results, from `run_benchmarks`.
+        threshold: A case has regressed if it takes more than `threshold` times the baseline.
+
+    Returns: One dict for each regressed case, with the `name`, `baseline_seconds`,
+        `current_seconds` and `ratio`.
+    """
+    baseline_seconds = {
+        result["name"]: result["min_seconds"]
+        for result in baseline["results"]
+        if result["status"] == "ok"
+    }
+
+    regressions = []
+    for result in current["results"]:
+        name = result["name"]
+        if result["status"] != "ok" or name not in baseline_seconds:
+            continue
+        ratio = result["min_seconds"] / baseline_seconds[name]
+        if ratio > threshold:
+            regressions.append(
+                dict(
+                    name=name,
+                    baseline_seconds=baseline_seconds[name],
+                    current_seconds=result["min_seconds"],
+                    ratio=ratio,
+                )
+            )
+    return regressions
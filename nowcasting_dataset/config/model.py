@@ -27,6 +27,7 @@ from nowcasting_dataset.consts import (
     SAT_VARIABLE_NAMES,
 )
 from nowcasting_dataset.dataset.split import split
+from nowcasting_dataset.dataset.xr_utils import ValidationLevel
 
 IMAGE_SIZE_PIXELS_FIELD = Field(64, description="The number of pixels of the region of interest.")
 METERS_PER_PIXEL_FIELD = Field(2000, description="The number of meters per pixel.")
@@ -68,6 +69,14 @@ class DataSourceMixin(BaseModel):
         description="how many historic minutes to use. "
         "If set to None, the value is defaulted to InputData.default_history_minutes",
     )
+    n_example_threads: Optional[int] = Field(
+        None,
+        gt=0,
+        description="The number of threads which load examples for this data source, in a"
+        " thread pool which is reused for every batch.  Loading from Zarr is I/O-bound, so can use"
+        " many threads, whilst loading from memory is CPU-bound, so should use few threads."
+        "  If set to None, the DataSource chooses.",
+    )
 
     @property
     def seq_length_30_minutes(self):
@@ -80,6 +89,35 @@ class DataSourceMixin(BaseModel):
         return int((self.history_minutes + self.forecast_minutes) / 5 + 1)
 
 
+class ZarrDataSourceMixin(DataSourceMixin):
+    """Mixin class, to add options for reading Zarr stores"""
+
+    async_chunk_reads: bool = Field(
+        False,
+        description="If True then, before loading each batch, fetch all the Zarr chunks needed by"
+        " the batch concurrently.  This is much faster when reading from cloud storage.  Doesn't"
+        " work if the Zarr path has wildcards.",
+    )
+    max_concurrent_chunk_reads: int = Field(
+        64,
+        gt=0,
+        description="The maximum number of Zarr chunk requests in flight at once, if"
+        " async_chunk_reads is True.",
+    )
+    disk_cache_dir: Optional[str] = Field(
+        None,
+        description="Optional local directory to cache the Zarr chunks in, so that chunks are"
+        " only downloaded once, and then read from local disk in later runs.  The cache can be"
+        " shared by all the worker processes, and by several data sources.",
+    )
+    disk_cache_size_mb: float = Field(
+        100_000,
+        gt=0,
+        description="The maximum size of the disk cache, in MB.  When the cache is full, the"
+        " least-recently-used chunks are deleted.",
+    )
+
+
 class PV(DataSourceMixin):
     """PV configuration model"""
 
@@ -107,7 +145,7 @@ class PV(DataSourceMixin):
     )
 
 
-class Satellite(DataSourceMixin):
+class Satellite(ZarrDataSourceMixin):
     """Satellite configuration model"""
 
     satellite_zarr_path: str = Field(
@@ -128,7 +166,7 @@ class Satellite(DataSourceMixin):
     )
 
 
-class HRVSatellite(DataSourceMixin):
+class HRVSatellite(ZarrDataSourceMixin):
     """Satellite configuration model for HRV data"""
 
     hrvsatellite_zarr_path: str = Field(
@@ -145,7 +183,7 @@ class HRVSatellite(DataSourceMixin):
     hrvsatellite_meters_per_pixel: int = METERS_PER_PIXEL_FIELD
 
 
-class NWP(DataSourceMixin):
+class NWP(ZarrDataSourceMixin):
     """NWP configuration model"""
 
     nwp_zarr_path: str = Field(
@@ -364,6 +402,47 @@ class Process(BaseModel):
 
     local_temp_path: str = Field("~/temp/")
 
+    time_periods_cache_dir: Optional[str] = Field(
+        None,
+        description=(
+            "If set, then cache the contiguous t0 time periods of each DataSource in this"
+            " directory (local or remote).  The cached time periods of a DataSource are only"
+            " recomputed when its input data or its settings (e.g. history_minutes) change."
+        ),
+    )
+
+    validation_level: ValidationLevel = Field(
+        ValidationLevel.FULL,
+        description=(
+            "How thoroughly each batch is validated when it is created.  One of 'full' (run every"
+            " check), 'single_pass' (run all the value checks for each data variable in a single"
+            " pass over memory), 'sampled' (run the full validation every"
+            " `validate_every_n_batches` batches) or 'off'."
+        ),
+    )
+    validate_every_n_batches: int = Field(
+        10,
+        gt=0,
+        description="If validation_level is 'sampled', then validate every n-th batch.",
+    )
+    memory_budget_mb: Optional[float] = Field(
+        None,
+        gt=0,
+        description=(
+            "The budget of the private memory (not counting memory shared with other processes)"
+            " of each worker process (i.e. each DataSource), in MB.  Close to the budget, fewer"
+            " examples are loaded at once.  Over the budget, examples are loaded one at a time,"
+            " without prefetching.  If not set, then there is no budget."
+        ),
+    )
+    trace_memory_allocations: bool = Field(
+        False,
+        description=(
+            "Use tracemalloc to record the peak memory allocated by Python for each batch."
+            "  This slows down creating batches."
+        ),
+    )
+
 
 class Configuration(BaseModel):
     """Configuration model for the dataset"""
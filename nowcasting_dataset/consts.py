@@ -114,6 +114,13 @@ T0_DT = "t0_dt"
 SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_FILENAME = (
     "spatial_and_temporal_locations_of_each_example.csv"
 )
+# The same locations, in a binary format which is faster to load.  See `dataset/locations.py`.
+SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_NPZ_FILENAME = (
+    "spatial_and_temporal_locations_of_each_example.npz"
+)
 SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES = ("t0_datetime_UTC", "x_center_OSGB", "y_center_OSGB")
+# The optional column of the id of the object (e.g. the PV system or GSP) at the center of each
+# example, chosen by the DataSource which defines the geospatial locations.
+SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME = "object_id"
 
 LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
@@ -1,11 +1,11 @@
 """  General Data Source Class """
 import itertools
 import logging
-from concurrent import futures
+import os
 from dataclasses import InitVar, dataclass
 from numbers import Number
 from pathlib import Path
-from typing import Iterable, List, Tuple, Union
+from typing import Iterable, List, Optional, Tuple, Union
 
 import pandas as pd
 import xarray as xr
@@ -13,13 +13,22 @@ import xarray as xr
 import nowcasting_dataset.filesystem.utils as nd_fs_utils
 import nowcasting_dataset.time as nd_time
 import nowcasting_dataset.utils as nd_utils
-from nowcasting_dataset import square
-from nowcasting_dataset.consts import SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES
+from nowcasting_dataset import shared_arrays, square
+from nowcasting_dataset.consts import (
+    SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES,
+    SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME,
+)
 from nowcasting_dataset.data_sources.datasource_output import DataSourceOutput
 from nowcasting_dataset.dataset.xr_utils import (
+    ValidationLevel,
     convert_coordinates_to_indexes_for_list_datasets,
     join_list_dataset_to_batch_dataset,
 )
+from nowcasting_dataset.filesystem.disk_cache import DiskCache
+from nowcasting_dataset.filesystem.zarr_prefetch import PrefetchStore, ZarrChunkIndex
+from nowcasting_dataset.memory_tracker import MemoryTracker
+from nowcasting_dataset.stage_timer import StageTimer
+from nowcasting_dataset.thread_pool import ExampleThreadPool
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +47,9 @@ class DataSource:
         will consist of a single timestep at t0.
       sample_period_minutes: The time delta between each data point.  Note that this is set
         using the sample_period_minutes property, so it can be overridden by child classes.
+      n_example_threads: The number of threads which load examples, in a thread pool which is
+        reused for every batch.  Defaults to `default_n_example_threads`, which child classes
+        set according to whether loading an example is I/O-bound or CPU-bound.
 
     Attributes ending in `_length` are sequence lengths represented as integer numbers of timesteps.
     Attributes ending in `_duration` are sequence durations represented as pd.Timedeltas.
@@ -46,9 +58,15 @@ class DataSource:
     history_minutes: int
     forecast_minutes: int
 
+    # Loading examples from memory is CPU-bound, and holds the GIL, so only use a few threads.
+    default_n_example_threads = 4
+
     def __post_init__(self):
         """Post Init"""
         self.check_input_paths_exist()
+        self.stage_timer = StageTimer()
+        self.n_example_threads = self.default_n_example_threads
+        self._example_thread_pool = None
         self.sample_period_duration = pd.Timedelta(self.sample_period_minutes, unit="minutes")
 
         # TODO: Do we still need all these different representations of sequence lengths?
@@ -121,6 +139,14 @@ class DataSource:
         )
         return 5
 
+    def __getstate__(self) -> dict:
+        """Leave out the values in shared memory when pickling, so only their paths are pickled"""
+        return shared_arrays.get_state(self)
+
+    def __setstate__(self, state: dict) -> None:
+        """Map the values in shared memory, which were left out when pickling"""
+        shared_arrays.set_state(self, state)
+
     def open(self):
         """Open the data source, if necessary.
 
@@ -131,12 +157,17 @@ class DataSource:
         """
         pass
 
-    def check_input_paths_exist(self) -> None:
-        """Check any input paths exist.  Raise FileNotFoundError if not.
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data, which can include wildcards.
 
-        Can be overridden by child classes.
+        Should be overridden by child classes which load data from files.
         """
-        pass
+        return []
+
+    def check_input_paths_exist(self) -> None:
+        """Check any input paths exist.  Raise FileNotFoundError if not."""
+        for path in self.input_paths():
+            nd_fs_utils.check_path_exists(path)
 
     # TODO: Issue #319: Standardise parameter names.
     def create_batches(
@@ -147,6 +178,10 @@ class DataSource:
         dst_path: Path,
         local_temp_path: Path,
         upload_every_n_batches: int,
+        validation_level: ValidationLevel = ValidationLevel.FULL,
+        validate_every_n_batches: int = 1,
+        memory_budget_mb: Optional[float] = None,
+        trace_memory_allocations: bool = False,
     ) -> None:
         """Create multiple batches and save them to disk.
 
@@ -156,7 +191,9 @@ class DataSource:
           spatial_and_temporal_locations_of_each_example: A DataFrame where each row specifies
             the spatial and temporal location of an example.  The number of rows must be
             an exact multiple of `batch_size`.
-            Columns are: t0_datetime_UTC, x_center_OSGB, y_center_OSGB.
+            Columns are: t0_datetime_UTC, x_center_OSGB, y_center_OSGB, and optionally
+            object_id (the id of the object at the center of each example, as returned by
+            `get_locations_and_object_ids`).
           idx_of_first_batch: The batch number of the first batch to create.
           batch_size: The number of examples per batch.
           dst_path: The final destination path for the batches.  Must exist.
@@ -165,17 +202,38 @@ class DataSource:
             and then uploaded to dst_path every upload_every_n_batches. Must exist. Will be emptied.
           upload_every_n_batches: Upload the contents of temp_path to dst_path after this number
             of batches have been created.  If 0 then will write directly to dst_path.
+          validation_level: How thoroughly to validate each batch.
+          validate_every_n_batches: If validation_level is SAMPLED, then run the full validation
+            on every n-th batch, and skip validation for the other batches.
+          memory_budget_mb: The budget of the private memory of this process (which doesn't count
+            memory shared with other processes), in MB.  Close to the budget, fewer examples are
+            loaded at once.  Over the budget, batches are loaded one example at a time, without
+            prefetching.  If None then there is no budget.
+          trace_memory_allocations: If True then use tracemalloc to record the peak memory
+            allocated by Python for each batch.
+
+        The duration of each stage of creating each batch is saved to `timings.csv` and
+        `timings.json` in dst_path, and the memory used by each batch is saved to `memory.csv`.
         """
         # Sanity checks:
         assert idx_of_first_batch >= 0
         assert batch_size > 0
+        assert validate_every_n_batches > 0
         assert len(spatial_and_temporal_locations_of_each_example) % batch_size == 0
         assert upload_every_n_batches >= 0
-        assert spatial_and_temporal_locations_of_each_example.columns.to_list() == list(
-            SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES
+        assert spatial_and_temporal_locations_of_each_example.columns.to_list() in (
+            list(SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES),
+            list(SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES)
+            + [SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME],
         )
 
-        self.open()
+        self.stage_timer.reset()
+        self.example_thread_pool.reset_utilisation()
+        memory_tracker = MemoryTracker(
+            budget_mb=memory_budget_mb, trace_allocations=trace_memory_allocations
+        )
+        with self.stage_timer.time_stage("open"):
+            self.open()
 
         # Figure out where to write batches to:
         save_batches_locally_and_upload = upload_every_n_batches > 0
@@ -197,18 +255,38 @@ class DataSource:
         # Loop round each batch:
         for n_batches_processed, locations_for_batch in enumerate(locations_for_batches):
             batch_idx = idx_of_first_batch + n_batches_processed
+            self.stage_timer.batch_idx = batch_idx
             logger.debug(f"{self.__class__.__name__} creating batch {batch_idx}!")
 
-            # Generate batch.
-            batch = self.get_batch(
-                t0_datetimes=locations_for_batch.t0_datetime_UTC,
-                x_locations=locations_for_batch.x_center_OSGB,
-                y_locations=locations_for_batch.y_center_OSGB,
-            )
+            # Only validate a sample of the batches, if requested.
+            if validation_level == ValidationLevel.SAMPLED:
+                validation_level_for_batch = (
+                    ValidationLevel.FULL
+                    if batch_idx % validate_every_n_batches == 0
+                    else ValidationLevel.OFF
+                )
+            else:
+                validation_level_for_batch = validation_level
+
+            with memory_tracker.track_batch(batch_idx):
+                # Generate batch.
+                batch = self.get_batch(
+                    t0_datetimes=locations_for_batch.t0_datetime_UTC,
+                    x_locations=locations_for_batch.x_center_OSGB,
+                    y_locations=locations_for_batch.y_center_OSGB,
+                    validation_level=validation_level_for_batch,
+                    max_threads=memory_tracker.n_threads(max_threads=batch_size),
+                    low_memory=memory_tracker.is_over_budget(),
+                    object_ids=locations_for_batch.get(
+                        SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME
+                    ),
+                )
 
-            # Save batch to disk.
-            netcdf_filename = path_to_write_to / nd_utils.get_netcdf_filename(batch_idx)
-            batch.to_netcdf(netcdf_filename, engine="h5netcdf")
+                # Save batch to disk.
+                netcdf_filename = path_to_write_to / nd_utils.get_netcdf_filename(batch_idx)
+                with self.stage_timer.time_stage("serialization"):
+                    batch.to_netcdf(netcdf_filename, engine="h5netcdf")
+                del batch
 
             # Upload if necessary.
             if (
@@ -216,11 +294,31 @@ class DataSource:
                 and n_batches_processed > 0
                 and n_batches_processed % upload_every_n_batches == 0
             ):
-                nd_fs_utils.upload_and_delete_local_files(dst_path, path_to_write_to)
+                with self.stage_timer.time_stage("upload"):
+                    nd_fs_utils.upload_and_delete_local_files(dst_path, path_to_write_to)
 
         # Upload last few batches, if necessary:
         if save_batches_locally_and_upload:
-            nd_fs_utils.upload_and_delete_local_files(dst_path, path_to_write_to)
+            with self.stage_timer.time_stage("upload"):
+                nd_fs_utils.upload_and_delete_local_files(dst_path, path_to_write_to)
+
+        self.stage_timer.save(dst_path)
+        memory_tracker.save(dst_path)
+        logger.info(
+            f"{self.__class__.__name__} example thread pool has {self.n_example_threads} threads,"
+            f" which were busy {self.example_thread_pool.utilisation():.0%} of the time"
+        )
+        memory = memory_tracker.to_dataframe()
+        if len(memory) > 0:
+            logger.info(
+                f"{self.__class__.__name__} peak RSS = {memory.rss_after_mb.max():,.1f} MB"
+                f", peak private memory = {memory.private_after_mb.max():,.1f} MB"
+                + (
+                    f", peak tracemalloc = {memory.tracemalloc_peak_mb.max():,.1f} MB"
+                    if trace_memory_allocations
+                    else ""
+                )
+            )
 
     # TODO: Issue #319: Standardise parameter names.
     def get_batch(
@@ -228,6 +326,10 @@ class DataSource:
         t0_datetimes: pd.DatetimeIndex,
         x_locations: Iterable[Number],
         y_locations: Iterable[Number],
+        validation_level: ValidationLevel = ValidationLevel.FULL,
+        max_threads: Optional[int] = None,
+        object_ids: Optional[Iterable[Number]] = None,
+        low_memory: bool = False,
     ) -> DataSourceOutput:
         """
         Get Batch Data
@@ -238,6 +340,16 @@ class DataSource:
                 `future_minutes`.  The batch size is given by the length of the t0_datetimes.
             x_locations: x center batch locations
             y_locations: y center batch locations
+            validation_level: How thoroughly to validate the batch.  SAMPLED is treated as FULL,
+                as the sampling is done by `create_batches`.
+            max_threads: The maximum number of examples to load at once.  Defaults to
+                `n_example_threads`.
+            object_ids: The id of the object at the center of each example, if known, as
+                returned by `get_locations_and_object_ids`.  Only used by the DataSource which
+                defined the locations, which then doesn't need to find the object from its
+                coordinates.  Missing ids can be None or NaN.
+            low_memory: If True then use as little memory as possible, even if that's slower.
+                For example, Zarr data sources don't prefetch all the chunks of the batch at once.
 
         Returns: Batch data.
         """
@@ -247,33 +359,78 @@ class DataSource:
         assert len(t0_datetimes) == len(
             y_locations
         ), f"len(t0_datetimes) != len(y_locations): {len(t0_datetimes)} != {len(y_locations)}"
-        zipped = list(zip(t0_datetimes, x_locations, y_locations))
-        batch_size = len(t0_datetimes)
-
-        with futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
-            future_examples = []
-            for coords in zipped:
-                t0_datetime, x_location, y_location = coords
-                future_example = executor.submit(
-                    self.get_example, t0_datetime, x_location, y_location
-                )
-                future_examples.append(future_example)
-            examples = [future_example.result() for future_example in future_examples]
+        if object_ids is None:
+            object_ids = [None] * len(t0_datetimes)
+        assert len(t0_datetimes) == len(
+            object_ids
+        ), f"len(t0_datetimes) != len(object_ids): {len(t0_datetimes)} != {len(object_ids)}"
+        examples = self.example_thread_pool.map(
+            self._get_example_and_time_it,
+            t0_datetimes,
+            x_locations,
+            y_locations,
+            object_ids,
+            max_concurrency=max_threads,
+        )
 
         # Get the DataSource class, this could be one of the data sources like Sun
         cls = self.get_data_model_for_batch()
 
         # Set the coords to be indices before joining into a batch
-        examples = convert_coordinates_to_indexes_for_list_datasets(examples)
+        with self.stage_timer.time_stage("convert_coordinates"):
+            examples = convert_coordinates_to_indexes_for_list_datasets(examples)
 
         # join the examples together, and cast them to the cls, so that validation can occur
-        batch_one_datasource = cls(join_list_dataset_to_batch_dataset(examples))
+        with self.stage_timer.time_stage("concat"):
+            batch_one_datasource = cls(join_list_dataset_to_batch_dataset(examples))
 
         # lets validate
-        cls.validate(batch_one_datasource)
+        if validation_level != ValidationLevel.OFF:
+            with self.stage_timer.time_stage("validation") as validation_timing:
+                if validation_level == ValidationLevel.SINGLE_PASS:
+                    cls.validate_single_pass(batch_one_datasource)
+                else:
+                    cls.validate(batch_one_datasource)
+            logger.debug(
+                f"{self.__class__.__name__} validation ({validation_level.value}) took"
+                f" {validation_timing['seconds']:.3f} seconds"
+            )
 
         return batch_one_datasource
 
+    @property
+    def example_thread_pool(self) -> ExampleThreadPool:
+        """The thread pool which loads examples, with `n_example_threads` threads"""
+        if (
+            self._example_thread_pool is None
+            or self._example_thread_pool.max_workers != self.n_example_threads
+        ):
+            if self._example_thread_pool is not None:
+                self._example_thread_pool.shutdown()
+            # Name the threads, so they can be told apart by profilers like py-spy.
+            self._example_thread_pool = ExampleThreadPool(
+                max_workers=self.n_example_threads,
+                thread_name_prefix=f"{type(self).__name__}.get_example",
+            )
+        return self._example_thread_pool
+
+    def _get_example_and_time_it(
+        self,
+        t0_dt: pd.Timestamp,
+        x_meters_center: Number,
+        y_meters_center: Number,
+        object_id: Optional[Number] = None,
+    ) -> xr.Dataset:
+        """Get one example, and record how long it takes"""
+        with self.stage_timer.time_stage("get_example"):
+            if object_id is None or pd.isna(object_id):
+                return self.get_example(t0_dt, x_meters_center, y_meters_center)
+            # Only the DataSources which return object ids from `get_locations_and_object_ids`
+            # take an `object_id`.
+            return self.get_example(
+                t0_dt, x_meters_center, y_meters_center, object_id=int(object_id)
+            )
+
     def datetime_index(self) -> pd.DatetimeIndex:
         """Returns a complete list of all available datetimes."""
         # Leave this NotImplemented if this DataSource has no concept
@@ -315,6 +472,21 @@ class DataSource:
         """
         raise NotImplementedError()
 
+    def get_locations_and_object_ids(
+        self, t0_datetimes: pd.DatetimeIndex
+    ) -> Tuple[List[Number], List[Number], Optional[List[int]]]:
+        """Find a valid geographical location for each t0_datetime, and the object there.
+
+        DataSources which pick an object (e.g. a PV system) at each location should override
+        this to also return the ids of those objects, so `get_example` can be given the id,
+        instead of finding the object from the coordinates.
+
+        Returns:  x_locations, y_locations, object_ids.  The object_ids are None if this
+            DataSource has no concept of objects.
+        """
+        x_locations, y_locations = self.get_locations(t0_datetimes)
+        return x_locations, y_locations, None
+
     # ****************** METHODS THAT MUST BE OVERRIDDEN **********************
     # TODO: Issue #319: Standardise parameter names.
     def _get_time_slice(self, t0_dt: pd.Timestamp):
@@ -365,6 +537,15 @@ class ZarrDataSource(ImageDataSource):
         Access using public data property.
       consolidated: Whether or not the Zarr store is consolidated.
       channels: The Zarr parameters to load.
+      async_chunk_reads: If True then, before loading each batch, fetch all the Zarr chunks needed
+        by the batch concurrently, using fsspec's async API.  This is much faster than fetching
+        one chunk at a time from cloud storage.  Only works if zarr_path has no wildcards.
+      max_concurrent_chunk_reads: The maximum number of chunk requests in flight at once, if
+        async_chunk_reads is True.
+      disk_cache_dir: Optional local directory to cache the Zarr chunks in, so chunks are only
+        downloaded once.  The cache can be shared by many processes.
+      disk_cache_size_mb: The maximum size of the disk cache.  When the cache is full, the
+        least-recently-used chunks are deleted.
     """
 
     # zarr_path and channels must be set.  But dataclasses complains about defining a non-default
@@ -372,15 +553,62 @@ class ZarrDataSource(ImageDataSource):
     zarr_path: Union[Path, str] = None
     channels: Iterable[str] = None
     consolidated: bool = True
+    async_chunk_reads: bool = False
+    max_concurrent_chunk_reads: int = 64
+    disk_cache_dir: Optional[str] = None
+    disk_cache_size_mb: float = 100_000
+
+    # Loading examples from Zarr is mostly waiting for I/O (especially from the cloud), so use
+    # many threads.
+    default_n_example_threads = 16
+
+    # The name of the array in the Zarr store.  Must be set by child classes which support
+    # async_chunk_reads.
+    zarr_variable_name = None
 
     def __post_init__(self, image_size_pixels: int, meters_per_pixel: int):
         """Post init"""
         super().__post_init__(image_size_pixels, meters_per_pixel)
         self._data = None
+        self._opened_data = None
+        self._opened_data_pid = None
+        self.n_times_opened = 0
+        self._zarr_stores = None
+        self._prefetch_store = None
+        self._chunk_index = None
+
+    def __getstate__(self) -> dict:
+        """Leave out the opened data when pickling, so it is opened again in the new process"""
+        state = super().__getstate__()
+        state["_opened_data"] = None
+        state["_opened_data_pid"] = None
+        return state
+
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data"""
+        return [self.zarr_path]
+
+    def _open_data_once(self) -> xr.DataArray:
+        """
+        The result of `_open_data()`, which is only opened once in each process.
 
-    def check_input_paths_exist(self) -> None:
-        """Check input paths exist.  If not, raise a FileNotFoundError."""
-        nd_fs_utils.check_path_exists(self.zarr_path)
+        Every method which needs the data (including `open()`) should use this, rather than
+        calling `_open_data()`.  The opened data is shared by all threads of a process, but not
+        with other processes: it is opened again after the process forks, or after this data source
+        is pickled and sent to another process.  `n_times_opened` counts the opens in this process.
+        """
+        pid = os.getpid()
+        if self._opened_data is None or self._opened_data_pid != pid:
+            if self._opened_data_pid != pid:
+                self.n_times_opened = 0
+            self._opened_data = self._open_data()
+            self._opened_data_pid = pid
+            self.n_times_opened += 1
+            logger.info(
+                f"Opened {self.__class__.__name__} data in process {pid}"
+                f" ({self.n_times_opened} time(s) in this process): {self.zarr_path}"
+            )
+        return self._opened_data
 
     @property
     def data(self):
@@ -404,20 +632,15 @@ class ZarrDataSource(ImageDataSource):
         Returns: Example Data
 
         """
-        selected_data = self._get_time_slice(t0_dt)
-        bounding_box = self._square.bounding_box_centered_on(
-            x_meters_center=x_meters_center, y_meters_center=y_meters_center
-        )
-        selected_data = selected_data.sel(
-            x=slice(bounding_box.left, bounding_box.right),
-            y=slice(bounding_box.top, bounding_box.bottom),
-        )
-
-        # selected_sat_data is likely to have 1 too many pixels in x and y
-        # because sel(x=slice(a, b)) is [a, b], not [a, b).  So trim:
-        selected_data = selected_data.isel(
-            x=slice(0, self._square.size_pixels), y=slice(0, self._square.size_pixels)
-        )
+        with self.stage_timer.time_stage("time_slice"):
+            selected_data = self._get_time_slice(t0_dt)
+
+        with self.stage_timer.time_stage("spatial_crop"):
+            selected_data = self.get_spatial_region_of_interest(
+                data_array=selected_data,
+                x_center_osgb=x_meters_center,
+                y_center_osgb=y_meters_center,
+            )
 
         selected_data = self._post_process_example(selected_data, t0_dt)
 
@@ -432,7 +655,132 @@ class ZarrDataSource(ImageDataSource):
                 f"actual shape {selected_data.shape}"
             )
 
-        return selected_data.load().to_dataset(name="data")
+        with self.stage_timer.time_stage("load"):
+            selected_data = selected_data.load()
+
+        return selected_data.to_dataset(name="data")
+
+    def get_spatial_region_of_interest(
+        self, data_array: xr.DataArray, x_center_osgb: Number, y_center_osgb: Number
+    ) -> xr.DataArray:
+        """
+        Select the square region of interest around the center.
+
+        Args:
+            data_array: DataArray to subselect from
+            x_center_osgb: Center of the image x coordinate in OSGB coordinates
+            y_center_osgb: Center of image y coordinate in OSGB coordinates
+
+        Returns:
+            The selected data around the center
+        """
+        bounding_box = self._square.bounding_box_centered_on(
+            x_meters_center=x_center_osgb, y_meters_center=y_center_osgb
+        )
+        data_array = data_array.sel(
+            x=slice(bounding_box.left, bounding_box.right),
+            y=slice(bounding_box.top, bounding_box.bottom),
+        )
+
+        # data_array is likely to have 1 too many pixels in x and y
+        # because sel(x=slice(a, b)) is [a, b], not [a, b).  So trim:
+        return data_array.isel(
+            x=slice(0, self._square.size_pixels), y=slice(0, self._square.size_pixels)
+        )
+
+    def _zarr_store(self) -> Union[Path, str, PrefetchStore, List[PrefetchStore]]:
+        """
+        The Zarr store to open.
+
+        If neither async_chunk_reads nor disk_cache_dir are set, then this is just zarr_path.
+        Otherwise it is a PrefetchStore, or a list of PrefetchStores if zarr_path has wildcards.
+        """
+        if not (self.async_chunk_reads or self.disk_cache_dir):
+            return self.zarr_path
+        if self._zarr_stores is not None:
+            return self._zarr_stores
+
+        disk_cache = (
+            None
+            if self.disk_cache_dir is None
+            else DiskCache(self.disk_cache_dir, max_size_mb=self.disk_cache_size_mb)
+        )
+        has_wildcards = "*" in str(self.zarr_path)
+        if has_wildcards:
+            filesystem = nd_fs_utils.get_filesystem(self.zarr_path)
+            urls = [filesystem.unstrip_protocol(path) for path in filesystem.glob(self.zarr_path)]
+        else:
+            urls = [str(self.zarr_path)]
+        stores = [
+            PrefetchStore(
+                url, max_concurrent_requests=self.max_concurrent_chunk_reads, disk_cache=disk_cache
+            )
+            for url in sorted(urls)
+        ]
+
+        if self.async_chunk_reads:
+            if has_wildcards:
+                logger.warning(
+                    f"{self.__class__.__name__} can't use async_chunk_reads, because zarr_path"
+                    f" has wildcards: {self.zarr_path}"
+                )
+            else:
+                self._prefetch_store = stores[0]
+                self._chunk_index = ZarrChunkIndex(
+                    self._prefetch_store,
+                    variable_name=self.zarr_variable_name,
+                    consolidated=self.consolidated,
+                )
+
+        self._zarr_stores = stores if has_wildcards else stores[0]
+        return self._zarr_stores
+
+    def get_batch(
+        self,
+        t0_datetimes: pd.DatetimeIndex,
+        x_locations: Iterable[Number],
+        y_locations: Iterable[Number],
+        **kwargs,
+    ) -> DataSourceOutput:
+        """
+        Get Batch Data.  See `DataSource.get_batch`.
+
+        If async_chunk_reads, then all the Zarr chunks needed by the batch are fetched
+        concurrently first, and the examples are then decoded from those chunks.  Unless
+        `low_memory`, because then all the chunks of the batch would be in memory at once.
+        """
+        if self._prefetch_store is None or kwargs.get("low_memory", False):
+            return super().get_batch(t0_datetimes, x_locations, y_locations, **kwargs)
+
+        with self.stage_timer.time_stage("prefetch"):
+            self._prefetch_chunks(t0_datetimes, x_locations, y_locations)
+        try:
+            return super().get_batch(t0_datetimes, x_locations, y_locations, **kwargs)
+        finally:
+            self._prefetch_store.clear_prefetched()
+
+    def _prefetch_chunks(
+        self,
+        t0_datetimes: pd.DatetimeIndex,
+        x_locations: Iterable[Number],
+        y_locations: Iterable[Number],
+    ) -> None:
+        """Fetch the Zarr chunks needed by every example of the batch, concurrently"""
+        chunk_keys = set()
+        for t0_datetime, x_location, y_location in zip(t0_datetimes, x_locations, y_locations):
+            try:
+                selected_data = self.get_spatial_region_of_interest(
+                    data_array=self._get_time_slice(t0_datetime),
+                    x_center_osgb=x_location,
+                    y_center_osgb=y_location,
+                )
+            except Exception:
+                # get_example will raise a more helpful exception for this example.
+                continue
+            chunk_keys_for_example = self._chunk_index.chunk_keys(selected_data)
+            if chunk_keys_for_example is not None:
+                chunk_keys.update(chunk_keys_for_example)
+        self._prefetch_store.prefetch(chunk_keys)
 
     def geospatial_border(self) -> List[Tuple[Number, Number]]:
         """
@@ -442,7 +790,7 @@ class ZarrDataSource(ImageDataSource):
         in OSGB projection.
         """
         GEO_BORDER: int = 64  #: In same geo projection and units as sat_data.
-        data = self._open_data()
+        data = self._open_data_once()
         return [
             (data.x.values[x], data.y.values[y])
             for x, y in itertools.product([GEO_BORDER, -GEO_BORDER], [GEO_BORDER, -GEO_BORDER])
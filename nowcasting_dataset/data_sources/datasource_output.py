@@ -1,20 +1,29 @@
 """ General Data Source output pydantic class. """
 from __future__ import annotations
 
+import json
 import logging
 import os
 from pathlib import Path
-from typing import Tuple
+from typing import Tuple, Union
 
+import fsspec
 import numpy as np
 import xarray as xr
 
 from nowcasting_dataset.dataset.xr_utils import PydanticXArrayDataSet
 from nowcasting_dataset.filesystem.utils import makedirs
-from nowcasting_dataset.utils import get_netcdf_filename
+from nowcasting_dataset.utils import get_netcdf_filename, get_npy_dirname
 
 logger = logging.getLogger(__name__)
 
+# The file, in each `.npy` batch folder, that lists the dims of each variable.
+NPY_VARIABLES_FILENAME = "variables.json"
+
+# The number of elements checked at a time by `check_data_single_pass`.
+# 2**16 float32 values is 256 KB, which fits comfortably in L2 cache.
+SINGLE_PASS_BLOCK_SIZE = 2**16
+
 
 class DataSourceOutput(PydanticXArrayDataSet):
     """General Data Source output pydantic class.
@@ -52,6 +61,70 @@ class DataSourceOutput(PydanticXArrayDataSet):
         encoding = {name: {"compression": "lzf"} for name in self.data_vars}
         self.to_netcdf(local_filename, engine="h5netcdf", mode="w", encoding=encoding)
 
+    def save_npy(self, batch_i: int, path: Path):
+        """
+        Save batch to uncompressed `.npy` files in path/<DataSourceOutputName>/<batch_i>/.
+
+        There is one `.npy` file for each variable, and a json file with the dims of each
+        variable. This layout can be memory-mapped when it is loaded, see `load_npy`.
+        Variables of Python strings (object dtype) are saved as numpy strings, and are loaded as
+        numpy strings.
+
+        Raises:
+            ValueError if a variable has an object dtype, but isn't all strings, because it
+                can't be saved without pickling it.
+
+        Args:
+            batch_i: the batch id, used to make the folder name
+            path: the path where it will be saved. This can be local or in the cloud.
+        """
+        folder = os.path.join(path, self.get_name(), get_npy_dirname(batch_i))
+        makedirs(path=folder)
+
+        variables = {}
+        for name, variable in self.variables.items():
+            variables[name] = {"dims": list(variable.dims), "coord": name in self.coords}
+            values = variable.values
+            if values.dtype == object:
+                if not all(isinstance(value, str) for value in values.flat):
+                    raise ValueError(
+                        f"{self.get_name()} variable {name} has an object dtype, but isn't all"
+                        " strings, so can't be saved to a .npy file without pickling it"
+                    )
+                values = values.astype(str)
+            with fsspec.open(os.path.join(folder, f"{name}.npy"), mode="wb") as file:
+                np.save(file, values, allow_pickle=False)
+
+        with fsspec.open(os.path.join(folder, NPY_VARIABLES_FILENAME), mode="w") as file:
+            json.dump(variables, file)
+
+    @staticmethod
+    def load_npy(folder: Union[Path, str]) -> xr.Dataset:
+        """
+        Load one batch, saved by `save_npy`, by memory-mapping each `.npy` file.
+
+        The data is not copied, so processes loading the same batch share page-cache pages.
+        The arrays are read-only.
+
+        Args:
+            folder: the local folder of one batch of one data source
+
+        Returns: xr.Dataset wrapping the memory-mapped arrays
+        """
+        with open(os.path.join(folder, NPY_VARIABLES_FILENAME)) as file:
+            variables = json.load(file)
+
+        data_vars = {}
+        coords = {}
+        for name, variable in variables.items():
+            data = np.load(os.path.join(folder, f"{name}.npy"), mmap_mode="r")
+            if variable["coord"]:
+                coords[name] = xr.Variable(variable["dims"], data)
+            else:
+                data_vars[name] = xr.Variable(variable["dims"], data)
+
+        return xr.Dataset(data_vars=data_vars, coords=coords)
+
     def check_nan_and_inf(self, data: xr.Dataset, variable_name: str = None):
         """Check that all values are non NaNs and not infinite"""
 
@@ -105,6 +178,74 @@ class DataSourceOutput(PydanticXArrayDataSet):
             else:
                 logger.warning(message)
 
+    def check_data_single_pass(
+        self,
+        data: xr.Dataset,
+        variable_name: str = None,
+        min_value: float = None,
+        max_value: float = None,
+        not_equal_value: float = None,
+        raise_error_if_equal: bool = True,
+    ):
+        """Check all the values of one data variable, reading through the data once.
+
+        This does the same checks as `check_nan_and_inf`, `check_dataset_greater_than_or_equal_to`,
+        `check_dataset_less_than_or_equal_to` and `check_dataset_not_equal`.  But, instead of
+        each check being a separate pass over the whole array, the array is checked one
+        cache-sized block at a time, and every check is run on a block before moving on.
+
+        Args:
+            data: the data to check
+            variable_name: the name of the data variable, used in the error messages
+            min_value: if set, check all values are >= min_value
+            max_value: if set, check all values are <= max_value
+            not_equal_value: if set, check no values are close to not_equal_value
+            raise_error_if_equal: raise an error if a value is close to not_equal_value.
+                Otherwise, just log a warning.
+        """
+        name = self.__class__.__name__
+        suffix = "" if variable_name is None else f" ({variable_name})"
+        values = np.asarray(data).ravel()
+
+        message = None
+        found_equal_value = False
+        for start in range(0, values.size, SINGLE_PASS_BLOCK_SIZE):
+            block = values[start : start + SINGLE_PASS_BLOCK_SIZE]
+            # min() and max() both return NaN if there are any NaNs in the block.
+            block_min = block.min()
+            block_max = block.max()
+
+            if np.isnan(block_min) or np.isnan(block_max):
+                message = f"Some {name} data values are NaNs"
+            elif np.isinf(block_min) or np.isinf(block_max):
+                message = f"Some {name} data values are Infinite"
+            elif min_value is not None and block_min < min_value:
+                message = f"Some {name} data values are less than {min_value}"
+            elif max_value is not None and block_max > max_value:
+                message = f"Some {name} data values are greater than {max_value}"
+            if message is not None:
+                break
+
+            # Only look for `not_equal_value` if it lies within the range of this block.
+            if (
+                not_equal_value is not None
+                and not found_equal_value
+                and block_min <= not_equal_value + 1e-5 * (1 + abs(not_equal_value))
+                and block_max >= not_equal_value - 1e-5 * (1 + abs(not_equal_value))
+            ):
+                found_equal_value = np.isclose(block, not_equal_value).any()
+                if found_equal_value and raise_error_if_equal:
+                    message = f"Some {name} data values are equal to {not_equal_value}"
+                    break
+
+        if message is not None:
+            message += suffix
+            logger.error(message)
+            raise Exception(message)
+
+        if found_equal_value:
+            logger.warning(f"Some {name} data values are equal to {not_equal_value}{suffix}")
+
     def check_data_var_dim(self, data: xr.Dataset, expected_dims: Tuple[str]):
         """Check the data var has the correct dims"""
 
@@ -2,18 +2,25 @@
 
 Wanted to keep this out of the testing frame works, as other repos, might want to use this
 """
-from typing import List
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
 
+import numcodecs
 import numpy as np
 import pandas as pd
 import xarray as xr
 
+from nowcasting_dataset import geospatial
 from nowcasting_dataset.consts import NWP_VARIABLE_NAMES, SAT_VARIABLE_NAMES
+from nowcasting_dataset.data_sources.gsp.eso import get_gsp_metadata_from_eso
 from nowcasting_dataset.data_sources.gsp.gsp_model import GSP
 from nowcasting_dataset.data_sources.metadata.metadata_model import Metadata
 from nowcasting_dataset.data_sources.nwp.nwp_model import NWP
 from nowcasting_dataset.data_sources.pv.pv_model import PV
 from nowcasting_dataset.data_sources.satellite.satellite_model import HRVSatellite, Satellite
+from nowcasting_dataset.data_sources.sun.raw_data_load_save import save_to_zarr, x_y_to_name
 from nowcasting_dataset.data_sources.sun.sun_model import Sun
 from nowcasting_dataset.data_sources.topographic.topographic_model import Topographic
 from nowcasting_dataset.dataset.xr_utils import (
@@ -21,6 +28,9 @@ from nowcasting_dataset.dataset.xr_utils import (
     convert_coordinates_to_indexes_for_list_datasets,
     join_list_dataset_to_batch_dataset,
 )
+from nowcasting_dataset.filesystem.utils import makedirs
+
+logger = logging.getLogger(__name__)
 
 
 def gsp_fake(
@@ -389,3 +399,491 @@ def join_list_data_array_to_batch_dataset(data_arrays: List[xr.DataArray]) -> xr
     ]
 
     return join_list_dataset_to_batch_dataset(datasets)
+
+
+# ****************** SYNTHETIC DATA STORES **********************
+# Write realistic-size data to disk, in the same formats as the real data, so that the whole
+# pipeline can be load tested offline.  The values are plausible, but not real.
+
+#: The folder layout of the synthetic stores, which is the same as `tests/data`.
+SYNTHETIC_STORE_FILENAMES = dict(
+    satellite="sat_data.zarr",
+    hrvsatellite="hrv_sat_data.zarr",
+    nwp="nwp_data/test.zarr",
+    pv="pv_data/test.nc",
+    pv_metadata="pv_metadata/UK_PV_metadata.csv",
+    gsp="gsp/test.zarr",
+    sun="sun/test.zarr",
+)
+
+# The geospatial boundary of the PV systems, in OSGB coordinates.  See PVDataSource.
+_PV_BOUNDARY_OSGB = dict(west=-238_000, east=856_000, north=1_222_000, south=-184_000)
+
+
+def datetimes_with_gaps(
+    start_dt: pd.Timestamp,
+    end_dt: pd.Timestamp,
+    freq: str,
+    gap_fraction: float = 0.0,
+    gap_length: int = 12,
+    rng: Optional[np.random.Generator] = None,
+) -> pd.DatetimeIndex:
+    """
+    Make regularly spaced datetimes, with some gaps removed
+
+    Args:
+        start_dt: the first datetime
+        end_dt: the last datetime
+        freq: the time between datetimes, e.g. "5T"
+        gap_fraction: roughly the fraction of datetimes which are removed
+        gap_length: the number of consecutive datetimes removed in each gap
+        rng: random number generator
+
+    Returns: the datetimes, without the gaps
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    datetimes = pd.date_range(start_dt, end_dt, freq=freq)
+    n_gaps = int(len(datetimes) * gap_fraction / gap_length)
+    keep = np.ones(len(datetimes), dtype=bool)
+    for gap_start in rng.integers(low=0, high=len(datetimes), size=n_gaps):
+        keep[gap_start : gap_start + gap_length] = False
+    return datetimes[keep]
+
+
+def _add_nans(data: np.ndarray, nan_fraction: float, rng: np.random.Generator) -> np.ndarray:
+    """Set roughly `nan_fraction` of the values in `data` to NaN, in place"""
+    if nan_fraction > 0:
+        data[rng.random(data.shape) < nan_fraction] = np.nan
+    return data
+
+
+def _solar_profile(datetimes: pd.DatetimeIndex) -> np.ndarray:
+    """Rough clear-sky shape of solar generation, between 0 and 1, at each datetime (UTC)"""
+    hour = datetimes.hour + datetimes.minute / 60
+    day_length_hours = 12 + 4 * np.sin(2 * np.pi * (datetimes.dayofyear - 80) / 365)
+    sunrise_hour = 12 - day_length_hours / 2
+    fraction_of_day = (hour - sunrise_hour) / day_length_hours
+    return np.clip(np.sin(np.pi * fraction_of_day), 0, None).values.astype(np.float32)
+
+
+def create_synthetic_satellite_zarr(
+    zarr_path: Union[str, Path],
+    datetimes: pd.DatetimeIndex,
+    channels: Iterable[str] = ("IR_016",),
+    n_x: int = 615,
+    n_y: int = 298,
+    meters_per_pixel_x: float = 3000.0,
+    meters_per_pixel_y: float = 6500.0,
+    chunks: Optional[Dict[str, int]] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Write a satellite Zarr store, in the same format as the EUMETSAT Zarr stores
+
+    The data is written a chunk of timesteps at a time, so stores which are much larger than
+    memory can be written.
+
+    Args:
+        zarr_path: where to save the Zarr store
+        datetimes: the timesteps of the satellite images
+        channels: the satellite channels, e.g. ("HRV", ) for high-resolution visible
+        n_x: the number of pixels from east to west
+        n_y: the number of pixels from south to north
+        meters_per_pixel_x: the size of each pixel, east to west
+        meters_per_pixel_y: the size of each pixel, south to north
+        chunks: the chunk size of each dimension, defaults to one timestep per chunk
+        rng: random number generator
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    chunks = dict(time=1, x=548, y=298, variable=1) if chunks is None else chunks
+    channels = list(channels)
+
+    # x is stored east-to-west, and y is stored south-to-north.
+    x = 1_346_000 - meters_per_pixel_x * np.arange(n_x)
+    y = -556_000 + meters_per_pixel_y * np.arange(n_y)
+
+    for i_start in range(0, len(datetimes), chunks["time"]):
+        times = datetimes[i_start : i_start + chunks["time"]]
+        data = rng.integers(
+            low=0, high=1024, size=(len(times), n_x, n_y, len(channels)), dtype=np.int16
+        )
+        dataset = xr.DataArray(
+            data,
+            coords=dict(time=times, x=x, y=y, variable=channels),
+            dims=("time", "x", "y", "variable"),
+        ).to_dataset(name="stacked_eumetsat_data")
+        dataset = dataset.chunk(chunks)
+
+        if i_start == 0:
+            encoding = {
+                "stacked_eumetsat_data": {
+                    "compressor": numcodecs.Blosc(cname="zstd", clevel=5),
+                    "chunks": tuple(chunks[dim] for dim in dataset.stacked_eumetsat_data.dims),
+                },
+                # Otherwise the units are inferred from the first block, and can be too coarse.
+                "time": {"units": "minutes since 1970-01-01", "dtype": "int64"},
+            }
+            dataset.to_zarr(zarr_path, mode="w", encoding=encoding)
+        else:
+            dataset.to_zarr(zarr_path, append_dim="time")
+
+
+def create_synthetic_nwp_zarr(
+    zarr_path: Union[str, Path],
+    init_times: pd.DatetimeIndex,
+    channels: Iterable[str] = NWP_VARIABLE_NAMES,
+    n_steps: int = 37,
+    n_x: int = 548,
+    n_y: int = 704,
+    nan_fraction: float = 0.0,
+    chunks: Optional[Dict[str, int]] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Write a NWP Zarr store, in the same format as the UK Met Office UKV Zarr stores
+
+    The data is written one init time at a time.
+
+    Args:
+        zarr_path: where to save the Zarr store
+        init_times: the init times of the forecasts
+        channels: the NWP variables
+        n_steps: the number of hourly forecast steps, starting at step 0
+        n_x: the number of 2km pixels from west to east
+        n_y: the number of 2km pixels from north to south
+        nan_fraction: the fraction of values which are NaN
+        chunks: the chunk size of each dimension
+        rng: random number generator
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    chunks = dict(variable=1, init_time=1, step=1, y=352, x=274) if chunks is None else chunks
+    channels = list(channels)
+
+    x = -239_000 + 2_000 * np.arange(n_x)
+    y = 1_223_000 - 2_000 * np.arange(n_y)
+    steps = pd.timedelta_range(start="0H", periods=n_steps, freq="H")
+
+    for i, init_time in enumerate(init_times):
+        data = rng.standard_normal(size=(len(channels), 1, n_steps, n_y, n_x), dtype=np.float32)
+        dataset = xr.DataArray(
+            _add_nans(data, nan_fraction, rng),
+            coords=dict(variable=channels, init_time=[init_time], step=steps, y=y, x=x),
+            dims=("variable", "init_time", "step", "y", "x"),
+        ).to_dataset(name="UKV")
+        dataset = dataset.chunk(chunks)
+
+        if i == 0:
+            encoding = {
+                "UKV": {
+                    "compressor": numcodecs.Blosc(cname="zstd", clevel=5),
+                    "chunks": tuple(chunks[dim] for dim in dataset.UKV.dims),
+                },
+                "init_time": {"units": "minutes since 1970-01-01", "dtype": "int64"},
+            }
+            dataset.to_zarr(zarr_path, mode="w", encoding=encoding)
+        else:
+            dataset.to_zarr(zarr_path, append_dim="init_time")
+
+
+def create_synthetic_pv_metadata(
+    filename: Union[str, Path],
+    n_pv_systems: int,
+    rng: Optional[np.random.Generator] = None,
+) -> pd.DataFrame:
+    """
+    Write a PV metadata CSV, in the same format as the PVOutput.org metadata
+
+    Args:
+        filename: where to save the CSV file
+        n_pv_systems: the number of PV systems
+        rng: random number generator
+
+    Returns: the metadata, indexed by system_id
+    """
+    rng = np.random.default_rng() if rng is None else rng
+
+    x_osgb = rng.uniform(_PV_BOUNDARY_OSGB["west"], _PV_BOUNDARY_OSGB["east"], n_pv_systems)
+    y_osgb = rng.uniform(_PV_BOUNDARY_OSGB["south"], _PV_BOUNDARY_OSGB["north"], n_pv_systems)
+    latitude, longitude = geospatial.osgb_to_lat_lon(x=x_osgb, y=y_osgb)
+
+    pv_metadata = pd.DataFrame(
+        dict(
+            system_id=np.sort(rng.choice(100_000, size=n_pv_systems, replace=False)),
+            orientation=rng.choice([90.0, 135.0, 180.0, 225.0, 270.0], size=n_pv_systems),
+            tilt=rng.uniform(10, 50, size=n_pv_systems).round(),
+            kwp=rng.uniform(1, 10, size=n_pv_systems).round(1),
+            latitude=latitude,
+            longitude=longitude,
+        )
+    ).set_index("system_id")
+
+    makedirs(os.path.dirname(str(filename)))
+    pv_metadata.to_csv(filename)
+    return pv_metadata
+
+
+def create_synthetic_pv_netcdf(
+    filename: Union[str, Path],
+    datetimes: pd.DatetimeIndex,
+    pv_metadata: pd.DataFrame,
+    nan_fraction: float = 0.0,
+    n_pv_systems_per_write: int = 1024,
+    time_chunk_size: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Write PV power data to NetCDF, in the same format as the PVOutput.org data
+
+    There is one float32 variable for each PV system, named by the PV system ID, with a
+    `datetime` dimension in local UK time.  The data is written a block of PV systems at a
+    time, so files which are much larger than memory can be written.
+
+    Args:
+        filename: where to save the NetCDF file
+        datetimes: the datetimes of the PV data (UTC)
+        pv_metadata: the PV metadata, from `create_synthetic_pv_metadata`
+        nan_fraction: the fraction of values which are NaN
+        n_pv_systems_per_write: the number of PV systems written at a time
+        time_chunk_size: the HDF5 chunk size along `datetime`. Defaults to one chunk per system.
+        rng: random number generator
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    makedirs(os.path.dirname(str(filename)))
+
+    # The PV data is stored in local time.  See `load_solar_pv_data`.
+    local_datetimes = datetimes.tz_localize("UTC").tz_convert("Europe/London").tz_localize(None)
+    profile = _solar_profile(datetimes)
+    time_chunk_size = len(datetimes) if time_chunk_size is None else time_chunk_size
+
+    system_ids = pv_metadata.index.values
+    for i_start in range(0, len(system_ids), n_pv_systems_per_write):
+        block_system_ids = system_ids[i_start : i_start + n_pv_systems_per_write]
+        capacity_kw = pv_metadata.kwp.loc[block_system_ids].values.astype(np.float32)
+        noise = rng.uniform(0.3, 1.0, size=(len(datetimes), len(block_system_ids)))
+        power_kw = _add_nans(
+            (profile[:, np.newaxis] * capacity_kw * noise).astype(np.float32), nan_fraction, rng
+        )
+
+        dataset = xr.Dataset(
+            {
+                str(system_id): ("datetime", power_kw[:, i])
+                for i, system_id in enumerate(block_system_ids)
+            },
+            coords=dict(datetime=local_datetimes),
+        )
+        encoding = {
+            name: {"chunksizes": (min(time_chunk_size, len(datetimes)),)}
+            for name in dataset.data_vars
+        }
+        dataset.to_netcdf(
+            filename, mode="w" if i_start == 0 else "a", engine="h5netcdf", encoding=encoding
+        )
+
+
+def create_synthetic_gsp_zarr(
+    zarr_path: Union[str, Path],
+    datetimes: pd.DatetimeIndex,
+    n_gsp: int = 338,
+    nan_fraction: float = 0.0,
+    chunks: Optional[Dict[str, int]] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> None:
+    """
+    Write a GSP Zarr store, in the same format as the PVLive GSP data
+
+    Args:
+        zarr_path: where to save the Zarr store
+        datetimes: the half hourly datetimes of the GSP data
+        n_gsp: the number of GSPs, with IDs 1 to n_gsp.  There are 338 GSPs in the ESO metadata.
+        nan_fraction: the fraction of values which are NaN
+        chunks: the chunk size of each dimension
+        rng: random number generator
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    chunks = dict(datetime_gmt=len(datetimes), gsp_id=n_gsp) if chunks is None else chunks
+
+    capacity_mwp = np.tile(rng.uniform(10, 200, size=n_gsp), (len(datetimes), 1))
+    noise = rng.uniform(0.3, 1.0, size=(len(datetimes), n_gsp))
+    generation_mw = _solar_profile(datetimes)[:, np.newaxis] * capacity_mwp * noise
+
+    dims = ("datetime_gmt", "gsp_id")
+    dataset = xr.Dataset(
+        dict(
+            generation_mw=(dims, _add_nans(generation_mw, nan_fraction, rng)),
+            installedcapacity_mwp=(dims, capacity_mwp),
+        ),
+        coords=dict(datetime_gmt=datetimes, gsp_id=[str(gsp_id) for gsp_id in range(1, n_gsp + 1)]),
+    ).chunk(chunks)
+
+    encoding = {
+        name: {"compressor": numcodecs.Blosc(cname="zstd", clevel=5)} for name in dataset.data_vars
+    }
+    dataset.to_zarr(zarr_path, mode="w", encoding=encoding)
+
+
+def create_synthetic_sun_zarr(
+    zarr_path: Union[str, Path],
+    datetimes: pd.DatetimeIndex,
+    x_osgb: Iterable[float],
+    y_osgb: Iterable[float],
+) -> None:
+    """
+    Write a sun Zarr store, in the same format as `sun.raw_data_load_save.save_to_zarr`
+
+    The sun data is only stored for 2019, so `datetimes` are moved to 2019.
+    The azimuth and elevation are a rough approximation of the position of the sun.
+
+    Args:
+        zarr_path: where to save the Zarr store
+        datetimes: the datetimes of the sun data (UTC)
+        x_osgb: the x coordinates of each location
+        y_osgb: the y coordinates of each location
+    """
+    # The sun data has one column per location, so drop duplicated locations.
+    locations = pd.DataFrame(dict(x=np.asarray(x_osgb), y=np.asarray(y_osgb))).drop_duplicates()
+    x_osgb = locations.x.values
+    y_osgb = locations.y.values
+    datetimes = pd.DatetimeIndex(
+        np.unique(datetimes.map(lambda datetime: datetime.replace(year=2019)))
+    )
+    latitude, longitude = geospatial.osgb_to_lat_lon(x=x_osgb, y=y_osgb)
+
+    # Approximate position of the sun, for each datetime (rows) and location (columns).
+    declination = np.deg2rad(23.44) * np.sin(2 * np.pi * (datetimes.dayofyear.values - 81) / 365)
+    hours_utc = datetimes.hour.values + datetimes.minute.values / 60
+    hour_angle = np.deg2rad(15 * (hours_utc[:, np.newaxis] - 12) + np.asarray(longitude))
+    latitude = np.deg2rad(np.asarray(latitude))
+    declination = declination[:, np.newaxis]
+    sin_elevation = np.sin(latitude) * np.sin(declination) + np.cos(latitude) * np.cos(
+        declination
+    ) * np.cos(hour_angle)
+    elevation = np.rad2deg(np.arcsin(sin_elevation))
+    azimuth = np.rad2deg(
+        np.arctan2(
+            np.sin(hour_angle),
+            np.cos(hour_angle) * np.sin(latitude) - np.tan(declination) * np.cos(latitude),
+        )
+        + np.pi
+    )
+
+    names = [x_y_to_name(x, y) for x, y in zip(x_osgb, y_osgb)]
+    save_to_zarr(
+        azimuth=pd.DataFrame(azimuth.round(2), index=datetimes, columns=names),
+        elevation=pd.DataFrame(elevation.round(2), index=datetimes, columns=names),
+        zarr_path=zarr_path,
+    )
+
+
+def create_synthetic_data_stores(
+    path: Union[str, Path],
+    start_dt: pd.Timestamp = pd.Timestamp("2020-04-01"),
+    end_dt: pd.Timestamp = pd.Timestamp("2020-04-08"),
+    n_pv_systems: int = 10_000,
+    n_gsp: int = 338,
+    satellite_channels: Iterable[str] = ("IR_016",),
+    nwp_channels: Iterable[str] = NWP_VARIABLE_NAMES,
+    satellite_chunks: Optional[Dict[str, int]] = None,
+    hrvsatellite_chunks: Optional[Dict[str, int]] = None,
+    nwp_chunks: Optional[Dict[str, int]] = None,
+    gsp_chunks: Optional[Dict[str, int]] = None,
+    gap_fraction: float = 0.0,
+    gap_length: int = 12,
+    nan_fraction: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Path]:
+    """
+    Write realistic-size synthetic data for all the data sources, in the layout of `tests/data`
+
+    Args:
+        path: the folder to write the data stores to
+        start_dt: the start of the data
+        end_dt: the end of the data
+        n_pv_systems: the number of PV systems
+        n_gsp: the number of GSPs
+        satellite_channels: the non-HRV satellite channels
+        nwp_channels: the NWP variables
+        satellite_chunks: the Zarr chunks of the satellite data
+        hrvsatellite_chunks: the Zarr chunks of the HRV satellite data
+        nwp_chunks: the Zarr chunks of the NWP data
+        gsp_chunks: the Zarr chunks of the GSP data
+        gap_fraction: the fraction of satellite, PV and GSP timesteps which are missing
+        gap_length: the number of consecutive timesteps in each gap
+        nan_fraction: the fraction of NWP, PV and GSP values which are NaN
+        seed: the seed for the random number generator
+
+    Returns: the path to the data store of each data source, keyed like SYNTHETIC_STORE_FILENAMES
+    """
+    rng = np.random.default_rng(seed)
+    paths = {name: Path(path) / filename for name, filename in SYNTHETIC_STORE_FILENAMES.items()}
+
+    def _datetimes(freq: str) -> pd.DatetimeIndex:
+        return datetimes_with_gaps(
+            start_dt, end_dt, freq=freq, gap_fraction=gap_fraction, gap_length=gap_length, rng=rng
+        )
+
+    logger.info(f"Writing synthetic data stores to {path}")
+
+    create_synthetic_satellite_zarr(
+        paths["satellite"],
+        datetimes=_datetimes("5T"),
+        channels=satellite_channels,
+        chunks=satellite_chunks,
+        rng=rng,
+    )
+    create_synthetic_satellite_zarr(
+        paths["hrvsatellite"],
+        datetimes=_datetimes("5T"),
+        channels=("HRV",),
+        n_x=1843,
+        n_y=891,
+        meters_per_pixel_x=1000.0,
+        meters_per_pixel_y=2200.0,
+        chunks=hrvsatellite_chunks
+        if hrvsatellite_chunks is not None
+        else dict(time=1, x=548, y=704, variable=1),
+        rng=rng,
+    )
+    create_synthetic_nwp_zarr(
+        paths["nwp"],
+        init_times=pd.date_range(start_dt.floor("3H"), end_dt, freq="3H"),
+        channels=nwp_channels,
+        nan_fraction=nan_fraction,
+        chunks=nwp_chunks,
+        rng=rng,
+    )
+
+    pv_metadata = create_synthetic_pv_metadata(
+        paths["pv_metadata"], n_pv_systems=n_pv_systems, rng=rng
+    )
+    create_synthetic_pv_netcdf(
+        paths["pv"],
+        datetimes=_datetimes("5T"),
+        pv_metadata=pv_metadata,
+        nan_fraction=nan_fraction,
+        rng=rng,
+    )
+    create_synthetic_gsp_zarr(
+        paths["gsp"],
+        datetimes=_datetimes("30T"),
+        n_gsp=n_gsp,
+        nan_fraction=nan_fraction,
+        chunks=gsp_chunks,
+        rng=rng,
+    )
+
+    # The sun data is needed at the location of every PV system and GSP, using the same
+    # conversion to OSGB as the PV and GSP data sources.
+    pv_x, pv_y = geospatial.lat_lon_to_osgb(pv_metadata.latitude, pv_metadata.longitude)
+    gsp_metadata = get_gsp_metadata_from_eso()
+    gsp_metadata = gsp_metadata.dropna(subset=["centroid_lon", "centroid_lat"])
+    gsp_x, gsp_y = geospatial.lat_lon_to_osgb(
+        lat=gsp_metadata["centroid_lat"], lon=gsp_metadata["centroid_lon"]
+    )
+    create_synthetic_sun_zarr(
+        paths["sun"],
+        datetimes=pd.date_range(start_dt, end_dt, freq="5T"),
+        x_osgb=np.concatenate([np.asarray(pv_x), np.asarray(gsp_x)]),
+        y_osgb=np.concatenate([np.asarray(pv_y), np.asarray(gsp_y)]),
+    )
+
+    return paths
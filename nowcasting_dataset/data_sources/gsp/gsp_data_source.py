@@ -13,7 +13,7 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 
-import nowcasting_dataset.filesystem.utils as nd_fs_utils
+from nowcasting_dataset import shared_arrays
 from nowcasting_dataset.consts import DEFAULT_N_GSP_PER_EXAMPLE
 from nowcasting_dataset.data_sources.data_source import ImageDataSource
 from nowcasting_dataset.data_sources.gsp.eso import get_gsp_metadata_from_eso
@@ -23,6 +23,10 @@ from nowcasting_dataset.square import get_bounding_box_mask
 
 logger = logging.getLogger(__name__)
 
+# The number of datetimes to read from the Zarr store at once, so the whole of the data is never
+# held in memory in the dtype of the Zarr store.  One year of half hourly data.
+N_DATETIMES_PER_READ = 17_520
+
 
 @dataclass
 class GSPDataSource(ImageDataSource):
@@ -62,9 +66,9 @@ class GSPDataSource(ImageDataSource):
         self.rng = np.random.default_rng()
         self.load()
 
-    def check_input_paths_exist(self) -> None:
-        """Check input paths exist.  If not, raise a FileNotFoundError."""
-        nd_fs_utils.check_path_exists(self.zarr_path)
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data"""
+        return [self.zarr_path]
 
     @property
     def sample_period_minutes(self) -> int:
@@ -99,6 +103,13 @@ class GSPDataSource(ImageDataSource):
         self.gsp_power, self.metadata = drop_gsp_by_threshold(
             self.gsp_power, self.metadata, threshold_mw=self.threshold_mw
         )
+        self.gsp_capacity = self.gsp_capacity[self.gsp_power.columns]
+
+        # Whether each GSP has both power and capacity data at each datetime, so the GSPs with
+        # data for each example can be found without dropping NaNs from DataFrames.
+        self._gsp_has_data = self.gsp_power.notna().values & self.gsp_capacity.notna().values
+        # Share the GSP data with the worker processes, rather than copying it into each process.
+        shared_arrays.move_to_shared_memory(self, ["gsp_power", "gsp_capacity", "_gsp_has_data"])
 
         logger.debug(f"There are {len(self.gsp_power.columns)} GSP")
 
@@ -120,6 +131,23 @@ class GSPDataSource(ImageDataSource):
 
         Returns: list of x and y locations
 
+        """
+        x_centers_osgb, y_centers_osgb, _ = self.get_locations_and_object_ids(t0_datetimes)
+        return x_centers_osgb, y_centers_osgb
+
+    def get_locations_and_object_ids(
+        self, t0_datetimes: pd.DatetimeIndex
+    ) -> Tuple[List[Number], List[Number], List[int]]:
+        """
+        Get x and y locations, and the id of the GSP at each location.
+
+        See `get_locations`.
+
+        Args:
+            t0_datetimes: list of available t0 datetimes.
+
+        Returns: list of x and y locations, and list of GSP ids
+
         """
         total_gsp_nan_count = self.gsp_power.isna().sum().sum()
         if total_gsp_nan_count == 0:
@@ -133,6 +161,7 @@ class GSPDataSource(ImageDataSource):
             # get x, y locations
             x_centers_osgb = list(metadata.location_x)
             y_centers_osgb = list(metadata.location_y)
+            gsp_ids = [int(gsp_id) for gsp_id in metadata.gsp_id]
 
         else:
 
@@ -145,6 +174,7 @@ class GSPDataSource(ImageDataSource):
             # their geographical location.
             x_centers_osgb = []
             y_centers_osgb = []
+            gsp_ids = []
 
             for t0_dt in t0_datetimes:
 
@@ -167,11 +197,16 @@ class GSPDataSource(ImageDataSource):
                 # Get metadata for GSP
                 x_centers_osgb.append(metadata_for_gsp.location_x)
                 y_centers_osgb.append(metadata_for_gsp.location_y)
+                gsp_ids.append(int(random_gsp_id))
 
-        return x_centers_osgb, y_centers_osgb
+        return x_centers_osgb, y_centers_osgb, gsp_ids
 
     def get_example(
-        self, t0_dt: pd.Timestamp, x_meters_center: Number, y_meters_center: Number
+        self,
+        t0_dt: pd.Timestamp,
+        x_meters_center: Number,
+        y_meters_center: Number,
+        object_id: Optional[int] = None,
     ) -> xr.Dataset:
         """
         Get data example from one time point (t0_dt) and for x and y coords.
@@ -182,21 +217,25 @@ class GSPDataSource(ImageDataSource):
             t0_dt: datetime of "now". History and forecast are also returned
             x_meters_center: x location of center GSP.
             y_meters_center: y location of center GSP.
+            object_id: The id of the center GSP, if known.  If None, or if the GSP has no data
+                for this example, then the center GSP is found from the coordinates.
 
         Returns: Dictionary with GSP data in it.
         """
         logger.debug("Getting example data")
 
         # get the GSP power, including history and forecast
-        selected_gsp_power, selected_capacity = self._get_time_slice(t0_dt)
+        with self.stage_timer.time_stage("time_slice"):
+            datetimes, gsp_power, gsp_capacity, gsp_has_data = self._get_time_slice(t0_dt)
+        # The positions of the GSPs with data in the columns of `gsp_power`, and their ids.
+        gsp_columns_with_data = np.flatnonzero(gsp_has_data)
+        gsp_ids_with_data = self.gsp_power.columns[gsp_columns_with_data]
 
         # get the main gsp id, and the ids of the gsp in the bounding box
-        all_gsp_ids = self._get_gsp_ids_in_roi(
-            x_meters_center, y_meters_center, selected_gsp_power.columns
-        )
+        all_gsp_ids = self._get_gsp_ids_in_roi(x_meters_center, y_meters_center, gsp_ids_with_data)
         if self.get_center:
             central_gsp_id = self._get_central_gsp_id(
-                x_meters_center, y_meters_center, selected_gsp_power.columns
+                x_meters_center, y_meters_center, gsp_ids_with_data, object_id=object_id
             )
             assert central_gsp_id in all_gsp_ids
 
@@ -210,9 +249,13 @@ class GSPDataSource(ImageDataSource):
         # only select at most {n_gsp_per_example}
         all_gsp_ids = all_gsp_ids[: self.n_gsp_per_example]
 
-        # select the GSP power output for the selected GSP IDs
-        selected_gsp_power = selected_gsp_power[all_gsp_ids]
-        selected_capacity = selected_capacity[all_gsp_ids]
+        # select the GSP power output for the selected GSP IDs.  The ids are looked up in
+        # `gsp_ids_with_data`, which belongs to this example, because pandas builds the hash
+        # table of an Index the first time it is used, which isn't thread-safe, so looking up
+        # the shared columns of `gsp_power` from several example threads at once can fail.
+        columns = gsp_columns_with_data[gsp_ids_with_data.get_indexer(all_gsp_ids)]
+        selected_gsp_power = gsp_power[:, columns]
+        selected_capacity = gsp_capacity[:, columns]
 
         # get x,y coordinates
         gsp_x_coords = self.metadata.location_x[all_gsp_ids]
@@ -220,20 +263,20 @@ class GSPDataSource(ImageDataSource):
 
         # convert to data array
         da = xr.DataArray(
-            data=selected_gsp_power.values,
+            data=selected_gsp_power,
             dims=["time", "id"],
             coords=dict(
                 id=all_gsp_ids.values.astype(int),
-                time=selected_gsp_power.index.values,
+                time=datetimes.values,
             ),
         )
 
         capacity = xr.DataArray(
-            data=selected_capacity.values,
+            data=selected_capacity,
             dims=["time", "id"],
             coords=dict(
                 id=all_gsp_ids.values.astype(int),
-                time=selected_gsp_power.index.values,
+                time=datetimes.values,
             ),
         )
 
@@ -265,6 +308,7 @@ class GSPDataSource(ImageDataSource):
         x_meters_center: Number,
         y_meters_center: Number,
         gsp_ids_with_data_for_timeslice: pd.Int64Index,
+        object_id: Optional[int] = None,
     ) -> int:
         """
         Get the GSP id of the central GSP from coordinates
@@ -274,11 +318,16 @@ class GSPDataSource(ImageDataSource):
             y_meters_center: the location of the gsp (y)
             gsp_ids_with_data_for_timeslice: List of gsp ids that are available for a certain
                 timeslice.
+            object_id: The GSP id chosen by `get_locations_and_object_ids`, if known.  This is
+                returned without looking at the coordinates, if the GSP has data.
 
         Returns: GSP id
         """
         logger.debug("Getting Central GSP")
 
+        if object_id is not None and object_id in gsp_ids_with_data_for_timeslice:
+            return object_id
+
         # If x_meters_center and y_meters_center have been chosen
         # by {}.get_locations() then we just have
         # to find the gsp_ids at that exact location.  This is
@@ -348,16 +397,23 @@ class GSPDataSource(ImageDataSource):
         assert len(gsp_ids) > 0
         return gsp_ids
 
-    def _get_time_slice(self, t0_dt: pd.Timestamp) -> [pd.DataFrame]:
+    def _get_time_slice(
+        self, t0_dt: pd.Timestamp
+    ) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, np.ndarray]:
         """
-        Get time slice of GSP power data for give time.
+        Get time slice of GSP power and capacity data for give time.
 
         Note the time is extended backwards by history lenght and forward by prediction time
 
+        The window always has the same number of half hours, so this is two binary searches of
+        the datetimes, and a reduction of the rows of the window of the GSP validity bitmap.
+
         Args:
             t0_dt: timestamp of interest
 
-        Returns: pandas data frame of GSP power data
+        Returns: the datetimes of the window, the power and the capacity of all the GSPs (the
+            columns of `gsp_power`), of shape (datetime, GSP), and a boolean mask of the GSPs
+            which have power and capacity data at every datetime of the window.
         """
         logger.debug(f"Getting power slice for {t0_dt}")
 
@@ -368,19 +424,22 @@ class GSPDataSource(ImageDataSource):
         # need to floor by 30 mins.
         # If t0 is 12.45 and history duration is 1 hours, then start_dt will be 11.45.
         # But we need to collect data at 11.30, 12.00, and 12.30
-        start_dt = pd.to_datetime(start_dt).floor("30T")
+        start_dt = pd.Timestamp(start_dt).floor("30T")
 
         # select power and capacity for certain times
-        power = self.gsp_power.loc[start_dt:end_dt]
-        capacity = self.gsp_capacity.loc[start_dt:end_dt]
-
-        # remove any nans
-        power = power.dropna(axis="columns", how="any")
-        capacity = capacity.dropna(axis="columns", how="any")
-
-        logger.debug(f"Found {len(power.columns)} GSP valid data for {t0_dt}")
-
-        return power, capacity
+        datetimes = self.gsp_power.index
+        start_idx = datetimes.searchsorted(start_dt, side="left")
+        end_idx = datetimes.searchsorted(end_dt, side="right")
+        gsp_has_data = self._gsp_has_data[start_idx:end_idx].all(axis=0)
+
+        logger.debug(f"Found {gsp_has_data.sum()} GSP valid data for {t0_dt}")
+
+        return (
+            datetimes[start_idx:end_idx],
+            self.gsp_power.values[start_idx:end_idx],
+            self.gsp_capacity.values[start_idx:end_idx],
+            gsp_has_data,
+        )
 
 
 def drop_gsp_by_threshold(gsp_power: pd.DataFrame, meta_data: pd.DataFrame, threshold_mw: int = 20):
@@ -412,50 +471,75 @@ def load_solar_gsp_data(
     zarr_path: Union[str, Path],
     start_dt: Optional[datetime] = None,
     end_dt: Optional[datetime] = None,
+    dtype: np.dtype = np.float32,
 ) -> (pd.DataFrame, pd.DataFrame):
     """
     Load solar PV GSP data
 
+    The Zarr stores the power and capacity as 2D (datetime_gmt, gsp_id) arrays, so these are read
+    straight into the 2D arrays of the DataFrames, a block of datetimes at a time, without making a
+    long DataFrame and pivoting it.
+
     Args:
         zarr_path:  zarr_path of file to be loaded, can put 'gs://' files in here too
         start_dt: the start datetime, which to trim the data to
         end_dt: the end datetime, which to trim the data to
+        dtype: the dtype of the returned power and capacity
 
-    Returns: dataframe of pv data
-
+    Returns: dataframes of the GSP power and the GSP capacity, with an index of datetimes and a
+        column for each GSP id.  The columns are in the order of the GSP ids in the Zarr, sorted.
     """
     logger.debug(f"Loading Solar GSP Data from {zarr_path} from {start_dt} to {end_dt}")
-    # Open data - it may be quicker to open byte file first, but decided just to keep it
-    # like this at the moment.
     gsp_power_and_capacity = xr.open_dataset(zarr_path, engine="zarr")
+    # Selecting on the index is lazy, so only the data in the time range is read.
     gsp_power_and_capacity = gsp_power_and_capacity.sel(datetime_gmt=slice(start_dt, end_dt))
 
-    # make dataframe with index datetime_gmt and columns og gsp_id
-    gsp_power_and_capacity_df = gsp_power_and_capacity.to_dataframe()
-    gsp_power_and_capacity_df.reset_index(inplace=True)
-    gsp_power_df = gsp_power_and_capacity_df.pivot(
-        index="datetime_gmt", columns="gsp_id", values="generation_mw"
-    )
+    datetimes = pd.DatetimeIndex(gsp_power_and_capacity.datetime_gmt.values, name="datetime_gmt")
+    gsp_ids = gsp_power_and_capacity.gsp_id.values
+    row_order = np.argsort(datetimes.values, kind="stable")
+    column_order = np.argsort(gsp_ids, kind="stable")
 
-    gsp_capacity_df = gsp_power_and_capacity_df.pivot(
-        index="datetime_gmt", columns="gsp_id", values="installedcapacity_mwp"
+    gsp_power = _load_gsp_array(
+        gsp_power_and_capacity["generation_mw"], row_order, column_order, dtype
     )
+    gsp_capacity = _load_gsp_array(
+        gsp_power_and_capacity["installedcapacity_mwp"], row_order, column_order, dtype
+    )
+    gsp_power_and_capacity.close()
 
-    # Save memory
-    del gsp_power_and_capacity
-
-    # Process the data a little
-    gsp_power_df = gsp_power_df.dropna(axis="columns", how="all")
-    gsp_power_df = gsp_power_df.clip(lower=0, upper=5e7)
-    gsp_capacity_df = gsp_capacity_df.dropna(axis="columns", how="all")
-    gsp_capacity_df = gsp_capacity_df.clip(lower=0, upper=5e7)
-
-    # remove whole rows of nans
-    gsp_power_df = gsp_power_df.dropna(axis="columns", how="all")
-    gsp_capacity_df = gsp_capacity_df.loc[:, gsp_power_df.columns]
+    # Remove GSPs with no power data.
+    has_data = ~np.isnan(gsp_power).all(axis=0)
+    if not has_data.all():
+        gsp_power = gsp_power[:, has_data]
+        gsp_capacity = gsp_capacity[:, has_data]
 
     # make column names ints, not strings
-    gsp_power_df.columns = [int(col) for col in gsp_power_df.columns]
-    gsp_capacity_df.columns = [int(col) for col in gsp_capacity_df.columns]
+    index = datetimes[row_order]
+    columns = pd.Index([int(gsp_id) for gsp_id in gsp_ids[column_order][has_data]])
+    gsp_power_df = pd.DataFrame(gsp_power, index=index, columns=columns, copy=False)
+    gsp_capacity_df = pd.DataFrame(gsp_capacity, index=index, columns=columns, copy=False)
 
     return gsp_power_df, gsp_capacity_df
+
+
+def _load_gsp_array(
+    data_array: xr.DataArray, row_order: np.ndarray, column_order: np.ndarray, dtype: np.dtype
+) -> np.ndarray:
+    """
+    Load a (datetime_gmt, gsp_id) array, a block of datetimes at a time, clipped to [0, 5e7]
+
+    Args:
+        data_array: the lazily loaded array
+        row_order: the order of the datetimes in the returned array
+        column_order: the order of the GSPs in the returned array
+        dtype: the dtype of the returned array
+    """
+    data_array = data_array.transpose("datetime_gmt", "gsp_id")
+    values = np.empty(data_array.shape, dtype=dtype)
+    for start in range(0, len(values), N_DATETIMES_PER_READ):
+        rows = row_order[start : start + N_DATETIMES_PER_READ]
+        # Read the contiguous range of datetimes which contains these rows.
+        block = data_array[rows.min() : rows.max() + 1].values
+        values[start : start + len(rows)] = block[rows - rows.min()][:, column_order]
+    np.clip(values, 0, 5e7, out=values)
+    return values
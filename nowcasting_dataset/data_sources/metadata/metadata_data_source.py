@@ -17,6 +17,9 @@ class MetadataDataSource(DataSource):
 
     object_at_center: str = "GSP"
 
+    # Making an example is trivial, so a thread pool would only add overhead.
+    default_n_example_threads = 1
+
     def get_data_model_for_batch(self):
         """Get the model that is used in the batch"""
         return Metadata
@@ -1,7 +1,8 @@
 """ NWP Data Source """
 import logging
+from collections.abc import MutableMapping
 from dataclasses import InitVar, dataclass
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Union
 
 import numpy as np
 import pandas as pd
@@ -52,6 +53,8 @@ class NWPDataSource(ZarrDataSource):
     image_size_pixels: InitVar[int] = 2
     meters_per_pixel: InitVar[int] = 2_000
 
+    zarr_variable_name = "UKV"
+
     def __post_init__(self, image_size_pixels: int, meters_per_pixel: int):
         """
         Post init
@@ -79,11 +82,11 @@ class NWPDataSource(ZarrDataSource):
         instances into separate processes.  Instead,
         call open() _after_ creating separate processes.
         """
-        data = self._open_data()
+        data = self._open_data_once()
         self._data = data.sel(variable=list(self.channels))
 
     def _open_data(self) -> xr.DataArray:
-        return open_nwp(self.zarr_path, consolidated=self.consolidated)
+        return open_nwp(self._zarr_store(), consolidated=self.consolidated)
 
     def get_data_model_for_batch(self):
         """Get the model that is used in the batch"""
@@ -141,10 +144,7 @@ class NWPDataSource(ZarrDataSource):
 
     def datetime_index(self) -> pd.DatetimeIndex:
         """Returns a complete list of all available datetimes"""
-        if self._data is None:
-            nwp = self._open_data()
-        else:
-            nwp = self._data
+        nwp = self._open_data_once()
 
         # We need to return the `target_times` (the times the NWPs are _about_).
         # The `target_time` is the `init_time` plus the forecast horizon `step`.
@@ -163,12 +163,13 @@ class NWPDataSource(ZarrDataSource):
         return 60
 
 
-def open_nwp(zarr_path: str, consolidated: bool) -> xr.DataArray:
+def open_nwp(zarr_path: Union[str, MutableMapping], consolidated: bool) -> xr.DataArray:
     """
     Open The NWP data
 
     Args:
-        zarr_path: zarr_path must start with 'gs://' if it's on GCP.
+        zarr_path: zarr_path must start with 'gs://' if it's on GCP.  Or a Zarr store, e.g. a
+            PrefetchStore.
         consolidated: Is the Zarr metadata consolidated?
 
     Returns: NWP data.
@@ -22,9 +22,21 @@ class NWP(DataSourceOutput):
         """Check that all values are not NaNs"""
 
         v.check_nan_and_inf(data=v.data)
+        cls.check_data_var_dims(v)
 
+        return v
+
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Check that all values are not NaNs, with one pass over the data"""
+        v.check_data_single_pass(data=v.data)
+        cls.check_data_var_dims(v)
+
+        return v
+
+    @classmethod
+    def check_data_var_dims(cls, v):
+        """Check the dims of each data variable"""
         v.check_data_var_dim(
             v.data, ("example", "time_index", "x_index", "y_index", "channels_index")
         )
-
-        return v
@@ -2,20 +2,22 @@
 
 import datetime
 import functools
-import io
 import logging
+import os
+from concurrent import futures
 from dataclasses import dataclass
 from numbers import Number
 from pathlib import Path
 from typing import List, Optional, Tuple, Union
 
 import fsspec
+import h5py
 import numpy as np
 import pandas as pd
 import xarray as xr
+from pandas.tseries.frequencies import to_offset
 
-import nowcasting_dataset.filesystem.utils as nd_fs_utils
-from nowcasting_dataset import geospatial
+from nowcasting_dataset import geospatial, shared_arrays
 from nowcasting_dataset.consts import DEFAULT_N_PV_SYSTEMS_PER_EXAMPLE
 from nowcasting_dataset.data_sources.data_source import ImageDataSource
 from nowcasting_dataset.data_sources.pv.pv_model import PV
@@ -23,6 +25,14 @@ from nowcasting_dataset.square import get_bounding_box_mask
 
 logger = logging.getLogger(__name__)
 
+# The size of the blocks read from the PV NetCDF file.
+PV_FILE_BLOCK_SIZE = 64 * 2**20
+# The name of the coordinate of the datetimes in the PV NetCDF file.
+PV_DATETIME_VARIABLE_NAME = "datetime"
+# The number of values in each block of PV systems which is resampled and interpolated at once.
+# This bounds the size of the temporary float64 arrays.
+N_VALUES_PER_INTERPOLATION_BLOCK = 2**22
+
 
 @dataclass
 class PVDataSource(ImageDataSource):
@@ -50,10 +60,9 @@ class PVDataSource(ImageDataSource):
         self.rng = np.random.default_rng()
         self.load()
 
-    def check_input_paths_exist(self) -> None:
-        """Check input paths exist.  If not, raise a FileNotFoundError."""
-        for filename in [self.filename, self.metadata_filename]:
-            nd_fs_utils.check_path_exists(filename)
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data"""
+        return [self.filename, self.metadata_filename]
 
     def load(self):
         """
@@ -62,6 +71,8 @@ class PVDataSource(ImageDataSource):
         self._load_metadata()
         self._load_pv_power()
         self.pv_metadata, self.pv_power = align_pv_system_ids(self.pv_metadata, self.pv_power)
+        # Share the PV power with the worker processes, rather than copying it into each process.
+        shared_arrays.move_to_shared_memory(self, ["pv_power"])
 
     def get_data_model_for_batch(self):
         """Get the model that is used in the batch"""
@@ -113,7 +124,7 @@ class PVDataSource(ImageDataSource):
         # Resample to 5-minutely and interpolate up to 15 minutes ahead.
         # TODO: Issue #301: Give users the option to NOT resample (because Perceiver IO
         # doesn't need all the data to be perfectly aligned).
-        pv_power = pv_power.resample("5T").interpolate(method="time", limit=3)
+        pv_power = resample_and_interpolate(pv_power, freq="5T", limit=3, n_threads=os.cpu_count())
         pv_power.dropna(axis="index", how="all", inplace=True)
         # self.pv_power = dd.from_pandas(pv_power, npartitions=3)
         print("pv_power = {:,.1f} MB".format(pv_power.values.nbytes / 1e6))
@@ -146,7 +157,13 @@ class PVDataSource(ImageDataSource):
         x_meters_center: Number,
         y_meters_center: Number,
         pv_system_ids_with_data_for_timeslice: pd.Int64Index,
+        object_id: Optional[int] = None,
     ) -> int:
+        # If the PV system was chosen by `get_locations_and_object_ids` then we already know
+        # its id, and don't need to look it up from its coordinates.
+        if object_id is not None and object_id in pv_system_ids_with_data_for_timeslice:
+            return object_id
+
         # If x_meters_center and y_meters_center have been chosen
         # by PVDataSource.pick_locations_for_batch() then we just have
         # to find the pv_system_ids at that exact location.  This is
@@ -211,7 +228,11 @@ class PVDataSource(ImageDataSource):
         return pv_system_ids
 
     def get_example(
-        self, t0_dt: pd.Timestamp, x_meters_center: Number, y_meters_center: Number
+        self,
+        t0_dt: pd.Timestamp,
+        x_meters_center: Number,
+        y_meters_center: Number,
+        object_id: Optional[int] = None,
     ) -> xr.Dataset:
         """
         Get Example data for PV data
@@ -221,19 +242,23 @@ class PVDataSource(ImageDataSource):
                 data for historic and future depending on 'history_minutes' and 'future_minutes'.
             x_meters_center: x center batch locations
             y_meters_center: y center batch locations
+            object_id: The id of the central PV system, if known.  If None, or if the PV system
+                has no data for this example, then the central PV system is found from the
+                coordinates.
 
         Returns: Example data
 
         """
         logger.debug("Getting PV example data")
 
-        selected_pv_power, selected_pv_capacity = self._get_time_slice(t0_dt)
+        with self.stage_timer.time_stage("time_slice"):
+            selected_pv_power, selected_pv_capacity = self._get_time_slice(t0_dt)
         all_pv_system_ids = self._get_all_pv_system_ids_in_roi(
             x_meters_center, y_meters_center, selected_pv_power.columns
         )
         if self.get_center:
             central_pv_system_id = self._get_central_pv_system_id(
-                x_meters_center, y_meters_center, selected_pv_power.columns
+                x_meters_center, y_meters_center, selected_pv_power.columns, object_id=object_id
             )
 
             # By convention, the 'target' PV system ID (the one in the center
@@ -304,6 +329,17 @@ class PVDataSource(ImageDataSource):
         Returns:  x_locations, y_locations. Each has one entry per t0_datetime.
             Locations are in OSGB coordinates.
         """
+        x_locations, y_locations, _ = self.get_locations_and_object_ids(t0_datetimes)
+        return x_locations, y_locations
+
+    def get_locations_and_object_ids(
+        self, t0_datetimes: pd.DatetimeIndex
+    ) -> Tuple[List[Number], List[Number], List[int]]:
+        """Find a valid geographical location for each t0_datetime, and the PV system there.
+
+        Returns:  x_locations, y_locations, pv_system_ids. Each has one entry per t0_datetime.
+            Locations are in OSGB coordinates.
+        """
         # Set this up as a separate function, so we can cache the result!
         @functools.cache  # functools.cache requires Python >= 3.9
         def _get_pv_system_ids(t0_datetime: pd.Timestamp) -> pd.Int64Index:
@@ -319,6 +355,7 @@ class PVDataSource(ImageDataSource):
         # their geographical location.
         x_locations = []
         y_locations = []
+        chosen_pv_system_ids = []
         for t0_datetime in t0_datetimes:
             pv_system_ids = _get_pv_system_ids(t0_datetime)
             pv_system_id = self.rng.choice(pv_system_ids)
@@ -327,8 +364,9 @@ class PVDataSource(ImageDataSource):
             metadata_for_pv_system = self.pv_metadata.loc[pv_system_id]
             x_locations.append(metadata_for_pv_system.location_x)
             y_locations.append(metadata_for_pv_system.location_y)
+            chosen_pv_system_ids.append(int(pv_system_id))
 
-        return x_locations, y_locations
+        return x_locations, y_locations, chosen_pv_system_ids
 
     def datetime_index(self) -> pd.DatetimeIndex:
         """Returns a complete list of all available datetimes."""
@@ -339,48 +377,90 @@ def load_solar_pv_data(
     filename: Union[str, Path],
     start_dt: Optional[datetime.datetime] = None,
     end_dt: Optional[datetime.datetime] = None,
+    dtype: np.dtype = np.float32,
 ) -> pd.DataFrame:
     """
     Load solar pv data from any compute environment.
 
+    The NetCDF file has one variable for each PV system.  The file is streamed, and each PV
+    system is read straight into a preallocated matrix and clipped, so the peak memory is close
+    to the size of the returned DataFrame.
+
     Args:
         filename: filename of file to be loaded
         start_dt: the start datetime, which to trim the data to
         end_dt: the end datetime, which to trim the data to
+        dtype: the dtype of the returned PV power
 
     Returns: Solar PV data
     """
     logger.debug(f"Loading Solar PV Data from {filename} from {start_dt} to {end_dt}.")
 
-    # It is possible to simplify the code below and do
-    # xr.open_dataset(file, engine='h5netcdf')
-    # in the first 'with' block, and delete the second 'with' block.
-    # But that takes 1 minute to load the data, where as loading into memory
-    # first and then loading from memory takes 23 seconds!
-    with fsspec.open(filename, mode="rb") as file:
-        file_bytes = file.read()
+    # Opening the file lazily makes many small reads, which is very slow from cloud storage.
+    # But the data of each PV system is stored in one piece, in order, so reading large blocks
+    # ahead is fast.  The file is read with h5py, because xarray and h5netcdf take minutes to
+    # open a NetCDF file with tens of thousands of variables.
+    with fsspec.open(
+        filename, mode="rb", block_size=PV_FILE_BLOCK_SIZE, cache_type="readahead"
+    ) as file, h5py.File(file, mode="r") as pv_power:
+        datetimes = pv_power[PV_DATETIME_VARIABLE_NAME]
+        datetimes = pd.DatetimeIndex(
+            xr.coding.times.decode_cf_datetime(
+                datetimes[:],
+                units=_decode_attr(datetimes.attrs["units"]),
+                calendar=_decode_attr(datetimes.attrs.get("calendar", "standard")),
+            ),
+            name=PV_DATETIME_VARIABLE_NAME,
+        )
+        time_slice = datetimes.slice_indexer(start_dt, end_dt)
+        datetimes = datetimes[time_slice]
+        names = [name for name in pv_power if name != PV_DATETIME_VARIABLE_NAME]
+
+        # In Fortran order, the data of each PV system is contiguous, and the DataFrame
+        # doesn't copy the matrix.
+        values = np.empty((len(datetimes), len(names)), dtype=dtype, order="F")
+        # Convert the pv_system_id names from strings to ints:
+        pv_system_ids = []
+        for name in names:
+            pv_system_power = values[:, len(pv_system_ids)]
+            pv_system_power[:] = _decode_pv_system_power(pv_power[name], time_slice)
+            # Drop PV systems with no data, by overwriting them with the next PV system.
+            if not np.isnan(pv_system_power).all():
+                np.clip(pv_system_power, 0, 5e7, out=pv_system_power)
+                pv_system_ids.append(np.int32(name))
+
+    pv_power_df = pd.DataFrame(
+        values[:, : len(pv_system_ids)], index=datetimes, columns=pv_system_ids, copy=False
+    )
+
+    if "passiv" not in str(filename):
+        pv_power_df.index = (
+            pv_power_df.index.tz_localize("Europe/London").tz_convert("UTC").tz_convert(None)
+        )
 
-    with io.BytesIO(file_bytes) as file:
-        pv_power = xr.open_dataset(file, engine="h5netcdf")
-        pv_power = pv_power.sel(datetime=slice(start_dt, end_dt))
-        pv_power_df = pv_power.to_dataframe()
+    logger.debug("Loading Solar PV Data: done")
 
-    # Save memory
-    del file_bytes
-    del pv_power
+    return pv_power_df
 
-    # Process the data a little
-    pv_power_df = pv_power_df.dropna(axis="columns", how="all")
-    pv_power_df = pv_power_df.clip(lower=0, upper=5e7)
-    # Convert the pv_system_id column names from strings to ints:
-    pv_power_df.columns = [np.int32(col) for col in pv_power_df.columns]
 
-    if "passiv" not in filename:
-        pv_power_df = pv_power_df.tz_localize("Europe/London").tz_convert("UTC").tz_convert(None)
+def _decode_attr(value: Union[str, bytes]) -> str:
+    """HDF5 attributes written by NetCDF can be bytes"""
+    return value.decode() if isinstance(value, bytes) else value
 
-    logger.debug("Loading Solar PV Data: done")
 
-    return pv_power_df
+def _decode_pv_system_power(variable: h5py.Dataset, time_slice: slice) -> np.ndarray:
+    """Read the power of one PV system, and decode it like xarray, with NaN for missing data"""
+    power = variable[time_slice]
+    attrs = variable.attrs
+    if power.dtype.kind != "f" or "scale_factor" in attrs or "add_offset" in attrs:
+        power = power.astype(np.float64)
+    for missing_value_attr in ("_FillValue", "missing_value"):
+        missing_value = attrs.get(missing_value_attr)
+        if missing_value is not None and not np.isnan(missing_value).all():
+            power[np.isin(power, missing_value)] = np.nan
+    power *= attrs.get("scale_factor", 1)
+    power += attrs.get("add_offset", 0)
+    return power
 
 
 def align_pv_system_ids(
@@ -394,6 +474,129 @@ def align_pv_system_ids(
     return pv_metadata, pv_power
 
 
+def resample_and_interpolate(
+    pv_power: pd.DataFrame, freq: str = "5T", limit: int = 3, n_threads: int = 1
+) -> pd.DataFrame:
+    """
+    Resample the PV power to `freq`, and linearly interpolate gaps of up to `limit` periods.
+
+    Gives the same result as `pv_power.resample(freq).interpolate(method="time", limit=limit)`,
+    but the PV power is resampled straight into the returned matrix, and only the missing values
+    are interpolated, in place, without copying the whole DataFrame several times.  Blocks of PV
+    systems can be interpolated in a thread pool.  As in pandas, values which are not at a
+    multiple of `freq` are dropped (with a warning), unless the PV power is already regularly
+    spaced at `freq`, in which case each value is moved back onto the multiple of `freq` before it.
+    The first `limit` missing values of longer gaps are interpolated, and the last value of each
+    PV system is carried forward for `limit` periods.
+
+    Args:
+        pv_power: PV power, with a DatetimeIndex and a column for each PV system
+        freq: the frequency to resample to
+        limit: the maximum number of consecutive missing values to interpolate
+        n_threads: the number of threads which interpolate blocks of PV systems
+
+    Returns: the resampled PV power, with the same dtype as `pv_power` (if floats)
+    """
+    # Let pandas find the resampled datetimes, from one column.
+    datetimes = pd.Series(0, index=pv_power.index).resample(freq).asfreq().index
+    inferred_freq = pv_power.index.inferred_freq
+    if (
+        inferred_freq is not None
+        and to_offset(inferred_freq) == to_offset(freq)
+        and len(pv_power.index) == len(datetimes)
+    ):
+        # Like pandas, regularly-spaced PV power is moved onto the resampled datetimes, even if
+        # it's not at multiples of `freq`.
+        rows = np.arange(len(datetimes))
+        is_resampled_datetime = np.ones(len(datetimes), dtype=bool)
+    else:
+        rows = datetimes.get_indexer(pv_power.index)
+        is_resampled_datetime = rows >= 0
+        rows = rows[is_resampled_datetime]
+        if not is_resampled_datetime.all():
+            logger.warning(
+                f"Dropping the PV power at {(~is_resampled_datetime).sum():,d} of"
+                f" {len(pv_power.index):,d} datetimes, which are not multiples of {freq}"
+            )
+    is_already_resampled = len(rows) == len(datetimes) and is_resampled_datetime.all()
+    values = pv_power.values
+    x = datetimes.asi8.astype(np.float64)
+
+    # In Fortran order, the data of each PV system is contiguous.
+    dtype = values.dtype if values.dtype.kind == "f" else np.float64
+    resampled = np.empty((len(datetimes), len(pv_power.columns)), dtype=dtype, order="F")
+
+    def _resample_and_interpolate_block(columns: slice) -> None:
+        block = resampled[:, columns]
+        if is_already_resampled:
+            block[:] = values[:, columns]
+        else:
+            block[:] = np.nan
+            block[rows] = values[is_resampled_datetime, columns]
+        _interpolate_with_limit(x, block.T, limit=limit)
+
+    n_columns_per_block = max(1, N_VALUES_PER_INTERPOLATION_BLOCK // max(1, len(datetimes)))
+    column_blocks = [
+        slice(start, start + n_columns_per_block)
+        for start in range(0, len(pv_power.columns), n_columns_per_block)
+    ]
+    if n_threads > 1 and len(column_blocks) > 1:
+        # numpy releases the GIL, so the blocks are interpolated in parallel.
+        with futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+            list(executor.map(_resample_and_interpolate_block, column_blocks))
+    else:
+        for columns in column_blocks:
+            _resample_and_interpolate_block(columns)
+
+    return pd.DataFrame(resampled, index=datetimes, columns=pv_power.columns, copy=False)
+
+
+def _interpolate_with_limit(x: np.ndarray, y: np.ndarray, limit: int) -> None:
+    """
+    Linearly interpolate the first `limit` NaNs of each gap in each row of `y`, in place
+
+    Like `pd.DataFrame.interpolate(method="time", limit=limit)` for each row: NaNs before the
+    first valid value are not filled, and the last valid value is carried forward, like
+    `np.interp`.  The same arithmetic as `np.interp` is used, so the results are identical.
+
+    Args:
+        x: the x coordinate of each column, in increasing order
+        y: 2D array of floats, of shape (number of series, len(x))
+        limit: the maximum number of consecutive NaNs to fill
+    """
+    n_series, n_x = y.shape
+    # Pad each series with a valid value at each end, so the gaps are never in two series.
+    is_nan = np.zeros((n_series, n_x + 2), dtype=bool)
+    np.isnan(y, out=is_nan[:, 1:-1])
+    is_nan = is_nan.ravel()
+    gap_starts = np.flatnonzero(~is_nan[:-1] & is_nan[1:]) + 1
+    gap_ends = np.flatnonzero(is_nan[:-1] & ~is_nan[1:]) + 1
+    series = gap_starts // (n_x + 2)
+    gap_starts = gap_starts % (n_x + 2) - 1
+    gap_ends = gap_ends % (n_x + 2) - 1
+
+    # Don't fill the NaNs before the first valid value.
+    has_previous = gap_starts > 0
+    series, gap_starts, gap_ends = (
+        series[has_previous],
+        gap_starts[has_previous],
+        gap_ends[has_previous],
+    )
+    for i in range(limit):
+        is_in_gap = gap_starts + i < gap_ends
+        series, gap_starts, gap_ends = series[is_in_gap], gap_starts[is_in_gap], gap_ends[is_in_gap]
+        previous = gap_starts - 1
+        current = gap_starts + i
+        y_previous = y[series, previous].astype(np.float64)
+        # After the last valid value, the slope is zero, so the last valid value is carried
+        # forward.
+        has_next = gap_ends < n_x
+        next_ = np.where(has_next, gap_ends, previous)
+        x_steps = np.where(has_next, x[next_] - x[previous], 1.0)
+        slopes = (y[series, next_] - y_previous) / x_steps
+        y[series, current] = slopes * (x[current] - x[previous]) + y_previous
+
+
 def drop_pv_systems_which_produce_overnight(pv_power: pd.DataFrame) -> pd.DataFrame:
     """Drop systems which produce power over night."""
     # TODO: Of these bad systems, 24647, 42656, 42807, 43081, 51247, 59919
@@ -25,12 +25,24 @@ class PV(DataSourceOutput):
         """Check that all values are non NaNs"""
         v.check_nan_and_inf(data=v.power_mw)
         v.check_dataset_greater_than_or_equal_to(data=v.power_mw, min_value=0)
+        cls.check_data_var_dims(v)
 
+        return v
+
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Check that all values are non NaNs, with one pass over the data"""
+        v.check_data_single_pass(data=v.power_mw, min_value=0)
+        cls.check_data_var_dims(v)
+
+        return v
+
+    @classmethod
+    def check_data_var_dims(cls, v):
+        """Check the dims of each data variable"""
         v.check_data_var_dim(v.power_mw, ("example", "time_index", "id_index"))
         v.check_data_var_dim(v.capacity_mwp, ("example", "id_index"))
         v.check_data_var_dim(v.time, ("example", "time_index"))
         v.check_data_var_dim(v.x_coords, ("example", "id_index"))
         v.check_data_var_dim(v.y_coords, ("example", "id_index"))
         v.check_data_var_dim(v.pv_system_row_number, ("example", "id_index"))
-
-        return v
@@ -1,8 +1,10 @@
 """ Satellite Data Source """
+import itertools
 import logging
+from collections.abc import MutableMapping
 from dataclasses import InitVar, dataclass
 from numbers import Number
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 import dask
 import numpy as np
@@ -12,7 +14,15 @@ import xarray as xr
 import nowcasting_dataset.time as nd_time
 from nowcasting_dataset.consts import SAT_VARIABLE_NAMES
 from nowcasting_dataset.data_sources.data_source import ZarrDataSource
+from nowcasting_dataset.data_sources.satellite.satellite_metadata import (
+    SatelliteZarrMetadata,
+    compute_metadata,
+    list_stores,
+    metadata_cache_key,
+    open_lazy_view,
+)
 from nowcasting_dataset.data_sources.satellite.satellite_model import Satellite
+from nowcasting_dataset.filesystem.disk_cache import DiskCache
 
 _LOG = logging.getLogger("nowcasting_dataset")
 
@@ -25,9 +35,12 @@ class SatelliteDataSource(ZarrDataSource):
     image_size_pixels: InitVar[int] = 128
     meters_per_pixel: InitVar[int] = 2_000
 
+    zarr_variable_name = "stacked_eumetsat_data"
+
     def __post_init__(self, image_size_pixels: int, meters_per_pixel: int):
         """Post Init"""
         super().__post_init__(image_size_pixels, meters_per_pixel)
+        self._metadata = None
         n_channels = len(self.channels)
         self._shape_of_example = (
             self.total_seq_length,
@@ -45,11 +58,49 @@ class SatelliteDataSource(ZarrDataSource):
         instances into separate processes.  Instead,
         call open() _after_ creating separate processes.
         """
-        self._data = self._open_data()
-        self._data = self._data.sel(variable=list(self.channels))
+        self._data = self._open_data_once().sel(variable=list(self.channels))
 
     def _open_data(self) -> xr.DataArray:
-        return open_sat_data(zarr_path=self.zarr_path, consolidated=self.consolidated)
+        # x is left in the order of the Zarr store (right-to-left), and is flipped when cropping.
+        return open_sat_data(
+            zarr_path=self._zarr_store(),
+            consolidated=self.consolidated,
+            metadata=self.metadata,
+            flip_x=False,
+        )
+
+    @property
+    def metadata(self) -> SatelliteZarrMetadata:
+        """
+        The combined metadata of the satellite Zarr stores.
+
+        This is computed once, and then kept, so opening the data again (e.g. in each worker
+        process) is cheap.  If `disk_cache_dir` is set then the metadata is also cached there, so
+        it is only computed again when the Zarr stores change.
+        """
+        if self._metadata is None:
+            urls, stores = zip(*list_stores(self._zarr_store()))
+            disk_cache = (
+                None
+                if self.disk_cache_dir is None
+                else DiskCache(self.disk_cache_dir, max_size_mb=self.disk_cache_size_mb)
+            )
+            cache_key = (
+                None
+                if disk_cache is None
+                else metadata_cache_key(urls, consolidated=self.consolidated)
+            )
+            if cache_key is not None:
+                cached_metadata = disk_cache.get(f"satellite_metadata/{cache_key}")
+                if cached_metadata is not None:
+                    _LOG.debug(f"Loaded the satellite metadata from {self.disk_cache_dir}")
+                    self._metadata = SatelliteZarrMetadata.from_bytes(cached_metadata)
+                    return self._metadata
+
+            self._metadata = compute_metadata(stores, consolidated=self.consolidated)
+            if cache_key is not None:
+                disk_cache.put(f"satellite_metadata/{cache_key}", self._metadata.to_bytes())
+        return self._metadata
 
     def get_data_model_for_batch(self):
         """Get the model that is used in the batch"""
@@ -83,8 +134,16 @@ class SatelliteDataSource(ZarrDataSource):
         Returns:
             The selected data around the center
         """
+        # The data might be right-to-left, as in the Zarr store.  If so, find the pixels in the
+        # left-to-right order, and then select them with a negative-stride slice, so the example
+        # is always left-to-right.
+        x_values = data_array.x.values
+        x_is_descending = len(x_values) > 1 and x_values[0] > x_values[-1]
+        if x_is_descending:
+            x_values = x_values[::-1]
+
         x_index = (
-            np.searchsorted(data_array.x.values, x_center_osgb) - 1
+            np.searchsorted(x_values, x_center_osgb) - 1
         )  # To have the center fall within the pixel
         y_index = np.searchsorted(data_array.y.values, y_center_osgb) - 1
         min_y = y_index - (self._square.size_pixels // 2)
@@ -97,8 +156,14 @@ class SatelliteDataSource(ZarrDataSource):
             f"X location must be at least {(self._square.size_pixels // 2)}"
             f" pixels from the edge of the area, but is {x_index} for x center of {x_center_osgb}"
         )
+        if x_is_descending:
+            start_x = len(x_values) - 1 - min_x
+            stop_x = start_x - self._square.size_pixels
+            x_slice = slice(start_x, stop_x if stop_x >= 0 else None, -1)
+        else:
+            x_slice = slice(min_x, min_x + self._square.size_pixels)
         data_array = data_array.isel(
-            x=slice(min_x, min_x + self._square.size_pixels),
+            x=x_slice,
             y=slice(min_y, min_y + self._square.size_pixels),
         )
         return data_array
@@ -118,12 +183,15 @@ class SatelliteDataSource(ZarrDataSource):
         Returns: Example Data
 
         """
-        selected_data = self._get_time_slice(t0_dt)
-        selected_data = self.get_spatial_region_of_interest(
-            data_array=selected_data,
-            x_center_osgb=x_meters_center,
-            y_center_osgb=y_meters_center,
-        )
+        with self.stage_timer.time_stage("time_slice"):
+            selected_data = self._get_time_slice(t0_dt)
+
+        with self.stage_timer.time_stage("spatial_crop"):
+            selected_data = self.get_spatial_region_of_interest(
+                data_array=selected_data,
+                x_center_osgb=x_meters_center,
+                y_center_osgb=y_meters_center,
+            )
 
         selected_data = selected_data.rename({"variable": "channels"})
         selected_data = self._post_process_example(selected_data, t0_dt)
@@ -139,7 +207,10 @@ class SatelliteDataSource(ZarrDataSource):
                 f"actual shape {selected_data.shape}"
             )
 
-        return selected_data.load().to_dataset(name="data")
+        with self.stage_timer.time_stage("load"):
+            selected_data = selected_data.load()
+
+        return selected_data.to_dataset(name="data")
 
     def datetime_index(self, remove_night: bool = True) -> pd.DatetimeIndex:
         """Returns a complete list of all available datetimes
@@ -184,12 +255,7 @@ class SatelliteDataSource(ZarrDataSource):
           1. [Video of June 2019](https://www.youtube.com/watch?v=IOp-tj-IJpk)
           2. [Video of Jan 2019](https://www.youtube.com/watch?v=CJ4prUVa2nQ)
         """
-        if self._data is None:
-            sat_data = self._open_data()
-        else:
-            sat_data = self._data
-
-        datetime_index = pd.DatetimeIndex(sat_data.time.values)
+        datetime_index = pd.DatetimeIndex(self.metadata.coords["time"])
 
         if remove_night:
             border_locations = self.geospatial_border()
@@ -199,6 +265,25 @@ class SatelliteDataSource(ZarrDataSource):
 
         return datetime_index
 
+    def geospatial_border(self) -> List[Tuple[Number, Number]]:
+        """
+        Get 'corner' coordinates for a rectangle within the boundary of the data.
+
+        Uses the metadata, so doesn't need to open the data.
+
+        Returns List of 2-tuples of the x and y coordinates of each corner,
+        in OSGB projection.
+        """
+        GEO_BORDER: int = 64  #: In same geo projection and units as sat_data.
+        x = np.sort(self.metadata.coords["x"])
+        y = self.metadata.coords["y"]
+        return [
+            (x[x_index], y[y_index])
+            for x_index, y_index in itertools.product(
+                [GEO_BORDER, -GEO_BORDER], [GEO_BORDER, -GEO_BORDER]
+            )
+        ]
+
 
 class HRVSatelliteDataSource(SatelliteDataSource):
     """Satellite Data Source for HRV data."""
@@ -208,87 +293,40 @@ class HRVSatelliteDataSource(SatelliteDataSource):
     meters_per_pixel: InitVar[int] = 2_000
 
 
-def remove_acq_time_from_dataset_and_fix_time_coords(dataset: xr.Dataset) -> xr.Dataset:
-    """
-    Preprocess datasets by dropping `acq_time`, which causes problems otherwise
-
-    Args:
-        dataset: xr.Dataset to preprocess
-
-    Returns:
-        dataset with acq_time dropped
-    """
-    dataset = dataset.drop_vars("acq_time", errors="ignore")
-
-    # If there are any duplicated init_times then drop the duplicated init_times:
-    data_array = dataset["stacked_eumetsat_data"]
-    times = pd.DatetimeIndex(data_array["time"])
-    if not times.is_unique:
-        n_duplicates = times.duplicated().sum()
-        _LOG.warning(f"Satellite Zarr has {n_duplicates:,d} duplicated times.  Fixing...")
-        data_array = data_array.drop_duplicates(dim="time")
-        times = pd.DatetimeIndex(data_array["time"])
-        dataset = data_array.to_dataset(name="stacked_eumetsat_data")
-
-    # If any init_times are not monotonic_increasing then drop the out-of-order init_times:
-    if not times.is_monotonic_increasing:
-        total_n_out_of_order_times = 0
-        _LOG.warning("Satellite Zarr times is not monotonic_increasing.  Fixing...")
-        while not times.is_monotonic_increasing:
-            diff = np.diff(times.view(int))
-            out_of_order = np.where(diff < 0)[0]
-            total_n_out_of_order_times += len(out_of_order)
-            out_of_order = times[out_of_order]
-            data_array = data_array.drop_sel(time=out_of_order)
-            times = pd.DatetimeIndex(data_array["init_time"])
-        _LOG.info(f"Fixed {total_n_out_of_order_times:,d} out of order init_times.")
-        dataset = data_array.to_dataset(name="stacked_eumetsat_data")
-
-    return dataset
-
-
-def open_sat_data(zarr_path: str, consolidated: bool) -> xr.DataArray:
+def open_sat_data(
+    zarr_path: Union[str, MutableMapping, Sequence[MutableMapping]],
+    consolidated: bool,
+    metadata: Optional[SatelliteZarrMetadata] = None,
+    flip_x: bool = True,
+) -> xr.DataArray:
     """Lazily opens the Zarr store.
 
-    Adds 1 minute to the 'time' coordinates, so the timestamps
-    are at 00, 05, ..., 55 past the hour.
+    If there are several Zarr stores (i.e. one for each month of the year), they are opened
+    together as a single DataArray.  Duplicated and out-of-order times are dropped.
 
     Args:
-      zarr_path: Cloud URL or local path pattern.  If GCP URL, must start with 'gs://'
+      zarr_path: Cloud URL or local path pattern.  If GCP URL, must start with 'gs://'.
+        Or a Zarr store (e.g. a PrefetchStore), or a list of Zarr stores.
       consolidated: Whether or not the Zarr metadata is consolidated.
+      metadata: The combined metadata of the Zarr stores.  If None, then it is computed, which
+        reads the coordinates of every Zarr store.
+      flip_x: If True then flip x, so the data is left-to-right.  Flipping is a cheap
+        negative-stride slice.  If False then x is right-to-left, as in the Zarr stores.
     """
     _LOG.debug("Opening satellite data: %s", zarr_path)
 
-    # If we are opening multiple Zarr stores (i.e. one for each month of the year) we load them
-    # together and create a single dataset from them.  open_mfdataset also works if zarr_path
-    # points to a specific zarr directory (with no wildcards).
-
     # Silence the warning about large chunks.
     # Alternatively, we could set this to True, but that slows down loading a Satellite batch
     # from 8 seconds to 50 seconds!
     dask.config.set(**{"array.slicing.split_large_chunks": False})
 
-    # Open datasets.
-    dataset = xr.open_mfdataset(
-        zarr_path,
-        chunks="auto",  # See issue #456 for why we use "auto".
-        mode="r",
-        engine="zarr",
-        concat_dim="time",
-        preprocess=remove_acq_time_from_dataset_and_fix_time_coords,
-        consolidated=consolidated,
-        combine="nested",
-    )
-
-    data_array = dataset["stacked_eumetsat_data"]
-    del dataset
-
-    # Flip coordinates to top-left first
-    data_array = data_array.reindex(x=data_array.x[::-1])
-
-    # Sanity check!
-    times = pd.DatetimeIndex(data_array["time"])
-    assert times.is_unique
-    assert times.is_monotonic_increasing
+    stores = [store for _, store in list_stores(zarr_path)]
+    if metadata is None:
+        metadata = compute_metadata(stores, consolidated=consolidated)
+    data_array = open_lazy_view(stores, metadata=metadata, consolidated=consolidated)
+
+    if flip_x:
+        # Flip coordinates to top-left first
+        data_array = data_array.isel(x=slice(None, None, -1))
 
     return data_array
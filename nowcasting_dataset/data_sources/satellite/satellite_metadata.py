@@ -0,0 +1,236 @@
+""" The combined metadata of one or more satellite Zarr stores, which can be cached as a sidecar
+
+Opening many monthly satellite Zarr stores with `xr.open_mfdataset` is slow: every store's
+coordinates are read, checked and combined, and every store's times are de-duplicated and sorted.
+`SatelliteZarrMetadata` records the result of all that work (the combined time index, the
+coordinates, and which times to keep from each store), so that it only has to be done once.
+It is small enough to be saved as a sidecar file, and to be pickled into each worker process.
+`open_lazy_view` then builds the combined DataArray straight from the Zarr arrays and the metadata,
+without reading any coordinates.
+"""
+import hashlib
+import io
+import json
+import logging
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import dask.array
+import fsspec
+import numpy as np
+import pandas as pd
+import xarray as xr
+import zarr
+
+import nowcasting_dataset.filesystem.utils as nd_fs_utils
+
+_LOG = logging.getLogger(__name__)
+
+SAT_ARRAY_NAME = "stacked_eumetsat_data"
+COORDINATE_NAMES = ("time", "x", "y", "variable")
+
+
+@dataclass
+class SatelliteZarrMetadata:
+    """
+    The combined metadata of one or more satellite Zarr stores.
+
+    Attributes:
+      time_positions: For each store, the positions along the time dimension to keep, after
+        dropping duplicated and out-of-order times.
+      coords: The combined coordinates: `time`, `x`, `y` and `variable`, in the order of the data
+        in the Zarr stores.
+      coord_attrs: The attributes of each coordinate.
+      attrs: The attributes of the satellite data.
+    """
+
+    time_positions: List[np.ndarray]
+    coords: Dict[str, np.ndarray]
+    coord_attrs: Dict[str, Dict]
+    attrs: Dict
+
+    def to_bytes(self) -> bytes:
+        """Save as a small .npz file, in memory"""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            time_positions=np.concatenate(self.time_positions),
+            n_time_positions=np.array([len(positions) for positions in self.time_positions]),
+            json=np.array(json.dumps(dict(coord_attrs=self.coord_attrs, attrs=self.attrs))),
+            **{f"coord_{name}": values for name, values in self.coords.items()},
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, value: bytes) -> "SatelliteZarrMetadata":
+        """Load from the output of `to_bytes`"""
+        with np.load(io.BytesIO(value), allow_pickle=False) as npz:
+            split_indices = np.cumsum(npz["n_time_positions"])[:-1]
+            attrs = json.loads(str(npz["json"]))
+            return cls(
+                time_positions=np.split(npz["time_positions"], split_indices),
+                coords={name: npz[f"coord_{name}"] for name in COORDINATE_NAMES},
+                coord_attrs=attrs["coord_attrs"],
+                attrs=attrs["attrs"],
+            )
+
+
+def list_stores(
+    zarr_path: Union[str, Path, MutableMapping, Sequence[MutableMapping]]
+) -> List[Tuple[Optional[str], MutableMapping]]:
+    """
+    List the Zarr stores in `zarr_path`.
+
+    Args:
+        zarr_path: A path, which can have wildcards, or a Zarr store, or a list of Zarr stores.
+
+    Returns: A list of (URL, store) for each store.  The URL is None if it isn't known.
+    """
+    if isinstance(zarr_path, MutableMapping):
+        return [(getattr(zarr_path, "url", None), zarr_path)]
+    if isinstance(zarr_path, (list, tuple)):
+        return [(getattr(store, "url", None), store) for store in zarr_path]
+
+    zarr_path = str(zarr_path)
+    if "*" in zarr_path:
+        filesystem = nd_fs_utils.get_filesystem(zarr_path)
+        urls = sorted(filesystem.unstrip_protocol(path) for path in filesystem.glob(zarr_path))
+        assert len(urls) > 0, f"No Zarr stores match {zarr_path}"
+    else:
+        urls = [zarr_path]
+    return [(url, fsspec.get_mapper(url)) for url in urls]
+
+
+def metadata_cache_key(urls: Sequence[Optional[str]], consolidated: bool) -> Optional[str]:
+    """
+    A key which changes whenever any of the Zarr stores change, or None if the URLs aren't known.
+
+    The key is made from fsspec's `ukey` of the Zarr metadata file of each store, which changes
+    when the file is modified (e.g. when a store is appended to).
+    """
+    if any(url is None for url in urls):
+        return None
+    metadata_filename = ".zmetadata" if consolidated else f"{SAT_ARRAY_NAME}/.zarray"
+    ukeys = []
+    for url in urls:
+        filesystem, path = fsspec.core.url_to_fs(url)
+        ukeys.append(filesystem.ukey(f"{path.rstrip('/')}/{metadata_filename}"))
+    return hashlib.sha256(json.dumps([list(urls), ukeys]).encode()).hexdigest()
+
+
+def _positions_to_keep(times: pd.DatetimeIndex) -> np.ndarray:
+    """The positions of `times` left after dropping duplicated and then out-of-order times"""
+    positions = np.flatnonzero(~times.duplicated())
+    if len(positions) < len(times):
+        _LOG.warning(
+            f"Satellite Zarr has {len(times) - len(positions):,d} duplicated times.  Fixing..."
+        )
+
+    total_n_out_of_order_times = 0
+    while not times[positions].is_monotonic_increasing:
+        out_of_order = np.flatnonzero(np.diff(times[positions].asi8) < 0)
+        total_n_out_of_order_times += len(out_of_order)
+        positions = np.delete(positions, out_of_order)
+    if total_n_out_of_order_times > 0:
+        _LOG.info(f"Fixed {total_n_out_of_order_times:,d} out of order times.")
+    return positions
+
+
+def compute_metadata(stores: Sequence[MutableMapping], consolidated: bool) -> SatelliteZarrMetadata:
+    """
+    Read the coordinates of every store, and work out which times to keep from each store.
+
+    Args:
+        stores: The Zarr stores, in time order.
+        consolidated: Whether or not the Zarr metadata is consolidated.
+    """
+    time_positions = []
+    times = []
+    last_time = None
+    for store in stores:
+        dataset = xr.open_dataset(
+            store,
+            engine="zarr",
+            consolidated=consolidated,
+            chunks=None,
+            drop_variables=["acq_time"],
+        )
+        positions = _positions_to_keep(dataset.get_index("time"))
+        if last_time is not None:
+            # Drop the times which overlap with the previous stores.
+            is_after_previous_stores = dataset["time"].values[positions] > last_time
+            if not is_after_previous_stores.all():
+                _LOG.warning(
+                    f"Satellite Zarr has {(~is_after_previous_stores).sum():,d} times which overlap"
+                    " with the previous Zarr stores.  Dropping them..."
+                )
+                positions = positions[is_after_previous_stores]
+        time_positions.append(positions)
+        times.append(dataset["time"].values[positions])
+        if len(positions) > 0:
+            last_time = times[-1][-1]
+        data_array = dataset[SAT_ARRAY_NAME]
+        dataset.close()
+
+    times = pd.DatetimeIndex(np.concatenate(times))
+    assert times.is_unique
+    assert times.is_monotonic_increasing
+
+    # The spatial coordinates and attributes are the same for every store, so use the last store.
+    coords = {name: data_array[name].values for name in COORDINATE_NAMES}
+    coords["time"] = times.values
+    return SatelliteZarrMetadata(
+        time_positions=time_positions,
+        coords=coords,
+        coord_attrs={name: dict(data_array[name].attrs) for name in COORDINATE_NAMES},
+        attrs=dict(data_array.attrs),
+    )
+
+
+def _open_array(store: MutableMapping, consolidated: bool) -> xr.Variable:
+    """Lazily open the satellite data of one Zarr store, decoded like `xr.open_dataset` does"""
+    group = zarr.open_consolidated(store, mode="r") if consolidated else zarr.open_group(store, "r")
+    array = group[SAT_ARRAY_NAME]
+    attrs = dict(array.attrs)
+    dims = attrs.pop("_ARRAY_DIMENSIONS")
+    attrs.pop("coordinates", None)
+    if array.fill_value is not None:
+        attrs["_FillValue"] = array.fill_value
+
+    # The same chunks as `xr.open_dataset(chunks="auto")`.
+    chunks = dask.array.core.normalize_chunks(
+        "auto", shape=array.shape, dtype=array.dtype, previous_chunks=array.chunks
+    )
+    variable = xr.Variable(dims, dask.array.from_zarr(array, chunks=chunks), attrs)
+    return xr.conventions.decode_cf_variable(SAT_ARRAY_NAME, variable)
+
+
+def open_lazy_view(
+    stores: Sequence[MutableMapping], metadata: SatelliteZarrMetadata, consolidated: bool
+) -> xr.DataArray:
+    """
+    Lazily open the satellite data of all the stores, as one DataArray.
+
+    Only the Zarr metadata of each store is read.  The coordinates come from `metadata`.
+
+    Args:
+        stores: The Zarr stores, in the same order as when computing `metadata`.
+        metadata: The metadata of `stores`.
+        consolidated: Whether or not the Zarr metadata is consolidated.
+    """
+    assert len(stores) == len(metadata.time_positions)
+    variables = []
+    for store, positions in zip(stores, metadata.time_positions):
+        variable = _open_array(store, consolidated=consolidated)
+        if len(positions) < variable.sizes["time"]:
+            variable = variable.isel(time=positions)
+        variables.append(variable)
+    variable = variables[0] if len(variables) == 1 else xr.Variable.concat(variables, dim="time")
+
+    coords = {
+        name: xr.Variable(name, values, metadata.coord_attrs[name])
+        for name, values in metadata.coords.items()
+    }
+    return xr.DataArray(variable, coords=coords, name=SAT_ARRAY_NAME, attrs=metadata.attrs)
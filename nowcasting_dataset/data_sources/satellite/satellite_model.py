@@ -21,12 +21,25 @@ class Satellite(DataSourceOutput):
         v.check_nan_and_inf(data=v.data)
         # put this validation back in when issue is done
         v.check_dataset_not_equal(data=v.data, value=-1, raise_error=False)
+        cls.check_data_var_dims(v)
+
+        return v
+
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Check that all values are non negative, with one pass over the data"""
+        v.check_data_single_pass(data=v.data, not_equal_value=-1, raise_error_if_equal=False)
+        cls.check_data_var_dims(v)
+
+        return v
+
+    @classmethod
+    def check_data_var_dims(cls, v):
+        """Check the dims of each data variable"""
         v.check_data_var_dim(
             v.data, ("example", "time_index", "x_index", "y_index", "channels_index")
         )
 
-        return v
-
 
 class HRVSatellite(Satellite):
     """Class to store HRV satellite data as a xr.Dataset with some validation"""
@@ -4,20 +4,86 @@ import logging
 import time
 from concurrent import futures
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
+import dask.array
 import numcodecs
+import numpy as np
 import pandas as pd
 import xarray as xr
-from tqdm import tqdm
 
 from nowcasting_dataset import geospatial
 
 logger = logging.getLogger(__name__)
 
 
+# The number of datestamps computed at once.  One month of 5 minute datestamps, so ~2,000 locations
+# take ~150MB per angle.
+DEFAULT_N_DATESTAMPS_PER_CHUNK = 12 * 24 * 31
+
+# The compressor used for the sun Zarr stores.
+SUN_ZARR_COMPRESSOR = numcodecs.Blosc(cname="zstd", clevel=5)
+
+
+def _unique_locations(x_centers: List[float], y_centers: List[float]) -> (List[str], np.ndarray):
+    """The names of the unique locations, and the positions of their first occurrences"""
+    assert len(x_centers) == len(y_centers)
+    names = pd.Index([x_y_to_name(x, y) for x, y in zip(x_centers, y_centers)])
+    positions = np.flatnonzero(~names.duplicated())
+    return list(names[positions]), positions
+
+
+def _to_utc(datestamps: List[datetime.datetime]) -> pd.DatetimeIndex:
+    """Datestamps as UTC, without a timezone"""
+    datestamps = pd.DatetimeIndex(datestamps)
+    if datestamps.tz is not None:
+        datestamps = datestamps.tz_convert("UTC").tz_localize(None)
+    return datestamps
+
+
+def _calculate_azimuth_and_elevation_chunk(args) -> (np.ndarray, np.ndarray):
+    """Azimuth and elevation, rounded to 2 decimal places, for (datestamps, lat, lon)"""
+    datestamps, latitudes, longitudes = args
+    azimuth, elevation = geospatial.calculate_azimuth_and_elevation_angles(
+        latitudes=latitudes, longitudes=longitudes, datestamps=datestamps
+    )
+    return azimuth.round(2), elevation.round(2)
+
+
+def _iterate_azimuth_and_elevation_chunks(
+    datestamps: pd.DatetimeIndex,
+    x_centers: np.ndarray,
+    y_centers: np.ndarray,
+    n_processes: int,
+    n_datestamps_per_chunk: int,
+) -> Iterator[Tuple[slice, np.ndarray, np.ndarray]]:
+    """
+    Compute the azimuth and elevation in chunks of datestamps, optionally in a process pool
+
+    Yields: Tuple of the slice of datestamps, and the azimuth and elevation for those datestamps.
+    """
+    latitudes, longitudes = geospatial.osgb_to_lat_lon(x=x_centers, y=y_centers)
+    chunk_slices = [
+        slice(start, min(start + n_datestamps_per_chunk, len(datestamps)))
+        for start in range(0, len(datestamps), n_datestamps_per_chunk)
+    ]
+    args = [(datestamps[chunk_slice], latitudes, longitudes) for chunk_slice in chunk_slices]
+    if n_processes > 1:
+        with futures.ProcessPoolExecutor(max_workers=n_processes) as executor:
+            results = executor.map(_calculate_azimuth_and_elevation_chunk, args)
+            for chunk_slice, (azimuth, elevation) in zip(chunk_slices, results):
+                yield chunk_slice, azimuth, elevation
+    else:
+        for chunk_slice, chunk_args in zip(chunk_slices, args):
+            yield (chunk_slice, *_calculate_azimuth_and_elevation_chunk(chunk_args))
+
+
 def get_azimuth_and_elevation(
-    datestamps: List[datetime.datetime], x_centers: List[int], y_centers: List[int]
+    datestamps: List[datetime.datetime],
+    x_centers: List[int],
+    y_centers: List[int],
+    n_processes: int = 1,
+    n_datestamps_per_chunk: int = DEFAULT_N_DATESTAMPS_PER_CHUNK,
 ) -> (pd.DataFrame, pd.DataFrame):
     """
 
@@ -25,11 +91,15 @@ def get_azimuth_and_elevation(
 
     For a list of datestamps and a list of coordinates, get the azimuth and elevation degrees.
     Note that the degrees are rounded to 2 decimal places, as we at most need that.
+    The angles of all the locations are computed at once, in chunks of datestamps.
+    See `geospatial.calculate_azimuth_and_elevation_angles`.
 
     Args:
         datestamps: list of datestamps that are needed
         x_centers: list of x coordinates - ref. OSGB
         y_centers: list of y coordinates - ref. OSGB
+        n_processes: the number of processes to compute the chunks of datestamps in
+        n_datestamps_per_chunk: the number of datestamps to compute at once
 
     Returns: Tuple of dataframes for azimuth and elevation.
         The index is timestamps, and the columns are the x and y coordinates in OSGB projection
@@ -38,62 +108,93 @@ def get_azimuth_and_elevation(
     logger.debug(
         f"Will be calculating for {len(datestamps)} datestamps and {len(x_centers)} locations"
     )
-
-    assert len(x_centers) == len(y_centers)
-
-    # create array of index datetime, columns of system_id for both azimuth and elevation
-    azimuth = []
-    elevation = []
-
     t = time.time()
-    names = []
-    # loop over locations and find azimuth and elevation angles,
-    with futures.ThreadPoolExecutor() as executor:
-
-        logger.debug("Setting up jobs")
-
-        # Submit tasks to the executor.
-        future_azimuth_and_elevation_per_location = []
-        for i in tqdm(range(len(x_centers))):
 
-            name = x_y_to_name(x_centers[i], y_centers[i])
-            if name not in names:
+    names, positions = _unique_locations(x_centers, y_centers)
+    datestamps = _to_utc(datestamps)
+    azimuth = np.empty((len(datestamps), len(names)))
+    elevation = np.empty((len(datestamps), len(names)))
+    for chunk_slice, azimuth_chunk, elevation_chunk in _iterate_azimuth_and_elevation_chunks(
+        datestamps=datestamps,
+        x_centers=np.asarray(x_centers)[positions],
+        y_centers=np.asarray(y_centers)[positions],
+        n_processes=n_processes,
+        n_datestamps_per_chunk=n_datestamps_per_chunk,
+    ):
+        azimuth[chunk_slice] = azimuth_chunk
+        elevation[chunk_slice] = elevation_chunk
+
+    azimuth = pd.DataFrame(azimuth, index=datestamps, columns=names)
+    elevation = pd.DataFrame(elevation, index=datestamps, columns=names)
 
-                lat, lon = geospatial.osgb_to_lat_lon(x=x_centers[i], y=y_centers[i])
-
-                future_azimuth_and_elevation = executor.submit(
-                    geospatial.calculate_azimuth_and_elevation_angle,
-                    latitude=lat,
-                    longitude=lon,
-                    datestamps=datestamps,
-                )
-                future_azimuth_and_elevation_per_location.append(
-                    [future_azimuth_and_elevation, name]
-                )
-                names.append(name)
-
-        logger.debug("Getting results")
-
-        # Collect results from each thread.
-        for future_azimuth_and_elevation, name in tqdm(future_azimuth_and_elevation_per_location):
-            azimuth_and_elevation = future_azimuth_and_elevation.result()
+    logger.debug(f"Calculated Azimuth and Elevation angles in {time.time() - t} seconds")
 
-            azimuth_per_location = azimuth_and_elevation.loc[:, "azimuth"].rename(name)
-            elevation_per_location = azimuth_and_elevation.loc[:, "elevation"].rename(name)
+    return azimuth, elevation
 
-            azimuth.append(azimuth_per_location)
-            elevation.append(elevation_per_location)
 
-    azimuth = pd.concat(azimuth, axis=1)
-    elevation = pd.concat(elevation, axis=1)
+def calculate_and_save_to_zarr(
+    datestamps: List[datetime.datetime],
+    x_centers: List[int],
+    y_centers: List[int],
+    zarr_path: Union[str, Path],
+    dtype: Union[str, np.dtype] = np.float64,
+    n_processes: int = 1,
+    n_datestamps_per_chunk: int = DEFAULT_N_DATESTAMPS_PER_CHUNK,
+) -> None:
+    """
+    Calculate the azimuth and elevation of the sun, and save them to zarr file, chunk by chunk
 
-    # remove timezone
-    elevation.index = elevation.index.tz_localize(None)
-    azimuth.index = azimuth.index.tz_localize(None)
+    The same as `save_to_zarr(*get_azimuth_and_elevation(...))`, but each chunk of datestamps is
+    written to the Zarr store as soon as it is calculated, so the whole year of data for every
+    location never has to be in memory at once.
 
-    logger.debug(f"Calculated Azimuth and Elevation angles in {time.time() - t} seconds")
+    Args:
+        datestamps: list of datestamps that are needed
+        x_centers: list of x coordinates - ref. OSGB
+        y_centers: list of y coordinates - ref. OSGB
+        zarr_path: the file name where it should be save, can be local of gcs
+        dtype: the dtype to save the angles as, after rounding them to 2 decimal places.
+            e.g. `int` truncates the angles to whole degrees.
+        n_processes: the number of processes to compute the chunks of datestamps in
+        n_datestamps_per_chunk: the number of datestamps to compute at once, which is also the
+            size of the Zarr chunks along the time dimension.
+    """
+    t = time.time()
+    names, positions = _unique_locations(x_centers, y_centers)
+    datestamps = _to_utc(datestamps)
+    shape = (len(datestamps), len(names))
+    chunks = (min(n_datestamps_per_chunk, len(datestamps)), len(names))
+
+    # Write the coordinates and the metadata of the data variables, but no data.
+    empty = dask.array.empty(shape, chunks=chunks, dtype=dtype)
+    template = xr.Dataset(
+        {name: (["time_5", "locations"], empty) for name in ("elevation", "azimuth")},
+        coords=dict(time_5=datestamps, locations=names),
+    )
+    encoding = {
+        name: {"compressor": SUN_ZARR_COMPRESSOR, "chunks": chunks} for name in template.data_vars
+    }
+    template.to_zarr(zarr_path, mode="w", encoding=encoding, compute=False)
+
+    for chunk_slice, azimuth, elevation in _iterate_azimuth_and_elevation_chunks(
+        datestamps=datestamps,
+        x_centers=np.asarray(x_centers)[positions],
+        y_centers=np.asarray(y_centers)[positions],
+        n_processes=n_processes,
+        n_datestamps_per_chunk=n_datestamps_per_chunk,
+    ):
+        chunk = xr.Dataset(
+            {
+                "elevation": (["time_5", "locations"], elevation.astype(dtype)),
+                "azimuth": (["time_5", "locations"], azimuth.astype(dtype)),
+            }
+        )
+        chunk.to_zarr(zarr_path, region=dict(time_5=chunk_slice))
 
-    return azimuth.round(2), elevation.round(2)
+    logger.debug(
+        f"Calculated and saved the Azimuth and Elevation angles of {len(names):,d} locations"
+        f" for {len(datestamps):,d} datestamps in {time.time() - t:.1f} seconds"
+    )
 
 
 def save_to_zarr(azimuth: pd.DataFrame, elevation: pd.DataFrame, zarr_path: Union[str, Path]):
@@ -116,9 +217,7 @@ def save_to_zarr(azimuth: pd.DataFrame, elevation: pd.DataFrame, zarr_path: Unio
     merged_ds = xr.merge([elevation_xr, azimuth_xr])
 
     # Make encoding
-    encoding = {
-        var: {"compressor": numcodecs.Blosc(cname="zstd", clevel=5)} for var in merged_ds.data_vars
-    }
+    encoding = {var: {"compressor": SUN_ZARR_COMPRESSOR} for var in merged_ds.data_vars}
 
     # save to file
     merged_ds.to_zarr(zarr_path, mode="w", encoding=encoding)
@@ -5,14 +5,12 @@ from numbers import Number
 from pathlib import Path
 from typing import List, Tuple, Union
 
-import numpy as np
 import pandas as pd
 import xarray as xr
 
-import nowcasting_dataset.filesystem.utils as nd_fs_utils
 from nowcasting_dataset.data_sources.data_source import DataSource
-from nowcasting_dataset.data_sources.sun.raw_data_load_save import load_from_zarr, x_y_to_name
 from nowcasting_dataset.data_sources.sun.sun_model import Sun
+from nowcasting_dataset.data_sources.sun.sun_store import SunStore
 from nowcasting_dataset.geospatial import calculate_azimuth_and_elevation_angle
 
 logger = logging.getLogger(__name__)
@@ -33,9 +31,9 @@ class SunDataSource(DataSource):
         """Get the model that is used in the batch"""
         return Sun
 
-    def check_input_paths_exist(self) -> None:
-        """Check input paths exist.  If not, raise a FileNotFoundError."""
-        nd_fs_utils.check_path_exists(self.zarr_path)
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data"""
+        return [self.zarr_path]
 
     def get_example(
         self, t0_dt: pd.Timestamp, x_meters_center: Number, y_meters_center: Number
@@ -58,41 +56,16 @@ class SunDataSource(DataSource):
         start_dt = self._get_start_dt(t0_dt)
         end_dt = self._get_end_dt(t0_dt)
 
-        # The names of the columns get truncated when saving, therefore we need to look for the
-        # name of the columns near the location we are looking for
-        locations = np.array(
-            [[float(z.split(",")[0]), float(z.split(",")[1])] for z in self.azimuth.columns]
+        return self.sun_store.get_angles(
+            start_dt=start_dt, end_dt=end_dt, x=x_meters_center, y=y_meters_center
         )
-        location = locations[
-            np.isclose(locations[:, 0], x_meters_center)
-            & np.isclose(locations[:, 1], y_meters_center)
-        ]
-        # lets make sure there is atleast one
-        assert len(location) > 0
-        # Take the first location, and x and y coordinates are the first and center entries in
-        # this array.
-        location = location[0]
-        # make name of column to pull data from. The columns name will be about
-        # something like '22222.555,3333.6666'
-        name = x_y_to_name(x=location[0], y=location[1])
-
-        del x_meters_center, y_meters_center
-        azimuth = self.azimuth.loc[start_dt:end_dt][name]
-        elevation = self.elevation.loc[start_dt:end_dt][name]
-
-        azimuth = azimuth.to_xarray().rename({"index": "time"})
-        elevation = elevation.to_xarray().rename({"index": "time"})
-
-        sun = azimuth.to_dataset(name="azimuth")
-        sun["elevation"] = elevation
-
-        return sun
 
     def _load(self):
 
         logger.info(f"Loading Sun data from {self.zarr_path}")
 
-        self.azimuth, self.elevation = load_from_zarr(zarr_path=self.zarr_path)
+        self.sun_store = SunStore.from_zarr(zarr_path=self.zarr_path)
+        self.sun_store.move_to_shared_memory()
 
     def get_locations(self, t0_datetimes: pd.DatetimeIndex) -> Tuple[List[Number], List[Number]]:
         """Sun data should not be used to get batch locations"""
@@ -107,7 +80,7 @@ class SunDataSource(DataSource):
 
         # get elevation for all datetimes
         azimuth_elevation = calculate_azimuth_and_elevation_angle(
-            latitude=latitude, longitude=longitude, datestamps=self.elevation.index
+            latitude=latitude, longitude=longitude, datestamps=self.sun_store.times
         )
 
         # only select elevations > 10
@@ -121,7 +94,7 @@ class SunDataSource(DataSource):
             f"out of {len(azimuth_elevation)} as elevation is < 10"
         )
 
-        datetimes = self.elevation[mask].index
+        datetimes = self.sun_store.times[mask.values]
 
         # Sun data is only for 2019, so to expand on these by
         # repeating data from 2014 to 2023
@@ -33,7 +33,25 @@ class Sun(DataSourceOutput):
             data=v.elevation, variable_name="elevation", max_value=90
         )
 
-        v.check_data_var_dim(v.elevation, ("example", "time_index"))
-        v.check_data_var_dim(v.azimuth, ("example", "time_index"))
+        cls.check_data_var_dims(v)
+
+        return v
+
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Check that all values are non NaNs and in range, with one pass over each variable"""
+        v.check_data_single_pass(
+            data=v.elevation, variable_name="elevation", min_value=-90, max_value=90
+        )
+        v.check_data_single_pass(
+            data=v.azimuth, variable_name="azimuth", min_value=0, max_value=360
+        )
+        cls.check_data_var_dims(v)
 
         return v
+
+    @classmethod
+    def check_data_var_dims(cls, v):
+        """Check the dims of each data variable"""
+        v.check_data_var_dim(v.elevation, ("example", "time_index"))
+        v.check_data_var_dim(v.azimuth, ("example", "time_index"))
@@ -0,0 +1,169 @@
+""" A compact, in-memory store of the sun angles at every location, indexed by number
+
+`load_from_zarr` returns the sun angles as wide DataFrames of float64 or int64, with a column for
+each location named "x,y".  Finding a location then means parsing every column name.
+`SunStore` keeps the coordinates of the locations as float arrays, with a hash table from (x, y)
+to column, and the angles as 16-bit integer hundredths of a degree, which is a quarter of the
+memory of 64-bit angles.  Getting the angles of an example is then two binary searches of the
+time index, a hash table lookup and an integer slice.
+"""
+import logging
+from dataclasses import dataclass
+from numbers import Number
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from nowcasting_dataset import shared_arrays
+
+_LOG = logging.getLogger(__name__)
+
+# The angles are stored as integer hundredths of a degree.  The sun angles are rounded to 2 decimal
+# places when they are calculated, so no precision is lost.
+ANGLE_SCALE = 100
+
+# The dtypes of the stored angles.  Azimuth is from 0 to 360 degrees, so doesn't fit in int16.
+AZIMUTH_DTYPE = np.uint16
+ELEVATION_DTYPE = np.int16
+
+# The number of datetimes to read from the Zarr store at once, so the 64-bit angles of all the
+# locations are never all in memory.
+N_DATETIMES_PER_READ = 8_640
+
+
+def _encode_angles(angles: np.ndarray, dtype: np.dtype, min_value: float, max_value: float):
+    """Encode angles in degrees as integer hundredths of a degree"""
+    assert np.isfinite(angles).all(), "The sun angles must be finite"
+    assert (angles >= min_value).all() and (angles <= max_value).all(), (
+        f"The sun angles must be between {min_value} and {max_value} degrees:"
+        f" {angles.min()} to {angles.max()}"
+    )
+    return np.round(angles * ANGLE_SCALE).astype(dtype)
+
+
+def _location_key(x: Number, y: Number) -> Tuple[int, int]:
+    """The key of a location in the hash table: its coordinates rounded to the nearest meter"""
+    return int(np.round(x)), int(np.round(y))
+
+
+@dataclass
+class SunStore:
+    """
+    The azimuth and elevation of the sun at every location.
+
+    Attributes:
+      times: The datetimes of the angles, in increasing order.
+      x: The x coordinate (OSGB) of each location.
+      y: The y coordinate (OSGB) of each location.
+      azimuth: The azimuth angles, in hundredths of a degree, of shape (time, location).
+      elevation: The elevation angles, in hundredths of a degree, of shape (time, location).
+    """
+
+    times: pd.DatetimeIndex
+    x: np.ndarray
+    y: np.ndarray
+    azimuth: np.ndarray
+    elevation: np.ndarray
+
+    def __post_init__(self):
+        """Make the hash table from (x, y) to the index of each location"""
+        assert self.times.is_monotonic_increasing
+        assert self.azimuth.shape == self.elevation.shape == (len(self.times), len(self.x))
+        self._location_indices: Dict[Tuple[int, int], int] = {}
+        # Iterate in reverse, so the first of any locations with the same key is kept.
+        for location_idx in reversed(range(len(self.x))):
+            key = _location_key(self.x[location_idx], self.y[location_idx])
+            self._location_indices[key] = location_idx
+
+    @classmethod
+    def from_zarr(cls, zarr_path: Union[str, Path]) -> "SunStore":
+        """
+        Load sun data saved by `raw_data_load_save.save_to_zarr`
+
+        Args:
+            zarr_path: the zarr_path to be loaded, can be local or gcs
+        """
+        sun = xr.open_dataset(zarr_path, engine="zarr")
+        times = pd.DatetimeIndex(sun.time_5.values)
+        order = np.argsort(times.values, kind="stable")
+        # The names of the locations are "x,y".
+        x, y = np.array([name.split(",") for name in sun.locations.values], dtype=np.float64).T
+
+        azimuth = np.empty(sun["azimuth"].shape, dtype=AZIMUTH_DTYPE)
+        elevation = np.empty(sun["elevation"].shape, dtype=ELEVATION_DTYPE)
+        for start in range(0, len(times), N_DATETIMES_PER_READ):
+            time_slice = slice(start, start + N_DATETIMES_PER_READ)
+            azimuth[time_slice] = _encode_angles(
+                sun["azimuth"][time_slice].values, AZIMUTH_DTYPE, min_value=0, max_value=360
+            )
+            elevation[time_slice] = _encode_angles(
+                sun["elevation"][time_slice].values, ELEVATION_DTYPE, min_value=-90, max_value=90
+            )
+        sun.close()
+
+        sun_store = cls(
+            times=times[order], x=x, y=y, azimuth=azimuth[order], elevation=elevation[order]
+        )
+        _LOG.debug(
+            f"Loaded the sun angles of {len(x):,d} locations at {len(times):,d} datetimes,"
+            f" using {sun_store.nbytes / 1e6:,.1f} MB"
+        )
+        return sun_store
+
+    def move_to_shared_memory(self) -> None:
+        """Move the angles into shared memory, so they aren't copied into each worker process"""
+        shared_arrays.move_to_shared_memory(self, ["azimuth", "elevation"])
+
+    def __getstate__(self) -> dict:
+        """Leave out the angles in shared memory when pickling"""
+        return shared_arrays.get_state(self)
+
+    def __setstate__(self, state: dict) -> None:
+        """Map the angles in shared memory"""
+        shared_arrays.set_state(self, state)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes used by the angles and the coordinates"""
+        return sum(array.nbytes for array in (self.x, self.y, self.azimuth, self.elevation))
+
+    def location_index(self, x: Number, y: Number) -> int:
+        """
+        The index of the location at (x, y)
+
+        The coordinates of the locations can be truncated when they are saved, so locations
+        which are close to (x, y) are also found.
+
+        Raises:
+            KeyError if there is no location at (x, y).
+        """
+        location_idx = self._location_indices.get(_location_key(x, y))
+        if location_idx is None:
+            # (x, y) might be close to a location, but round to a different meter.
+            is_close = np.isclose(self.x, x) & np.isclose(self.y, y)
+            if not is_close.any():
+                raise KeyError(f"There is no sun data for the location ({x}, {y})")
+            location_idx = int(np.argmax(is_close))
+        return location_idx
+
+    def get_angles(
+        self, start_dt: pd.Timestamp, end_dt: pd.Timestamp, x: Number, y: Number
+    ) -> xr.Dataset:
+        """
+        Get the azimuth and elevation at (x, y), from `start_dt` to `end_dt` inclusive
+
+        Returns: Dataset of "azimuth" and "elevation" in degrees, with a "time" coordinate.
+        """
+        location_idx = self.location_index(x, y)
+        start_idx = self.times.searchsorted(start_dt, side="left")
+        end_idx = self.times.searchsorted(end_dt, side="right")
+        return xr.Dataset(
+            {
+                name: ("time", angles[start_idx:end_idx, location_idx] / ANGLE_SCALE)
+                for name, angles in (("azimuth", self.azimuth), ("elevation", self.elevation))
+            },
+            coords={"time": self.times[start_idx:end_idx]},
+        )
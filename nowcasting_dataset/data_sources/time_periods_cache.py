@@ -0,0 +1,105 @@
+""" A cache of the contiguous t0 time periods of each DataSource, saved as small CSV files
+
+Computing the contiguous t0 time periods means loading the whole datetime index of each
+DataSource, which is slow for big Zarr stores, and is repeated every time the datasets are
+prepared.  The time periods of a DataSource only change when its input data or its settings
+change, so they are cached with a key made from both.  Then, when one DataSource's input data is
+updated, only that DataSource's time periods are recomputed before the intersection.
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import List, Union
+
+import fsspec
+import pandas as pd
+
+import nowcasting_dataset.filesystem.utils as nd_fs_utils
+from nowcasting_dataset.data_sources.data_source import DataSource
+
+_LOG = logging.getLogger(__name__)
+
+# Change this whenever the way the time periods are computed changes, to invalidate the cache.
+CACHE_VERSION = 1
+
+# The Zarr metadata file which changes when a consolidated Zarr store is appended to.
+ZARR_METADATA_FILENAME = ".zmetadata"
+
+
+def _modification_keys(path: Union[str, Path]) -> List[str]:
+    """
+    Keys which change when the input data at `path` is modified.
+
+    `path` can have wildcards.  For Zarr stores, the key of the consolidated metadata file is used,
+    because the modification time of a directory doesn't change when a file in it is modified.
+    """
+    path = str(path)
+    filesystem = nd_fs_utils.get_filesystem(path)
+    paths = sorted(filesystem.glob(path)) if "*" in path else [path]
+    keys = []
+    for path in paths:
+        zarr_metadata_path = f"{path.rstrip('/')}/{ZARR_METADATA_FILENAME}"
+        if filesystem.isdir(path) and filesystem.exists(zarr_metadata_path):
+            keys.append(filesystem.ukey(zarr_metadata_path))
+        else:
+            keys.append(filesystem.ukey(path))
+    return keys
+
+
+def cache_key(data_source: DataSource) -> str:
+    """
+    A key which changes when the input data or the settings of `data_source` change.
+
+    The settings are all the dataclass fields, e.g. `history_minutes` and `forecast_minutes`.
+    """
+    settings = {
+        field.name: repr(getattr(data_source, field.name))
+        for field in dataclasses.fields(data_source)
+    }
+    modification_keys = [_modification_keys(path) for path in data_source.input_paths()]
+    key = json.dumps(
+        dict(
+            version=CACHE_VERSION,
+            data_source=type(data_source).__name__,
+            sample_period_minutes=data_source.sample_period_minutes,
+            settings=settings,
+            modification_keys=modification_keys,
+        ),
+        sort_keys=True,
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def get_contiguous_t0_time_periods(
+    data_source: DataSource, cache_dir: Union[str, Path]
+) -> pd.DataFrame:
+    """
+    The contiguous t0 time periods of `data_source`, loaded from `cache_dir` if they are cached.
+
+    If they aren't cached, then compute them and save them to `cache_dir`.
+
+    Args:
+        data_source: The DataSource.
+        cache_dir: The cache directory.  Can be local or remote, e.g. `gs://bucket/cache`.
+
+    Returns: The same as `data_source.get_contiguous_t0_time_periods()`.
+
+    Raises:
+        NotImplementedError if `data_source` has no concept of a datetime index.
+    """
+    cache_dir = str(cache_dir)
+    filename = f"{cache_dir}/{type(data_source).__name__}_{cache_key(data_source)}.csv"
+    filesystem = nd_fs_utils.get_filesystem(cache_dir)
+    if filesystem.exists(filename):
+        _LOG.info(f"Loading the contiguous t0 time periods from {filename}")
+        with fsspec.open(filename, mode="r") as file:
+            return pd.read_csv(file, parse_dates=["start_dt", "end_dt"])
+
+    _LOG.info(f"Computing the contiguous t0 time periods of {type(data_source).__name__}")
+    t0_time_periods = data_source.get_contiguous_t0_time_periods()
+    nd_fs_utils.makedirs(cache_dir, exist_ok=True)
+    with fsspec.open(filename, mode="w") as file:
+        t0_time_periods[["start_dt", "end_dt"]].to_csv(file, index=False)
+    return t0_time_periods
@@ -2,13 +2,15 @@
 import logging
 from dataclasses import dataclass
 from numbers import Number
+from pathlib import Path
+from typing import List, Union
 
 import pandas as pd
 import rioxarray
 import xarray as xr
 from rasterio.warp import Resampling
 
-import nowcasting_dataset.filesystem.utils as nd_fs_utils
+from nowcasting_dataset import shared_arrays
 from nowcasting_dataset.data_sources.data_source import ImageDataSource
 from nowcasting_dataset.data_sources.topographic.topographic_model import Topographic
 from nowcasting_dataset.geospatial import OSGB
@@ -41,6 +43,8 @@ class TopographicDataSource(ImageDataSource):
         self._data = self._data.fillna(0)  # Set nodata values to 0 (mostly should be ocean)
         # Add CRS for later, topo maps are assumed to be in OSGB
         self._data.attrs["crs"] = OSGB
+        # Share the map with the worker processes, rather than copying it into each process.
+        shared_arrays.move_to_shared_memory(self, ["_data"])
         # Distance between pixels, giving their spatial extant, in meters
         self._stored_pixel_size_meters = abs(self._data.coords["x"][1] - self._data.coords["x"][0])
         self._meters_per_pixel = meters_per_pixel
@@ -49,9 +53,9 @@ class TopographicDataSource(ImageDataSource):
         """Get the model that is used in the batch"""
         return Topographic
 
-    def check_input_paths_exist(self) -> None:
-        """Check input paths exist.  If not, raise a FileNotFoundError."""
-        nd_fs_utils.check_path_exists(self.filename)
+    def input_paths(self) -> List[Union[str, Path]]:
+        """The paths of the input data"""
+        return [self.filename]
 
     def get_example(
         self, t0_dt: pd.Timestamp, x_meters_center: Number, y_meters_center: Number
@@ -15,7 +15,19 @@ class Topographic(DataSourceOutput):
         """Check that all values are non NaNs"""
 
         v.check_nan_and_inf(data=v.data)
+        cls.check_data_var_dims(v)
 
-        v.check_data_var_dim(v.data, ("example", "x_index", "y_index"))
+        return v
+
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Check that all values are non NaNs, with one pass over the data"""
+        v.check_data_single_pass(data=v.data)
+        cls.check_data_var_dims(v)
 
         return v
+
+    @classmethod
+    def check_data_var_dims(cls, v):
+        """Check the dims of each data variable"""
+        v.check_data_var_dim(v.data, ("example", "x_index", "y_index"))
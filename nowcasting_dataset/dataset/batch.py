@@ -5,7 +5,7 @@ import logging
 import os
 from concurrent import futures
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
 import xarray as xr
 from pydantic import BaseModel, Field
@@ -29,7 +29,7 @@ from nowcasting_dataset.data_sources.pv.pv_model import PV
 from nowcasting_dataset.data_sources.satellite.satellite_model import HRVSatellite, Satellite
 from nowcasting_dataset.data_sources.sun.sun_model import Sun
 from nowcasting_dataset.data_sources.topographic.topographic_model import Topographic
-from nowcasting_dataset.utils import get_netcdf_filename
+from nowcasting_dataset.utils import get_netcdf_filename, get_npy_dirname
 
 _LOG = logging.getLogger(__name__)
 
@@ -139,18 +139,74 @@ class Batch(BaseModel):
 
         with futures.ThreadPoolExecutor() as executor:
             # Submit tasks to the executor.
-            for data_source in self.data_sources:
-                if data_source is not None:
-                    _ = executor.submit(
-                        data_source.save_netcdf,
-                        batch_i=batch_i,
-                        path=path,
-                    )
+            futures_to_wait_for = [
+                executor.submit(data_source.save_netcdf, batch_i=batch_i, path=path)
+                for data_source in self.data_sources
+                if data_source is not None
+            ]
+            # Raise any exception from saving a data source, rather than leaving a partial batch.
+            for future in futures_to_wait_for:
+                future.result()
+
+    def save_npy(self, batch_i: int, path: Path):
+        """
+        Save batch to uncompressed `.npy` files, which can be memory-mapped by `load_npy`
+
+        Args:
+            batch_i: the batch id, used to make the folder names
+            path: the path where it will be saved. This can be local or in the cloud.
+
+        """
+        with futures.ThreadPoolExecutor() as executor:
+            futures_to_wait_for = [
+                executor.submit(data_source.save_npy, batch_i=batch_i, path=path)
+                for data_source in self.data_sources
+                if data_source is not None
+            ]
+            # Raise any exception from saving a data source, rather than leaving a partial batch.
+            for future in futures_to_wait_for:
+                future.result()
+
+    @staticmethod
+    def load_npy(
+        local_npy_path: Union[Path, str],
+        batch_idx: int,
+        data_sources_names: Optional[Iterable[str]] = None,
+    ):
+        """Load batch from `.npy` files, by memory-mapping the arrays without copying them
+
+        Args:
+            local_npy_path: the local folder containing one sub-folder per data source
+            batch_idx: the batch id
+            data_sources_names: the data sources to load. Defaults to all data sources.
+        """
+        if data_sources_names is None:
+            data_sources_names = Example.__fields__.keys()
+
+        batch_dict = {}
+        for data_source_name in data_sources_names:
+            folder = os.path.join(local_npy_path, data_source_name, get_npy_dirname(batch_idx))
+            batch_dict[data_source_name] = DataSourceOutput(DataSourceOutput.load_npy(folder))
+
+        batch_dict["batch_size"] = len(next(iter(batch_dict.values())).example)
+
+        return Batch(**batch_dict)
 
     @staticmethod
-    def load_netcdf(local_netcdf_path: Union[Path, str], batch_idx: int):
-        """Load batch from netcdf file"""
-        data_sources_names = Example.__fields__.keys()
+    def load_netcdf(
+        local_netcdf_path: Union[Path, str],
+        batch_idx: int,
+        data_sources_names: Optional[Iterable[str]] = None,
+    ):
+        """Load batch from netcdf file
+
+        Args:
+            local_netcdf_path: the folder containing one sub-folder per data source
+            batch_idx: the batch id
+            data_sources_names: the data sources to load. Defaults to all data sources.
+        """
+        if data_sources_names is None:
+            data_sources_names = Example.__fields__.keys()
 
         # set up futures executor
         batch_dict = {}
@@ -177,7 +233,7 @@ class Batch(BaseModel):
 
             batch_dict[data_source_name] = DataSourceOutput(xr_dataset)
 
-        batch_dict["batch_size"] = len(batch_dict["metadata"].example)
+        batch_dict["batch_size"] = len(next(iter(batch_dict.values())).example)
 
         return Batch(**batch_dict)
 
@@ -0,0 +1,180 @@
+""" Parallel, prefetching reader of batches saved as netcdf files """
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import deque
+from concurrent import futures
+from pathlib import Path
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple, Union
+
+import fsspec
+import xarray as xr
+
+from nowcasting_dataset.data_sources.datasource_output import DataSourceOutput
+from nowcasting_dataset.dataset.batch import Batch, Example
+from nowcasting_dataset.utils import get_netcdf_filename
+
+_LOG = logging.getLogger(__name__)
+
+
+def copy_to_cache(filename: str, cache_dir: str) -> str:
+    """
+    Copy `filename` into `cache_dir`, unless it is already there.
+
+    The file is copied to a temporary file, which is then renamed, so threads and processes which
+    cache the same file at the same time never see a partial copy.
+
+    Args:
+        filename: The filename. This can be local or any fsspec url, e.g. 'gs://...'.
+        cache_dir: The local directory to copy to.
+
+    Returns: The local filename of the copy.
+    """
+    local_filename = os.path.join(
+        cache_dir, hashlib.sha256(filename.encode()).hexdigest() + os.path.splitext(filename)[1]
+    )
+    if not os.path.exists(local_filename):
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_filename = f"{local_filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+        filesystem, path = fsspec.core.url_to_fs(filename)
+        filesystem.get_file(path, temporary_filename)
+        os.replace(temporary_filename, local_filename)
+    return local_filename
+
+
+def load_data_source_netcdf(filename: str, cache_dir: Optional[str] = None) -> xr.Dataset:
+    """
+    Load one data source of one batch from a netcdf file.
+
+    Args:
+        filename: The netcdf filename. This can be local or any fsspec url, e.g. 'gs://...'.
+        cache_dir: Optional local directory. If set, the file is copied here the first time it
+            is read, and then read from the local copy after that.
+
+    Returns: The loaded xr.Dataset
+    """
+    filename = str(filename)
+    protocol, _ = fsspec.core.split_protocol(filename)
+
+    if cache_dir is not None:
+        local_filename = copy_to_cache(filename, cache_dir=str(cache_dir))
+        return xr.load_dataset(local_filename, engine="h5netcdf")
+
+    if protocol in (None, "file"):
+        return xr.load_dataset(filename, engine="h5netcdf")
+
+    with fsspec.open(filename, mode="rb") as file:
+        return xr.load_dataset(file, engine="h5netcdf")
+
+
+class BatchReader:
+    """
+    Read batches in order, while prefetching the next batches in the background.
+
+    Each data source of each batch is loaded in a separate task, so one batch is loaded in
+    parallel, and up to `n_prefetch` batches are loaded ahead of the one being used.
+
+    Example::
+
+        reader = BatchReader(path="gs://bucket/prepared_ML_training_data/train",
+                             batch_indices=range(100), data_sources_names=["satellite", "gsp"],
+                             cache_dir="/tmp/batch_cache")
+        for batch in reader:
+            ...
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_indices: Iterable[int],
+        data_sources_names: Optional[Iterable[str]] = None,
+        n_prefetch: int = 2,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False,
+        cache_dir: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Set up the batch reader.
+
+        Args:
+            path: The folder containing one sub-folder of netcdf files per data source.
+                This can be local or any fsspec url, e.g. 'gs://...' or 's3://...'.
+            batch_indices: The batches to read, in the order they are returned.
+            data_sources_names: The data sources to read. Defaults to all data sources.
+            n_prefetch: The number of batches to load ahead of the one being returned.
+            max_workers: The maximum number of threads or processes used to load data.
+            use_processes: If True, load data in processes rather than threads.
+            cache_dir: Optional local directory, used to cache the netcdf files on disk.
+        """
+        if data_sources_names is None:
+            data_sources_names = Example.__fields__.keys()
+        self.data_sources_names = list(data_sources_names)
+        for data_source_name in self.data_sources_names:
+            assert (
+                data_source_name in Example.__fields__
+            ), f"{data_source_name} is not a data source. Choose from {Example.__fields__.keys()}"
+        assert len(self.data_sources_names) > 0, "At least one data source must be read"
+        assert n_prefetch >= 0, f"n_prefetch must be non-negative, not {n_prefetch}"
+
+        self.path = str(path)
+        self.batch_indices = list(batch_indices)
+        self.n_prefetch = n_prefetch
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.cache_dir = None if cache_dir is None else str(cache_dir)
+
+    def __len__(self) -> int:
+        """The number of batches to read"""
+        return len(self.batch_indices)
+
+    def __iter__(self) -> Iterator[Batch]:
+        """Yield batches in the order of `batch_indices`"""
+        executor_class = (
+            futures.ProcessPoolExecutor if self.use_processes else futures.ThreadPoolExecutor
+        )
+        with executor_class(max_workers=self.max_workers) as executor:
+            batch_indices = iter(self.batch_indices)
+            queue: Deque[Tuple[int, List[Tuple[str, futures.Future]]]] = deque()
+
+            def submit_next_batch() -> None:
+                batch_idx = next(batch_indices, None)
+                if batch_idx is not None:
+                    queue.append((batch_idx, self._submit(executor, batch_idx)))
+
+            # Fill the prefetch queue. The batch being returned is in the queue too.
+            for _ in range(self.n_prefetch + 1):
+                submit_next_batch()
+
+            while len(queue) > 0:
+                batch_idx, future_datasets_per_source = queue.popleft()
+                submit_next_batch()
+                _LOG.debug(f"Waiting for batch {batch_idx}")
+                yield self._collect(future_datasets_per_source)
+
+    def _submit(
+        self, executor: futures.Executor, batch_idx: int
+    ) -> List[Tuple[str, futures.Future]]:
+        """Submit one task per data source for one batch"""
+        future_datasets_per_source = []
+        for data_source_name in self.data_sources_names:
+            filename = os.path.join(self.path, data_source_name, get_netcdf_filename(batch_idx))
+            future_dataset = executor.submit(
+                load_data_source_netcdf, filename=filename, cache_dir=self.cache_dir
+            )
+            future_datasets_per_source.append((data_source_name, future_dataset))
+        return future_datasets_per_source
+
+    @staticmethod
+    def _collect(future_datasets_per_source: List[Tuple[str, futures.Future]]) -> Batch:
+        """Make one Batch, from the loaded data sources"""
+        batch_dict = {}
+        for data_source_name, future_dataset in future_datasets_per_source:
+            batch_dict[data_source_name] = DataSourceOutput(future_dataset.result())
+
+        first_data_source = next(iter(batch_dict.values()))
+        batch_dict["batch_size"] = len(first_data_source.example)
+
+        return Batch(**batch_dict)
@@ -0,0 +1,78 @@
+""" Save and load the spatial and temporal locations of each example
+
+The locations of each example are saved in a binary `.npz` file, with one array per column:
+the t0 datetimes as int64 nanoseconds since the epoch, the coordinates as float64, and any other
+columns (e.g. the ids of the central PV system or GSP) as they are.  This is much smaller and
+faster to load than a CSV file, and keeps the exact values.  A CSV file of the same locations is
+also saved, for humans to read.
+"""
+import io
+from pathlib import Path
+from typing import Union
+
+import fsspec
+import numpy as np
+import pandas as pd
+
+DATETIME_COLUMN_NAME = "t0_datetime_UTC"
+
+# The names of the arrays in the .npz file which aren't columns.
+INDEX_ARRAY_NAME = "_index"
+COLUMN_NAMES_ARRAY_NAME = "_column_names"
+
+
+def save_locations_to_npz(locations: pd.DataFrame, filename: Union[str, Path]) -> None:
+    """
+    Save the locations of each example to a binary .npz file.
+
+    Args:
+        locations: The locations of each example, with a `t0_datetime_UTC` column.
+        filename: The .npz filename.  Can be local or remote.
+    """
+    arrays = {name: locations[name].values for name in locations.columns}
+    arrays[DATETIME_COLUMN_NAME] = (
+        pd.DatetimeIndex(locations[DATETIME_COLUMN_NAME]).values.astype("datetime64[ns]")
+    ).astype(np.int64)
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        **{INDEX_ARRAY_NAME: locations.index.values},
+        **{COLUMN_NAMES_ARRAY_NAME: np.array(locations.columns, dtype=str)},
+        **arrays,
+    )
+    with fsspec.open(str(filename), mode="wb") as file:
+        file.write(buffer.getvalue())
+
+
+def load_locations_from_npz(filename: Union[str, Path]) -> pd.DataFrame:
+    """
+    Load the locations of each example saved by `save_locations_to_npz`.
+
+    Args:
+        filename: The .npz filename.  Can be local or remote.
+
+    Returns: The locations, with the same index, columns and values as were saved.
+    """
+    with fsspec.open(str(filename), mode="rb") as file:
+        buffer = io.BytesIO(file.read())
+    with np.load(buffer, allow_pickle=False) as npz:
+        column_names = [str(name) for name in npz[COLUMN_NAMES_ARRAY_NAME]]
+        locations = pd.DataFrame(
+            {name: npz[name] for name in column_names}, index=npz[INDEX_ARRAY_NAME]
+        )
+    locations[DATETIME_COLUMN_NAME] = pd.to_datetime(locations[DATETIME_COLUMN_NAME].values)
+    return locations
+
+
+def load_locations_from_csv(filename: Union[str, Path]) -> pd.DataFrame:
+    """
+    Load the locations of each example from a CSV file, saved by `pd.DataFrame.to_csv`.
+
+    Args:
+        filename: The CSV filename.  Can be local or remote.
+    """
+    locations = pd.read_csv(filename, index_col=0)
+    # Converting to datetimes is much faster using `pd.to_datetime()` than
+    # passing `parse_datetimes` into `pd.read_csv()`.
+    locations[DATETIME_COLUMN_NAME] = pd.to_datetime(locations[DATETIME_COLUMN_NAME])
+    return locations
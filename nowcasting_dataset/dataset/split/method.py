@@ -9,6 +9,41 @@ from nowcasting_dataset.dataset.split.model import (
     default_train_test_validation_specific,
 )
 
+# The splits of each period, as integers.
+TRAIN, VALIDATION, TEST = 0, 1, 2
+NO_SPLIT = -1
+
+NANOSECONDS_PER_DAY = 24 * 60 * 60 * 10**9
+
+# 1970-01-01 was a Thursday, so weeks ending on Sunday start 3 days before the epoch.
+DAYS_FROM_MONDAY_TO_EPOCH = 3
+
+
+def _period_codes(datetimes: pd.DatetimeIndex, freq: str) -> np.ndarray:
+    """
+    An integer for each datetime, which is the same for all the datetimes in the same period
+
+    The same as `datetimes.to_period(freq)`, but for days, weeks (ending on Sunday), months and
+    years the codes are computed with integer arithmetic on the epoch nanoseconds.
+
+    Args:
+        datetimes: the datetimes
+        freq: This can be D=day, W=week, M=month and Y=year, or any other pandas period frequency.
+    """
+    if datetimes.tz is not None:
+        # Periods are in local time.
+        datetimes = datetimes.tz_localize(None)
+    if freq == "D":
+        return datetimes.asi8 // NANOSECONDS_PER_DAY
+    elif freq == "W":
+        return (datetimes.asi8 // NANOSECONDS_PER_DAY + DAYS_FROM_MONDAY_TO_EPOCH) // 7
+    elif freq == "M":
+        return datetimes.year.values.astype(np.int64) * 12 + datetimes.month.values
+    elif freq == "Y":
+        return datetimes.year.values.astype(np.int64)
+    else:
+        return datetimes.to_period(freq).asi8
+
 
 def split_method(
     datetimes: pd.DatetimeIndex,
@@ -49,46 +84,36 @@ def split_method(
     Returns: train, validation and test datetimes
 
     """
-    # find all the unique periods (dates, weeks, e.t.c)
-    datetimes_period = pd.to_datetime(datetimes.to_period(freq).to_timestamp())
-    unique_periods_in_dataset = datetimes_period.unique()
+    # Number each period (date, week, e.t.c), in the order in which the periods first appear.
+    period_idx_of_each_datetime, unique_period_codes = pd.factorize(
+        _period_codes(datetimes, freq=freq)
+    )
+    n_unique_periods = len(unique_period_codes)
 
     # find total weights, and cumulative weights
     total_weights = sum(train_test_validation_split)
     cum_weights = np.cumsum(train_test_validation_split)
 
+    # The split (TRAIN, VALIDATION or TEST) of each unique period.  NO_SPLIT if none.
+    split_of_each_period = np.full(n_unique_periods, NO_SPLIT, dtype=np.int8)
+
     if method == "modulo":
         # Method to split by module.
         # I.e 1st, 2nd, 3rd periods goes to train, 4th goes to validation, 5th goes to test and
         # repeat.
-
-        # make which day indexes go i.e if the split is [3,1,1] then the
-        # - train_ indexes = [0,1,2]
-        # - validation_indexes = [3]
-        # - test_indexes = [4]
-        train_indexes = [i for i in range(total_weights) if i < cum_weights[0]]
-        validation_indexes = [
-            i for i in range(total_weights) if (i >= cum_weights[0]) & (i < cum_weights[1])
-        ]
-        test_indexes = [
-            i for i in range(total_weights) if (i >= cum_weights[1]) & (i < cum_weights[2])
-        ]
-
-        # find all the unique periods (dates, weeks, e.t.c)
-        unique_periods = pd.DataFrame(unique_periods_in_dataset, columns=["period"])
-        unique_periods["modulo"] = unique_periods.index % total_weights
-
-        train_periods = unique_periods[unique_periods["modulo"].isin(train_indexes)]["period"]
-        validation_periods = unique_periods[unique_periods["modulo"].isin(validation_indexes)][
-            "period"
-        ]
-        test_periods = unique_periods[unique_periods["modulo"].isin(test_indexes)]["period"]
+        #
+        # For example, if the split is [3,1,1] then the period indexes modulo 5 of
+        # - train are [0,1,2]
+        # - validation are [3]
+        # - test are [4]
+        modulo = np.arange(n_unique_periods) % total_weights
+        split_of_each_period[:] = np.searchsorted(cum_weights, modulo, side="right")
 
     elif method == "random":
 
         # randomly sort indexes
         rng = np.random.default_rng(seed)
-        unique_periods_in_dataset = rng.permutation(unique_periods_in_dataset)
+        permutation = rng.permutation(np.arange(n_unique_periods))
 
         # find the train, validation, test indexes.
         #
@@ -96,35 +121,36 @@ def split_method(
         # - train_indexes - first 220 random dates
         # - validation_indexes - next 72 random dates
         # - test_indexes - next 72 random dates
-        train_validation_split = int(
-            cum_weights[0] / total_weights * len(unique_periods_in_dataset)
-        )
-        validation_test_split = int(cum_weights[1] / total_weights * len(unique_periods_in_dataset))
+        train_validation_split = int(cum_weights[0] / total_weights * n_unique_periods)
+        validation_test_split = int(cum_weights[1] / total_weights * n_unique_periods)
 
-        train_periods = pd.to_datetime(unique_periods_in_dataset[0:train_validation_split])
-        validation_periods = pd.to_datetime(
-            unique_periods_in_dataset[train_validation_split:validation_test_split]
-        )
-        test_periods = pd.to_datetime(unique_periods_in_dataset[validation_test_split:])
+        split_of_each_period[permutation[0:train_validation_split]] = TRAIN
+        split_of_each_period[permutation[train_validation_split:validation_test_split]] = VALIDATION
+        split_of_each_period[permutation[validation_test_split:]] = TEST
 
     elif method == "specific":
 
-        train_periods = unique_periods_in_dataset[
-            unique_periods_in_dataset.isin(train_test_validation_specific.train)
-        ]
-        validation_periods = unique_periods_in_dataset[
-            unique_periods_in_dataset.isin(train_test_validation_specific.validation)
-        ]
-        test_periods = unique_periods_in_dataset[
-            unique_periods_in_dataset.isin(train_test_validation_specific.test)
+        # The specific periods are the start of each period, e.g. "2021-01-01" for 2021.
+        # So compare them to the start of each period in the dataset.
+        first_datetime_of_each_period = datetimes[
+            np.unique(period_idx_of_each_datetime, return_index=True)[1]
         ]
+        period_starts = pd.to_datetime(first_datetime_of_each_period.to_period(freq).to_timestamp())
+        for split, specific_periods in (
+            (TRAIN, train_test_validation_specific.train),
+            (VALIDATION, train_test_validation_specific.validation),
+            (TEST, train_test_validation_specific.test),
+        ):
+            split_of_each_period[period_starts.isin(specific_periods)] = split
 
     else:
         raise Exception(f'method ({method}) must be in ["random", "modulo"]')
 
-    train = datetimes[datetimes_period.isin(train_periods)]
-    validation = datetimes[datetimes_period.isin(validation_periods)]
-    test = datetimes[datetimes_period.isin(test_periods)]
+    # Gather the split of each datetime from the split of its period.
+    split_of_each_datetime = split_of_each_period[period_idx_of_each_datetime]
+    train = datetimes[split_of_each_datetime == TRAIN]
+    validation = datetimes[split_of_each_datetime == VALIDATION]
+    test = datetimes[split_of_each_datetime == TEST]
 
     return train, validation, test
 
@@ -3,12 +3,28 @@
 1. joining data arrays to datasets
 2. pydantic exentions model of xr.Dataset
 """
+from enum import Enum
 from typing import Any, List
 
 import numpy as np
 import xarray as xr
 
 
+class ValidationLevel(Enum):
+    """How thoroughly each batch is validated when it is created.
+
+    - full: run every check, with one pass over memory per check.
+    - single_pass: run all the value checks for each data variable in one pass over memory.
+    - sampled: run the full validation on every n-th batch, and skip validation otherwise.
+    - off: do not validate batches.
+    """
+
+    FULL = "full"
+    SINGLE_PASS = "single_pass"
+    SAMPLED = "sampled"
+    OFF = "off"
+
+
 def join_list_dataset_to_batch_dataset(datasets: list[xr.Dataset]) -> xr.Dataset:
     """Join a list of data sets to a dataset by expanding dims"""
 
@@ -39,23 +55,35 @@ def convert_coordinates_to_indexes(dataset: xr.Dataset) -> xr.Dataset:
 
     assert type(dataset) == xr.Dataset, f" Should be xr.Dataset but found {type(dataset)}"
 
-    original_dim_names = dataset.dims
-
-    for original_dim_name in original_dim_names:
-        original_coords = dataset[original_dim_name]
-        new_index_coords = np.arange(len(original_coords))
-        new_index_dim_name = f"{original_dim_name}_index"
-        dataset[original_dim_name] = new_index_coords
-        dataset = dataset.rename({original_dim_name: new_index_dim_name})
-        # Save the original_coords back into dataset, but this time it won't be used as
-        # coords for the variables payload in the dataset.
-        dataset[original_dim_name] = xr.DataArray(
-            original_coords,
-            coords=[new_index_coords],
-            dims=[new_index_dim_name],
+    # Build the new Dataset directly from the underlying variables, in one pass,
+    # rather than assigning and renaming one dimension at a time (which makes a new
+    # Dataset at every step).
+    new_dim_names = {dim: f"{dim}_index" for dim in dataset.dims}
+
+    data_vars = {}
+    coords = {
+        new_dim_name: xr.Variable(new_dim_name, np.arange(dataset.dims[original_dim_name]))
+        for original_dim_name, new_dim_name in new_dim_names.items()
+    }
+
+    for name, variable in dataset.variables.items():
+        new_dims = tuple(new_dim_names[dim] for dim in variable.dims)
+        new_variable = xr.Variable(
+            new_dims, variable.data, attrs=variable.attrs, encoding=variable.encoding
         )
+        if name in new_dim_names or name not in dataset.coords:
+            # The original coords are saved as data variables, so they won't be used as
+            # coords for the variables payload in the dataset.
+            data_vars[name] = new_variable
+        else:
+            coords[name] = new_variable
+
+    # Dimensions without coords get their original coords saved as 0, 1, ..., n-1.
+    for original_dim_name, new_dim_name in new_dim_names.items():
+        if original_dim_name not in dataset.variables:
+            data_vars[original_dim_name] = coords[new_dim_name].copy()
 
-    return dataset
+    return xr.Dataset(data_vars=data_vars, coords=coords, attrs=dataset.attrs)
 
 
 class PydanticXArrayDataSet(xr.Dataset):
@@ -76,6 +104,15 @@ class PydanticXArrayDataSet(xr.Dataset):
         """Specific model validation, to be overwritten by class"""
         return v
 
+    @classmethod
+    def model_validation_single_pass(cls, v):
+        """Specific model validation, with one pass over each data variable.
+
+        Defaults to `model_validation`.  Can be overwritten by classes which
+        run several checks over the same data variable.
+        """
+        return cls.model_validation(v)
+
     @classmethod
     def __get_validators__(cls):
         """Get validators"""
@@ -90,6 +127,15 @@ class PydanticXArrayDataSet(xr.Dataset):
         v = cls.model_validation(v)
         return v
 
+    @classmethod
+    def validate_single_pass(cls, v: Any) -> Any:
+        """Do validation, checking the values of each data variable in a single pass"""
+        v = cls.validate_dims(v)
+        v = cls.validate_coords(v)
+        v = cls.validate_data_vars(v)
+        v = cls.model_validation_single_pass(v)
+        return v
+
     @classmethod
     def validate_dims(cls, v: Any) -> Any:
         """Validate the dims"""
@@ -0,0 +1,142 @@
+""" A local disk cache of remote files, with a size limit and least-recently-used eviction """
+import fcntl
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+_LOG = logging.getLogger(__name__)
+
+LOCK_FILENAME = ".lock"
+TEMPORARY_SUFFIX = ".tmp"
+
+# After eviction, the cache is this fraction of its maximum size, so eviction doesn't run on
+# every write.
+LOW_WATER_MARK_FRACTION = 0.9
+
+BYTES_PER_MB = 1e6
+
+
+class DiskCache:
+    """
+    A read-through cache of bytes on local disk, shared by all the processes on a machine.
+
+    Each value is saved in its own file, named by the hash of its key.  Values are written to a
+    temporary file which is then renamed, so a reader never sees a partial value.  The modification
+    time of each file is updated when it is read, and when the cache is bigger than
+    `max_size_mb` the least-recently-used files are deleted.  Only one process evicts at once,
+    using a lock file, and readers treat a file deleted by eviction as a cache miss.  So many
+    processes (e.g. the workers of `prepare_ml_data.py`) can use the same cache directory safely.
+
+    The cache only holds the directory and some counters, so it can be pickled.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float):
+        """
+        Set up the cache.
+
+        Args:
+            cache_dir: The local directory to cache in.  Created if it doesn't exist.
+            max_size_mb: The maximum size of the cache, in MB.
+        """
+        assert max_size_mb > 0
+        self.cache_dir = str(cache_dir)
+        self.max_size_mb = max_size_mb
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # The number of bytes written by this process since the size of the cache was last checked.
+        self._bytes_written_since_eviction = 0
+
+    @property
+    def max_size_bytes(self) -> int:
+        """The maximum size of the cache, in bytes"""
+        return int(self.max_size_mb * BYTES_PER_MB)
+
+    def _filename(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[bytes]:
+        """The cached value of `key`, or None if `key` isn't cached"""
+        filename = self._filename(key)
+        try:
+            with open(filename, "rb") as file:
+                value = file.read()
+            # Mark as recently used.
+            os.utime(filename)
+        except FileNotFoundError:
+            return None
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        """Cache `value` as `key`.  If writing fails (e.g. the disk is full) then log a warning."""
+        filename = self._filename(key)
+        temporary_filename = f"{filename}.{os.getpid()}.{threading.get_ident()}{TEMPORARY_SUFFIX}"
+        try:
+            with open(temporary_filename, "wb") as file:
+                file.write(value)
+            os.replace(temporary_filename, filename)
+        except OSError as error:
+            _LOG.warning(f"Failed to write {key} to the disk cache in {self.cache_dir}: {error}")
+            try:
+                os.remove(temporary_filename)
+            except FileNotFoundError:
+                pass
+            return
+
+        # Checking the size of the cache means listing the directory, so only check after
+        # writing a reasonable fraction of the cache.
+        self._bytes_written_since_eviction += len(value)
+        if self._bytes_written_since_eviction > self.max_size_bytes * (1 - LOW_WATER_MARK_FRACTION):
+            self.evict()
+
+    def size_bytes(self) -> int:
+        """The total size of the cached values, in bytes"""
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        for entry in os.scandir(self.cache_dir):
+            if entry.name != LOCK_FILENAME and not entry.name.endswith(TEMPORARY_SUFFIX):
+                yield entry
+
+    def evict(self) -> None:
+        """
+        If the cache is bigger than `max_size_mb`, then delete the least-recently-used values.
+
+        If another process is already evicting, then return without waiting.
+        """
+        self._bytes_written_since_eviction = 0
+        with open(os.path.join(self.cache_dir, LOCK_FILENAME), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            try:
+                self._evict()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _evict(self) -> None:
+        stats = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            stats.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size_bytes = sum(size for _, size, _ in stats)
+        if size_bytes <= self.max_size_bytes:
+            return
+
+        target_size_bytes = self.max_size_bytes * LOW_WATER_MARK_FRACTION
+        n_evicted = 0
+        for _, size, path in sorted(stats):
+            if size_bytes <= target_size_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size_bytes -= size
+            n_evicted += 1
+        _LOG.debug(f"Evicted {n_evicted:,d} files from the disk cache in {self.cache_dir}")
@@ -0,0 +1,260 @@
+""" Read Zarr stores on cloud storage faster: fetch chunks concurrently, and cache them on disk """
+import asyncio
+import itertools
+import logging
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import fsspec
+import numpy as np
+import pandas as pd
+import xarray as xr
+import zarr
+from fsspec.asyn import sync
+
+from nowcasting_dataset.filesystem.disk_cache import DiskCache
+
+_LOG = logging.getLogger(__name__)
+
+# Stored in the prefetch cache for chunks which don't exist.  Zarr fills these with fill_value.
+_MISSING = object()
+
+
+class PrefetchStore(MutableMapping):
+    """
+    A read-only Zarr store, which can fetch many chunks at once.
+
+    `prefetch(keys)` fetches all `keys` concurrently, using fsspec's async `_cat_file` if the
+    filesystem is async (e.g. GCS, S3 or HTTP), with at most `max_concurrent_requests` requests in
+    flight.  Zarr then decodes the prefetched chunks locally, as normal.  Keys which have not been
+    prefetched are fetched one at a time, like a normal fsspec mapper.
+
+    The prefetched chunks are kept until the next call of `prefetch` or `clear_prefetched`.
+
+    If `disk_cache` is set, then chunks are read from the disk cache if they are there, and
+    saved to the disk cache after they are fetched.  Metadata (e.g. '.zmetadata') is never
+    cached, because the Zarr store might be appended to.  The chunks are cached under the version
+    of their array: a hash of the file info (e.g. the modification time or etag) of its
+    '.zarray', which is fetched once per array.  Writing or appending to an array rewrites its
+    '.zarray', so the cached chunks of the old array are never read again (and are eventually
+    evicted).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_concurrent_requests: int = 64,
+        storage_options: Optional[Dict] = None,
+        disk_cache: Optional[DiskCache] = None,
+    ):
+        """
+        Open the store.
+
+        Args:
+            url: The URL of the Zarr store, e.g. 'gs://bucket/data.zarr'.
+            max_concurrent_requests: The maximum number of chunk requests in flight at once.
+            storage_options: Passed to fsspec when opening the filesystem.
+            disk_cache: Optional local disk cache of the chunks.
+        """
+        assert max_concurrent_requests > 0
+        self.url = str(url)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.storage_options = storage_options or {}
+        self.disk_cache = disk_cache
+        self.fs, self.root = fsspec.core.url_to_fs(self.url, **self.storage_options)
+        self.root = self.root.rstrip("/")
+        self._prefetched: Dict[str, object] = {}
+        # The version of each array, keyed by the path of the array in the store.
+        self._array_versions: Dict[str, Optional[str]] = {}
+
+    def __getstate__(self) -> dict:
+        """Leave out the prefetched chunks and the array versions when pickling"""
+        state = self.__dict__.copy()
+        state["_prefetched"] = {}
+        state["_array_versions"] = {}
+        return state
+
+    def _path(self, key: str) -> str:
+        return f"{self.root}/{key}"
+
+    def _array_version(self, array_path: str) -> Optional[str]:
+        """The version of the array at `array_path`, or None if it has no '.zarray'"""
+        if array_path not in self._array_versions:
+            zarray_key = f"{array_path}/.zarray" if array_path else ".zarray"
+            try:
+                version = self.fs.ukey(self._path(zarray_key))
+            except FileNotFoundError:
+                _LOG.warning(f"{self.url}/{zarray_key} not found, so not caching its chunks")
+                version = None
+            self._array_versions[array_path] = version
+        return self._array_versions[array_path]
+
+    def _disk_cache_key(self, key: str) -> Optional[str]:
+        """The key of chunk `key` in the disk cache, or None if it isn't cached"""
+        if self.disk_cache is None:
+            return None
+        array_path, _, chunk_name = key.rpartition("/")
+        if chunk_name.startswith("."):
+            return None
+        version = self._array_version(array_path)
+        if version is None:
+            return None
+        return f"{self.url}/{key}@{version}"
+
+    def _get_from_disk_cache(self, key: str) -> Optional[bytes]:
+        disk_cache_key = self._disk_cache_key(key)
+        if disk_cache_key is None:
+            return None
+        return self.disk_cache.get(disk_cache_key)
+
+    def _put_in_disk_cache(self, key: str, value: object) -> None:
+        if value is _MISSING:
+            return
+        disk_cache_key = self._disk_cache_key(key)
+        if disk_cache_key is not None:
+            self.disk_cache.put(disk_cache_key, value)
+
+    def prefetch(self, keys: Iterable[str]) -> None:
+        """Fetch `keys` concurrently, replacing any previously prefetched chunks"""
+        self._prefetched = {}
+        keys_to_fetch = []
+        for key in sorted(set(keys)):
+            value = self._get_from_disk_cache(key)
+            if value is None:
+                keys_to_fetch.append(key)
+            else:
+                self._prefetched[key] = value
+
+        paths = [self._path(key) for key in keys_to_fetch]
+        if self.fs.async_impl:
+            values = sync(self.fs.loop, self._cat_files, paths)
+        else:
+            values = [self._cat_file_or_missing(path) for path in paths]
+        for key, value in zip(keys_to_fetch, values):
+            self._put_in_disk_cache(key, value)
+            self._prefetched[key] = value
+        _LOG.debug(
+            f"Prefetched {len(self._prefetched):,d} chunks from {self.url}, of which"
+            f" {len(self._prefetched) - len(keys_to_fetch):,d} were in the disk cache"
+        )
+
+    async def _cat_files(self, paths: List[str]) -> List[object]:
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def _cat_one_file(path: str) -> object:
+            async with semaphore:
+                try:
+                    return await self.fs._cat_file(path)
+                except FileNotFoundError:
+                    return _MISSING
+
+        return await asyncio.gather(*[_cat_one_file(path) for path in paths])
+
+    def _cat_file_or_missing(self, path: str) -> object:
+        try:
+            return self.fs.cat_file(path)
+        except FileNotFoundError:
+            return _MISSING
+
+    def clear_prefetched(self) -> None:
+        """Forget the prefetched chunks, to free memory"""
+        self._prefetched = {}
+
+    def __getitem__(self, key: str) -> bytes:
+        """Get a prefetched chunk, or fetch it now"""
+        value = self._prefetched.get(key)
+        if value is None:
+            value = self._get_from_disk_cache(key)
+        if value is None:
+            value = self._cat_file_or_missing(self._path(key))
+            self._put_in_disk_cache(key, value)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        """Check if `key` exists, without fetching it"""
+        if key in self._prefetched:
+            return self._prefetched[key] is not _MISSING
+        if self._get_from_disk_cache(key) is not None:
+            return True
+        return self.fs.exists(self._path(key))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over all the keys in the store"""
+        for path in self.fs.find(self.root):
+            yield path[len(self.root) + 1 :]
+
+    def __len__(self) -> int:
+        """The number of keys in the store"""
+        return sum(1 for _ in self)
+
+    def __setitem__(self, key, value):
+        """The store is read-only"""
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+    def __delitem__(self, key):
+        """The store is read-only"""
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+
+class ZarrChunkIndex:
+    """
+    Find which chunks of a Zarr array hold the data of a lazily-selected xr.DataArray.
+
+    The selection can be reordered, reindexed or renamed (as `open_sat_data` and `open_nwp` do),
+    as long as it keeps a coordinate for each dimension of the Zarr array, because the chunks are
+    found by looking up the coordinate values in the Zarr store.
+    """
+
+    def __init__(self, store: MutableMapping, variable_name: str, consolidated: bool = True):
+        """
+        Read the coordinates and chunking of `variable_name` in `store`.
+
+        Args:
+            store: The Zarr store.
+            variable_name: The name of the Zarr array, e.g. 'stacked_eumetsat_data' or 'UKV'.
+            consolidated: Whether or not the Zarr metadata is consolidated.
+        """
+        dataset = xr.open_dataset(store, engine="zarr", consolidated=consolidated, chunks=None)
+        self.variable_name = variable_name
+        self.dims = dataset[variable_name].dims
+
+        # Map from each coordinate value to its position in the Zarr array.  Duplicated values
+        # are dropped by `open_sat_data` and `open_nwp`, keeping the first, so do the same here.
+        self.positions: Dict[str, pd.Series] = {}
+        for dim in self.dims:
+            index = dataset.get_index(dim)
+            is_first = ~index.duplicated()
+            self.positions[dim] = pd.Series(np.flatnonzero(is_first), index=index[is_first])
+        dataset.close()
+
+        group = zarr.open_consolidated(store) if consolidated else zarr.open_group(store, mode="r")
+        array = group[variable_name]
+        self.chunks = array.chunks
+        self.dimension_separator = getattr(array, "_dimension_separator", None) or "."
+
+    def chunk_keys(self, data_array: xr.DataArray) -> Optional[Set[str]]:
+        """
+        The keys of the chunks which hold the data of `data_array`.
+
+        Returns: The set of keys, or None if the chunks can't be found, e.g. because `data_array`
+            is missing a coordinate, or its coordinate values aren't in the Zarr store.
+        """
+        chunk_ids_for_each_dim = []
+        for dim, chunk_size in zip(self.dims, self.chunks):
+            if dim not in data_array.coords:
+                return None
+            values = np.atleast_1d(data_array.coords[dim].values)
+            indexer = self.positions[dim].index.get_indexer(values)
+            if len(indexer) == 0 or (indexer < 0).any():
+                return None
+            positions = self.positions[dim].values[indexer]
+            chunk_ids_for_each_dim.append(np.unique(positions // chunk_size))
+
+        return {
+            self.variable_name
+            + "/"
+            + self.dimension_separator.join(str(chunk_id) for chunk_id in chunk_ids)
+            for chunk_ids in itertools.product(*chunk_ids_for_each_dim)
+        }
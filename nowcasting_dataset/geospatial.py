@@ -124,6 +124,80 @@ def calculate_azimuth_and_elevation_angle(
     return solpos[["elevation", "azimuth"]]
 
 
+def calculate_azimuth_and_elevation_angles(
+    latitudes: Union[List[float], np.ndarray],
+    longitudes: Union[List[float], np.ndarray],
+    datestamps: Union[List[datetime.datetime], pd.DatetimeIndex],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate the azimuth angle, and the elevation angle, for many locations at once.
+
+    Gives the same angles as `calculate_azimuth_and_elevation_angle` for each location, using
+    pvlib's numpy implementation of the NREL solar position algorithm.  But the parts of the
+    algorithm which only depend on time (the position of the sun in the sky) are only computed
+    once, and the rest is broadcast over a (time, location) grid.
+
+    Args:
+        latitudes: latitude of each location
+        longitudes: longitude of each location
+        datestamps: the datestamps to calculate the sun angles.  If not timezone-aware, then UTC.
+
+    Returns: Tuple of azimuth and elevation in degrees, each an array of shape
+        (number of datestamps, number of locations).
+    """
+    # These functions of pvlib.spa aren't public, so the version of pvlib is pinned in
+    # requirements.txt (e.g. the signature of longitude_obliquity_nutation changed in 0.10.0).
+    spa = pvlib.spa
+    datestamps = pd.DatetimeIndex(datestamps)
+    if datestamps.tz is not None:
+        datestamps = datestamps.tz_convert("UTC").tz_localize(None)
+    unixtime = datestamps.values.astype("datetime64[ns]").astype(np.int64) / 1e9
+    # The difference between terrestrial time and UT1, in seconds.  pvlib's default.
+    delta_t = 67.0
+
+    # The apparent position of the sun, which is the same for all locations.
+    jd = spa.julian_day(unixtime)
+    jde = spa.julian_ephemeris_day(jd, delta_t)
+    jc = spa.julian_century(jd)
+    jce = spa.julian_ephemeris_century(jde)
+    jme = spa.julian_ephemeris_millennium(jce)
+    R = spa.heliocentric_radius_vector(jme)
+    L = spa.heliocentric_longitude(jme)
+    B = spa.heliocentric_latitude(jme)
+    theta = spa.geocentric_longitude(L)
+    beta = spa.geocentric_latitude(B)
+    x0 = spa.mean_elongation(jce)
+    x1 = spa.mean_anomaly_sun(jce)
+    x2 = spa.mean_anomaly_moon(jce)
+    x3 = spa.moon_argument_latitude(jce)
+    x4 = spa.moon_ascending_longitude(jce)
+    nutation = np.empty((2, len(x0)))
+    spa.longitude_obliquity_nutation(jce, x0, x1, x2, x3, x4, nutation)
+    delta_psi, delta_epsilon = nutation
+    epsilon = spa.true_ecliptic_obliquity(spa.mean_ecliptic_obliquity(jme), delta_epsilon)
+    lamd = spa.apparent_sun_longitude(theta, delta_psi, spa.aberration_correction(R))
+    v = spa.apparent_sidereal_time(spa.mean_sidereal_time(jd, jc), delta_psi, epsilon)
+    alpha = spa.geocentric_sun_right_ascension(lamd, epsilon, beta)
+    delta = spa.geocentric_sun_declination(lamd, epsilon, beta)
+    xi = spa.equatorial_horizontal_parallax(R)
+
+    # Broadcast over (time, location).  The locations are at sea level.
+    v, alpha, delta, xi = (values[:, np.newaxis] for values in (v, alpha, delta, xi))
+    latitudes = np.asarray(latitudes, dtype=np.float64)[np.newaxis]
+    longitudes = np.asarray(longitudes, dtype=np.float64)[np.newaxis]
+    H = spa.local_hour_angle(v, longitudes, alpha)
+    u = spa.uterm(latitudes)
+    x = spa.xterm(u, latitudes, 0)
+    y = spa.yterm(u, latitudes, 0)
+    delta_alpha = spa.parallax_sun_right_ascension(x, xi, H, delta)
+    delta_prime = spa.topocentric_sun_declination(delta, x, y, xi, delta_alpha, H)
+    H_prime = spa.topocentric_local_hour_angle(H, delta_alpha)
+    elevation = spa.topocentric_elevation_angle_without_atmosphere(latitudes, delta_prime, H_prime)
+    gamma = spa.topocentric_astronomers_azimuth(H_prime, delta_prime, latitudes)
+    azimuth = spa.topocentric_azimuth_angle(gamma)
+    return azimuth, elevation
+
+
 def get_osgb_center_from_list_of_x_and_y_osgb(
     x_osgb: Union[xr.DataArray, List[float], np.ndarray],
     y_osgb: Union[xr.DataArray, List[float], np.ndarray],
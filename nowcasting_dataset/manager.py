@@ -11,12 +11,19 @@ import pandas as pd
 # nowcasting_dataset imports
 import nowcasting_dataset.time as nd_time
 import nowcasting_dataset.utils as nd_utils
-from nowcasting_dataset import config
+from nowcasting_dataset import config, profiling
 from nowcasting_dataset.consts import (
     SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES,
+    SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME,
     SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_FILENAME,
+    SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_NPZ_FILENAME,
 )
-from nowcasting_dataset.data_sources import ALL_DATA_SOURCE_NAMES, MAP_DATA_SOURCE_NAME_TO_CLASS
+from nowcasting_dataset.data_sources import (
+    ALL_DATA_SOURCE_NAMES,
+    MAP_DATA_SOURCE_NAME_TO_CLASS,
+    time_periods_cache,
+)
+from nowcasting_dataset.dataset import locations as nd_locations
 from nowcasting_dataset.dataset.split import split
 from nowcasting_dataset.filesystem import utils as nd_fs_utils
 
@@ -34,12 +41,15 @@ class Manager:
       save_batches_locally_and_upload: bool: Set to True by `load_yaml_configuration()` if
         `config.process.upload_every_n_batches > 0`.
       local_temp_path: Path: `config.process.local_temp_path` with `~` expanded.
+      profile_path: Optional[Path]: If set, `create_batches()` profiles each worker, and saves
+        one profile per split and data source to this local folder.
     """
 
     def __init__(self) -> None:  # noqa: D107
         self.config = None
         self.data_sources = {}
         self.data_source_which_defines_geospatial_locations = None
+        self.profile_path: Optional[Path] = None
 
     def load_yaml_configuration(self, filename: str) -> None:
         """Load YAML config from `filename`."""
@@ -115,12 +125,17 @@ class Manager:
                 config_for_data_source, pattern_to_remove=f"^{data_source_name}_"
             )
 
+            # The size of the example thread pool isn't a constructor argument.
+            n_example_threads = config_for_data_source.pop("n_example_threads", None)
+
             data_source_class = MAP_DATA_SOURCE_NAME_TO_CLASS[data_source_name]
             try:
                 data_source = data_source_class(**config_for_data_source)
             except Exception:
                 logger.exception(f"Exception whilst instantiating {data_source_name}!")
                 raise
+            if n_example_threads is not None:
+                data_source.n_example_threads = n_example_threads
             self.data_sources[data_source_name] = data_source
 
         # Set data_source_which_defines_geospatial_locations:
@@ -167,7 +182,8 @@ class Manager:
             " will create..."
         )
         t0_datetimes = self.get_t0_datetimes_across_all_data_sources(
-            freq=self.config.process.t0_datetime_frequency
+            freq=self.config.process.t0_datetime_frequency,
+            time_periods_cache_dir=self.config.process.time_periods_cache_dir,
         )
         # TODO: move hard code values to config file #426
         split_t0_datetimes = split.split_data(
@@ -211,6 +227,9 @@ class Manager:
             nd_fs_utils.makedirs(path_for_csv, exist_ok=True)
             logger.debug(f"Writing {output_filename}")
             df_of_locations.to_csv(output_filename)
+            npz_filename = self._filename_of_locations_npz_file(split_name)
+            logger.debug(f"Writing {npz_filename}")
+            nd_locations.save_locations_to_npz(df_of_locations, npz_filename)
 
     def _get_n_batches_requested_for_split_name(self, split_name: str) -> int:
         return getattr(self.config.process, f"n_{split_name}_batches")
@@ -222,6 +241,24 @@ class Manager:
             / SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_FILENAME
         )
 
+    def _filename_of_locations_npz_file(self, split_name: str) -> Path:
+        return (
+            self.config.output_data.filepath
+            / split_name
+            / SPATIAL_AND_TEMPORAL_LOCATIONS_OF_EACH_EXAMPLE_NPZ_FILENAME
+        )
+
+    def _load_locations(self, split_name: str) -> pd.DataFrame:
+        """Load the locations of each example, from the .npz file if it exists, else the CSV"""
+        filename = self._filename_of_locations_npz_file(split_name)
+        if nd_fs_utils.get_filesystem(filename).exists(filename):
+            logger.info(f"Loading {filename}.")
+            return nd_locations.load_locations_from_npz(filename)
+        # Locations made before the .npz file was introduced are only in the CSV file.
+        filename = self._filename_of_locations_csv_file(split_name)
+        logger.info(f"Loading {filename}.")
+        return nd_locations.load_locations_from_csv(filename)
+
     def _locations_csv_file_exists(self) -> bool:
         """Check if filepath/train/spatial_and_temporal_locations_of_each_example.csv exists."""
         filename = self._filename_of_locations_csv_file(split_name=split.SplitName.TRAIN.value)
@@ -235,7 +272,9 @@ class Manager:
             return True
 
     def get_t0_datetimes_across_all_data_sources(
-        self, freq: Union[str, pd.Timedelta]
+        self,
+        freq: Union[str, pd.Timedelta],
+        time_periods_cache_dir: Optional[Union[str, Path]] = None,
     ) -> pd.DatetimeIndex:
         """
         Compute the intersection of the t0 datetimes available across all DataSources.
@@ -245,6 +284,9 @@ class Manager:
                 and every datetime will be aligned to this frequency.  For example, if
                 freq='5 minutes' then every datetime will be at 00, 05, ..., 55 minutes
                 past the hour.
+            time_periods_cache_dir: If set, then cache the contiguous t0 time periods of each
+                DataSource in this directory, so they are only recomputed when the DataSource's
+                input data or settings change.
 
         Returns:  Valid t0 datetimes, taking into consideration all DataSources,
             filtered by daylight hours (SatelliteDataSource.datetime_index() removes the night
@@ -264,7 +306,12 @@ class Manager:
         for data_source_name, data_source in self.data_sources.items():
             logger.debug(f"Getting t0 time periods for {data_source_name}")
             try:
-                t0_time_periods = data_source.get_contiguous_t0_time_periods()
+                if time_periods_cache_dir is None:
+                    t0_time_periods = data_source.get_contiguous_t0_time_periods()
+                else:
+                    t0_time_periods = time_periods_cache.get_contiguous_t0_time_periods(
+                        data_source, cache_dir=time_periods_cache_dir
+                    )
             except NotImplementedError:
                 # Skip data_sources with no concept of time.
                 logger.debug(f"Skipping {data_source_name} because it has not concept of datetime.")
@@ -301,7 +348,9 @@ class Manager:
 
         Returns:
             Each row of each the DataFrame specifies the position of each example, using
-            columns: 't0_datetime_UTC', 'x_center_OSGB', 'y_center_OSGB'.
+            columns: 't0_datetime_UTC', 'x_center_OSGB', 'y_center_OSGB'.  If the
+            data_source_which_defines_geospatial_locations picks an object (e.g. a GSP) for
+            each example, then there is also an 'object_id' column, of the id of that object.
         """
         assert len(t0_datetimes) > 0
         shuffled_t0_datetimes = np.random.choice(t0_datetimes, size=n_examples)
@@ -311,14 +360,22 @@ class Manager:
         (
             x_locations,
             y_locations,
-        ) = self.data_source_which_defines_geospatial_locations.get_locations(shuffled_t0_datetimes)
-        return pd.DataFrame(
+            object_ids,
+        ) = self.data_source_which_defines_geospatial_locations.get_locations_and_object_ids(
+            shuffled_t0_datetimes
+        )
+        locations = pd.DataFrame(
             {
                 "t0_datetime_UTC": shuffled_t0_datetimes,
                 "x_center_OSGB": x_locations,
                 "y_center_OSGB": y_locations,
             }
         )
+        if object_ids is not None:
+            locations[SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME] = np.asarray(
+                object_ids, dtype=np.int64
+            )
+        return locations
 
     def _get_first_batches_to_create(
         self, overwrite_batches: bool
@@ -408,16 +465,11 @@ class Manager:
         # Load locations for each example off disk.
         locations_for_each_example_of_each_split: dict[split.SplitName, pd.DataFrame] = {}
         for split_name in splits_which_need_more_batches:
-            filename = self._filename_of_locations_csv_file(split_name.value)
-            logger.info(f"Loading {filename}.")
-            locations_for_each_example = pd.read_csv(filename, index_col=0)
-            assert locations_for_each_example.columns.to_list() == list(
-                SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES
-            )
-            # Converting to datetimes is much faster using `pd.to_datetime()` than
-            # passing `parse_datetimes` into `pd.read_csv()`.
-            locations_for_each_example["t0_datetime_UTC"] = pd.to_datetime(
-                locations_for_each_example["t0_datetime_UTC"]
+            locations_for_each_example = self._load_locations(split_name.value)
+            assert locations_for_each_example.columns.to_list() in (
+                list(SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES),
+                list(SPATIAL_AND_TEMPORAL_LOCATIONS_COLUMN_NAMES)
+                + [SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME],
             )
             if len(locations_for_each_example) > 0:
                 locations_for_each_example_of_each_split[split_name] = locations_for_each_example
@@ -438,6 +490,12 @@ class Manager:
                     idx_of_first_batch = first_batches_to_create[split_name][data_source_name]
                     idx_of_first_example = idx_of_first_batch * self.config.process.batch_size
                     locations = locations_for_split.loc[idx_of_first_example:]
+                    # The object ids are only meaningful to the DataSource which chose them.
+                    if data_source is not self.data_source_which_defines_geospatial_locations:
+                        locations = locations.drop(
+                            columns=SPATIAL_AND_TEMPORAL_LOCATIONS_OBJECT_ID_COLUMN_NAME,
+                            errors="ignore",
+                        )
 
                     # Get paths.
                     dst_path = (
@@ -465,6 +523,10 @@ class Manager:
                         dst_path=dst_path,
                         local_temp_path=local_temp_path,
                         upload_every_n_batches=self.config.process.upload_every_n_batches,
+                        validation_level=self.config.process.validation_level,
+                        validate_every_n_batches=self.config.process.validate_every_n_batches,
+                        memory_budget_mb=self.config.process.memory_budget_mb,
+                        trace_memory_allocations=self.config.process.trace_memory_allocations,
                     )
 
                     # Logger messages for callbacks:
@@ -480,8 +542,18 @@ class Manager:
                     logger.debug(
                         f"About to submit create_batches task for {data_source_name}, {split_name}"
                     )
+                    if self.profile_path is None:
+                        function, args = data_source.create_batches, ()
+                    else:
+                        profile_filename = self.profile_path / (
+                            f"{split_name.value}_{data_source_name}_worker_{worker_id}"
+                            f"{profiling.PROFILE_SUFFIX}"
+                        )
+                        function = profiling.run_and_profile
+                        args = (data_source.create_batches, profile_filename)
                     async_result = pool.apply_async(
-                        data_source.create_batches,
+                        function,
+                        args=args,
                         kwds=kwargs_for_create_batches,
                         callback=lambda result: logger.info(callback_msg),
                         error_callback=lambda exception: logger.error(
@@ -0,0 +1,160 @@
+""" Track the memory used by each process which creates batches, and keep it within a budget """
+import logging
+import os
+import resource
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import fsspec
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CSV_FILENAME = "memory.csv"
+
+# When the private memory is above this fraction of the budget, fewer examples are loaded at once.
+SOFT_LIMIT_FRACTION = 0.8
+
+BYTES_PER_MB = 1e6
+
+
+def _read_statm() -> List[int]:
+    """The sizes in /proc/self/statm (total, resident, shared, ...), in bytes"""
+    with open("/proc/self/statm") as statm:
+        return [int(n_pages) * os.sysconf("SC_PAGE_SIZE") for n_pages in statm.read().split()]
+
+
+def get_rss_bytes() -> int:
+    """The resident set size (RSS) of this process, in bytes"""
+    try:
+        return _read_statm()[1]
+    except (OSError, ValueError):
+        # Not Linux, so use the peak RSS instead, which is in bytes on macOS.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def get_private_bytes() -> int:
+    """
+    The resident memory of this process which isn't shared with other processes, in bytes.
+
+    Unlike the RSS, this leaves out the pages of shared files, like the data which `DataSource`s
+    share in `/dev/shm` (see `shared_arrays.py`) and the shared libraries.
+    """
+    try:
+        statm = _read_statm()
+    except (OSError, ValueError):
+        return get_rss_bytes()
+    return statm[1] - statm[2]
+
+
+class MemoryTracker:
+    """
+    Record the memory used by each batch, and keep the process within a memory budget.
+
+    Like `StageTimer`, the tracker only holds numbers and lists, so it can be pickled and sent to
+    another process.
+    """
+
+    def __init__(self, budget_mb: Optional[float] = None, trace_allocations: bool = False):
+        """
+        Set up the memory tracker.
+
+        Args:
+            budget_mb: The memory budget of this process, in MB.  If None then there is no budget.
+            trace_allocations: If True then use `tracemalloc` to record the peak memory allocated
+                by Python while creating each batch.  This slows down creating batches.
+        """
+        assert budget_mb is None or budget_mb > 0
+        self.budget_mb = budget_mb
+        self.trace_allocations = trace_allocations
+        self.reset()
+
+    def reset(self) -> None:
+        """Remove all records"""
+        self.records: List[Dict] = []
+
+    @contextmanager
+    def track_batch(self, batch_idx: int) -> Iterator[None]:
+        """Record the memory used by the code inside this context, as batch `batch_idx`"""
+        start_tracing = self.trace_allocations and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        rss_before_bytes = get_rss_bytes()
+        try:
+            yield
+        finally:
+            record = dict(
+                batch_idx=batch_idx,
+                rss_before_mb=rss_before_bytes / BYTES_PER_MB,
+                rss_after_mb=get_rss_bytes() / BYTES_PER_MB,
+                private_after_mb=get_private_bytes() / BYTES_PER_MB,
+                tracemalloc_peak_mb=None,
+            )
+            if start_tracing:
+                record["tracemalloc_peak_mb"] = tracemalloc.get_traced_memory()[1] / BYTES_PER_MB
+                tracemalloc.stop()
+            self.records.append(record)
+            logger.debug(
+                f"Batch {batch_idx}: RSS = {record['rss_after_mb']:,.1f} MB"
+                f" ({record['rss_after_mb'] - record['rss_before_mb']:+,.1f} MB),"
+                f" private = {record['private_after_mb']:,.1f} MB"
+                + (
+                    f", tracemalloc peak = {record['tracemalloc_peak_mb']:,.1f} MB"
+                    if start_tracing
+                    else ""
+                )
+            )
+
+    def fraction_of_budget_used(self) -> float:
+        """
+        The private memory of this process as a fraction of the budget.  0 if there is no budget.
+
+        Shared memory isn't counted, because it isn't freed by using less memory in this process.
+        """
+        if self.budget_mb is None:
+            return 0.0
+        return get_private_bytes() / BYTES_PER_MB / self.budget_mb
+
+    def is_over_budget(self) -> bool:
+        """Whether the private memory of this process is over the budget"""
+        return self.fraction_of_budget_used() > 1
+
+    def n_threads(self, max_threads: int) -> int:
+        """
+        The number of examples to load at once, given how close the process is to the budget.
+
+        Below `SOFT_LIMIT_FRACTION` of the budget, all `max_threads` are used.  Between that and
+        the budget, the number of threads falls linearly, down to 1 thread at the budget.
+        """
+        fraction = self.fraction_of_budget_used()
+        if fraction <= SOFT_LIMIT_FRACTION:
+            return max_threads
+        headroom = max(1.0 - fraction, 0.0) / (1.0 - SOFT_LIMIT_FRACTION)
+        return max(1, int(max_threads * headroom))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per batch"""
+        return pd.DataFrame(
+            self.records,
+            columns=[
+                "batch_idx",
+                "rss_before_mb",
+                "rss_after_mb",
+                "private_after_mb",
+                "tracemalloc_peak_mb",
+            ],
+        )
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the records as a CSV file in `path`.
+
+        Args:
+            path: The folder to save to.  This can be local or in the cloud.
+        """
+        memory_csv_filename = os.path.join(path, MEMORY_CSV_FILENAME)
+        logger.debug(f"Saving memory usage to {memory_csv_filename}")
+        with fsspec.open(memory_csv_filename, mode="w") as file:
+            self.to_dataframe().to_csv(file, index=False)
@@ -0,0 +1,209 @@
+""" Profile the processes which create batches, and merge their profiles """
+import contextlib
+import cProfile
+import logging
+import os
+import pstats
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".prof"
+MERGED_PROFILE_FILENAME = "merged" + PROFILE_SUFFIX
+
+# The `_ThreadProfile` of the current thread, if it has been profiled.
+_thread_local = threading.local()
+
+# The `Profiler` which is profiling, if any.
+_active_profiler: Optional["Profiler"] = None
+
+
+@dataclass
+class _ThreadProfile:
+    """The cProfile profiler of one thread, which can only be enabled and disabled in that thread"""
+
+    owner: "Profiler"
+    thread: threading.Thread
+    profiler: cProfile.Profile
+    enabled: bool = False
+
+    def enable(self) -> None:
+        """Start (or continue) profiling the current thread"""
+        self.profiler.enable()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop profiling the current thread"""
+        if self.enabled:
+            self.profiler.disable()
+            self.enabled = False
+
+
+def _get_thread_profile() -> Optional[_ThreadProfile]:
+    return getattr(_thread_local, "thread_profile", None)
+
+
+class Profiler:
+    """
+    Profile the current thread, and every thread started while profiling.
+
+    cProfile only profiles the thread it is enabled in, but most of the work of creating a batch
+    happens in the threads which load examples.  So each new thread gets its own cProfile
+    profiler, and the profiles of all the threads are added together by `stats()`.
+
+    A cProfile profiler can only be disabled by its own thread, so threads which outlive the
+    `Profiler` (like the threads of an `ExampleThreadPool`) run each task in `profile_task()`,
+    which only profiles the thread whilst the task runs.  `stats()` leaves out the profiles of
+    any other threads which are still alive and being profiled.
+
+    Use as a context manager:
+
+        with Profiler() as profiler:
+            do_work()
+        profiler.save("profiles/worker.prof")
+    """
+
+    def __init__(self):
+        """Set up the profiler, without starting it"""
+        self._profiler = cProfile.Profile()
+        self._thread_profiles: List[_ThreadProfile] = []
+
+    def _enable_thread_profile(self) -> _ThreadProfile:
+        """Profile the current thread, with a profiler made the first time it is profiled"""
+        thread_profile = _get_thread_profile()
+        if thread_profile is None or thread_profile.owner is not self:
+            if thread_profile is not None:
+                # The thread was profiled by an earlier Profiler.
+                thread_profile.disable()
+            thread_profile = _ThreadProfile(
+                owner=self, thread=threading.current_thread(), profiler=cProfile.Profile()
+            )
+            _thread_local.thread_profile = thread_profile
+            # Appending to a list is atomic in CPython, so this is safe across threads.
+            self._thread_profiles.append(thread_profile)
+        thread_profile.enable()
+        return thread_profile
+
+    def _start_thread_profiler(self, frame, event, arg) -> None:
+        """Called once at the start of each new thread, to profile that thread"""
+        # This replaces `_start_thread_profiler` as the profile function of this thread.
+        self._enable_thread_profile()
+
+    def __enter__(self) -> "Profiler":
+        """Start profiling"""
+        global _active_profiler
+        _active_profiler = self
+        threading.setprofile(self._start_thread_profiler)
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stop profiling"""
+        global _active_profiler
+        self._profiler.disable()
+        threading.setprofile(None)
+        if _active_profiler is self:
+            _active_profiler = None
+
+    def stats(self) -> pstats.Stats:
+        """The profile of all the threads, once profiling has stopped"""
+        stats = pstats.Stats(self._profiler)
+        for thread_profile in self._thread_profiles:
+            if thread_profile.enabled and thread_profile.thread.is_alive():
+                # Reading a profiler disables it, which only works in its own thread.
+                logger.debug(
+                    f"Leaving out the profile of thread {thread_profile.thread.name},"
+                    " which is still being profiled"
+                )
+                continue
+            stats.add(thread_profile.profiler)
+        return stats
+
+    def save(self, filename: Union[str, Path]) -> None:
+        """Save the profile of all the threads to a local file, readable by `pstats` and snakeviz"""
+        os.makedirs(os.path.dirname(str(filename)) or ".", exist_ok=True)
+        logger.debug(f"Saving profile to {filename}")
+        self.stats().dump_stats(str(filename))
+
+
+@contextlib.contextmanager
+def profile_task() -> Iterator[None]:
+    """
+    Profile the current thread whilst it runs one task, if a `Profiler` is profiling.
+
+    Use this in threads which outlive a `Profiler`, e.g. the threads of an `ExampleThreadPool`.
+    The thread is only profiled during the task, so it isn't profiled after the `Profiler` stops,
+    even if the thread was started before the `Profiler`.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        thread_profile = _get_thread_profile()
+        if thread_profile is not None:
+            # Profiling stopped since this thread was started, or since its last task.
+            thread_profile.disable()
+        yield
+        return
+
+    thread_profile = profiler._enable_thread_profile()
+    try:
+        yield
+    finally:
+        thread_profile.disable()
+
+
+def run_and_profile(function: Callable, profile_filename: Union[str, Path], *args, **kwargs) -> Any:
+    """
+    Run `function(*args, **kwargs)` and save its profile to `profile_filename`.
+
+    This is a module-level function so that it can be run in a `multiprocessing.Pool` worker.
+    The profile is saved even if `function` raises an exception.
+
+    Args:
+        function: The function to run, e.g. `data_source.create_batches`.
+        profile_filename: The local file to save the profile to.
+        *args: Positional arguments for `function`.
+        **kwargs: Keyword arguments for `function`.
+
+    Returns: The return value of `function`.
+    """
+    profiler = Profiler()
+    try:
+        with profiler:
+            return function(*args, **kwargs)
+    finally:
+        profiler.save(profile_filename)
+
+
+def merge_profiles(
+    filenames: Iterable[Union[str, Path]], output_filename: Optional[Union[str, Path]] = None
+) -> pstats.Stats:
+    """
+    Add together several profiles, e.g. the profiles of every worker of a run.
+
+    Args:
+        filenames: The profiles to merge, saved by `Profiler.save` or `cProfile`.
+        output_filename: Optional local file to save the merged profile to.
+
+    Returns: The merged profile.
+    """
+    filenames = [str(filename) for filename in filenames]
+    assert len(filenames) > 0, "There are no profiles to merge"
+    stats = pstats.Stats(*filenames)
+    if output_filename is not None:
+        stats.dump_stats(str(output_filename))
+    return stats
+
+
+def merge_profiles_in_folder(path: Union[str, Path]) -> pstats.Stats:
+    """Merge all the profiles in the local folder `path`, and save to `MERGED_PROFILE_FILENAME`"""
+    path = Path(path)
+    filenames = sorted(
+        filename
+        for filename in path.glob(f"*{PROFILE_SUFFIX}")
+        if filename.name != MERGED_PROFILE_FILENAME
+    )
+    logger.info(f"Merging {len(filenames)} profiles in {path}")
+    return merge_profiles(filenames, output_filename=path / MERGED_PROFILE_FILENAME)
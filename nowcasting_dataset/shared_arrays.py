@@ -0,0 +1,217 @@
+""" Share the large in-memory arrays of a DataSource with the worker processes
+
+Some `DataSource`s (PV, GSP, sun and topographic) load all their data into memory when they are
+created, and are then pickled into each worker process, so each process would hold its own copy of
+the data.  Instead, the values of the large arrays are copied once into memory-mapped files, in
+shared memory (`/dev/shm`) if there is room, and only the paths of the files are pickled.  Each
+process then maps the same files, read-only, so the data is only in physical memory once,
+however many processes use it, and pickling is instant.
+
+The files are deleted when the process which made them no longer needs them.  Processes which
+already mapped the files can still read them after they are deleted.
+"""
+import logging
+import mmap
+import os
+import shutil
+import tempfile
+import uuid
+import weakref
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+logger = logging.getLogger(__name__)
+
+# The directory of shared memory on Linux.  Files there are only ever in memory.
+SHARED_MEMORY_DIR = "/dev/shm"
+
+# The prefix of the names of the files, so any files left behind by killed processes can be found.
+FILENAME_PREFIX = "nowcasting_dataset_"
+
+# The name of the attribute which holds the shared values of an object, keyed by attribute name.
+SHARED_VALUES_ATTRIBUTE_NAME = "_shared_values"
+
+
+def _get_directory(nbytes: int) -> Optional[str]:
+    """The directory to put `nbytes` of shared data in, or None if there is no room"""
+    for directory in (SHARED_MEMORY_DIR, tempfile.gettempdir()):
+        if os.path.isdir(directory) and shutil.disk_usage(directory).free > nbytes:
+            return directory
+    return None
+
+
+def _remove_file(path: str, owner_pid: int) -> None:
+    """Remove the file at `path`, if this is the process which made it"""
+    # Forked processes inherit the finalizers of their parent, but mustn't delete its files.
+    if os.getpid() == owner_pid:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _map_array(path: str, shape: tuple, dtype: np.dtype, order: str, writeable: bool) -> np.ndarray:
+    """Map the array in the file at `path`"""
+    with open(path, "r+b" if writeable else "rb") as file:
+        mapped_file = mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_WRITE if writeable else mmap.ACCESS_READ
+        )
+    # The array keeps the memory map open, for as long as the array (or a view of it) exists.
+    return np.frombuffer(mapped_file, dtype=dtype).reshape(shape, order=order)
+
+
+class SharedArray:
+    """
+    A copy of a numpy array in a memory-mapped file, which is pickled as the path of the file.
+
+    The process which makes a `SharedArray` can write to its array.  Unpickled copies map the same
+    file read-only, so they see any changes without copying any data.
+
+    Attributes:
+      path: The path of the file.
+      shape: The shape of the array.
+      dtype: The dtype of the array.
+      order: "F" if the array is in Fortran order, else "C".
+    """
+
+    def __init__(self, array: np.ndarray, directory: str):
+        """Copy `array` into a new file in `directory`"""
+        assert array.nbytes > 0, "Empty arrays can't be memory-mapped"
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.order = "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+        self.path = os.path.join(directory, f"{FILENAME_PREFIX}{os.getpid()}_{uuid.uuid4().hex}")
+        with open(self.path, "wb") as file:
+            file.truncate(array.nbytes)
+        weakref.finalize(self, _remove_file, self.path, os.getpid())
+        self.array = _map_array(self.path, self.shape, self.dtype, self.order, writeable=True)
+        self.array[...] = array
+
+    def __getstate__(self) -> dict:
+        """Only pickle the path of the file, and how to read it"""
+        return dict(path=self.path, shape=self.shape, dtype=self.dtype.str, order=self.order)
+
+    def __setstate__(self, state: dict) -> None:
+        """Map the file made by the process which made the `SharedArray`"""
+        self.__dict__.update(state)
+        self.dtype = np.dtype(self.dtype)
+        self.array = _map_array(self.path, self.shape, self.dtype, self.order, writeable=False)
+
+
+class SharedValue:
+    """
+    A numpy array, pandas DataFrame or Series, or xarray DataArray, whose values are shared.
+
+    The index and columns of pandas objects, and the coordinates of xarray objects, are small,
+    so they are pickled as usual.
+
+    Attributes:
+      value: The object, whose values are a view of the `SharedArray`.
+    """
+
+    def __init__(self, value: Any, directory: str):
+        """Copy the values of `value` into a `SharedArray` in `directory`"""
+        if isinstance(value, pd.DataFrame):
+            assert value.dtypes.nunique() == 1, "The columns of a DataFrame must have one dtype"
+            self._metadata = dict(index=value.index, columns=value.columns)
+        elif isinstance(value, pd.Series):
+            self._metadata = dict(index=value.index, name=value.name)
+        elif isinstance(value, xr.DataArray):
+            # The coordinates of a DataArray refer to the DataArray, so only keep their variables.
+            coords = {name: coordinate.variable for name, coordinate in value.coords.items()}
+            self._metadata = dict(
+                coords=coords, dims=value.dims, name=value.name, attrs=value.attrs
+            )
+        else:
+            assert isinstance(value, np.ndarray), f"Can't share a {type(value)}"
+            self._metadata = None
+        self._type = type(value)
+        values = value if self._metadata is None else value.values
+        self._shared_array = SharedArray(np.asarray(values), directory)
+        self._make_value()
+
+    def _make_value(self) -> None:
+        array = self._shared_array.array
+        if self._metadata is None:
+            self.value = array
+        elif self._type is xr.DataArray:
+            self.value = xr.DataArray(array, **self._metadata)
+        else:
+            # Pandas doesn't copy a single array of values, so the object is a view of the file.
+            self.value = self._type(array, **self._metadata, copy=False)
+
+    def __getstate__(self) -> dict:
+        """Leave out the value, which is remade from the `SharedArray` when unpickled"""
+        state = self.__dict__.copy()
+        del state["value"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Remake the value from the unpickled `SharedArray`"""
+        self.__dict__.update(state)
+        self._make_value()
+
+
+def move_to_shared_memory(obj: object, attribute_names: Iterable[str]) -> None:
+    """
+    Move the values of attributes of `obj` into shared memory.
+
+    Each attribute is replaced by a copy whose values are in shared memory.  `get_state` and
+    `set_state` then pickle and unpickle `obj` without copying these values.  If an attribute is
+    replaced later, then the new value is pickled as usual.
+
+    Args:
+        obj: The object, e.g. a `DataSource`.
+        attribute_names: The names of the attributes to share.  Each attribute must be a numpy
+            array, pandas DataFrame or Series, or xarray DataArray.  Empty attributes aren't shared.
+    """
+    shared_values: Dict[str, SharedValue] = obj.__dict__.setdefault(
+        SHARED_VALUES_ATTRIBUTE_NAME, {}
+    )
+    for name in attribute_names:
+        value = getattr(obj, name)
+        nbytes = value.nbytes if isinstance(value, np.ndarray) else value.values.nbytes
+        if nbytes == 0:
+            continue
+        directory = _get_directory(nbytes)
+        if directory is None:
+            logger.warning(
+                f"There is no room to share {name} ({nbytes / 1e6:,.1f} MB) of"
+                f" {type(obj).__name__}, so each process will have its own copy"
+            )
+            continue
+        shared_values[name] = SharedValue(value, directory)
+        setattr(obj, name, shared_values[name].value)
+        logger.debug(
+            f"Moved {name} ({nbytes / 1e6:,.1f} MB) of {type(obj).__name__} to {directory}"
+        )
+
+
+def get_state(obj: object) -> dict:
+    """
+    The state of `obj` to pickle, without the values moved into shared memory.
+
+    Use this in `__getstate__`, with `set_state` in `__setstate__`.
+    """
+    state = obj.__dict__.copy()
+    if SHARED_VALUES_ATTRIBUTE_NAME in state:
+        # Attributes which were replaced after they were shared are pickled as usual.
+        shared_values = {
+            name: shared_value
+            for name, shared_value in state[SHARED_VALUES_ATTRIBUTE_NAME].items()
+            if state.get(name) is shared_value.value
+        }
+        state[SHARED_VALUES_ATTRIBUTE_NAME] = shared_values
+        for name in shared_values:
+            state[name] = None
+    return state
+
+
+def set_state(obj: object, state: dict) -> None:
+    """Set the state of `obj` from `get_state`, using the values in shared memory"""
+    obj.__dict__.update(state)
+    for name, shared_value in state.get(SHARED_VALUES_ATTRIBUTE_NAME, {}).items():
+        setattr(obj, name, shared_value.value)
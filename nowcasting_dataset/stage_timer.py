@@ -0,0 +1,118 @@
+""" Record how long each stage of creating batches takes """
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import fsspec
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# The stages recorded by `DataSource.create_batches` and `DataSource.get_batch`.
+STAGES = (
+    "open",
+    "prefetch",
+    "get_example",
+    "time_slice",
+    "spatial_crop",
+    "load",
+    "convert_coordinates",
+    "concat",
+    "validation",
+    "serialization",
+    "upload",
+)
+
+# Histogram bin edges, in seconds: 3 bins per decade from 10 microseconds to 1000 seconds.
+# Durations outside this range are counted in the first or last bin.
+HISTOGRAM_BIN_EDGES_SECONDS = np.logspace(-5, 3, num=8 * 3 + 1)
+
+TIMINGS_CSV_FILENAME = "timings.csv"
+TIMINGS_JSON_FILENAME = "timings.json"
+
+
+class StageTimer:
+    """
+    Record the duration of each stage, for each batch.
+
+    The timer only holds lists and dicts, so a DataSource holding a StageTimer can still be
+    pickled and sent to another process.  Appending to a list is atomic in CPython, so
+    `time_stage` can be used from the threads which load examples.
+    """
+
+    def __init__(self):
+        """Start with no records"""
+        self.reset()
+
+    def reset(self) -> None:
+        """Remove all records"""
+        self.batch_idx: Optional[int] = None
+        self.records: List[Dict] = []
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[Dict]:
+        """
+        Record how long the code inside this context takes, as one `stage` of the batch.
+
+        Yields the record, whose `seconds` are set when the context exits, e.g. for logging.
+        """
+        record = dict(batch_idx=self.batch_idx, stage=stage, seconds=None)
+        start_time = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start_time
+            self.records.append(record)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """One row per record, with columns `batch_idx`, `stage` and `seconds`"""
+        return pd.DataFrame(self.records, columns=["batch_idx", "stage", "seconds"])
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        Aggregate the records of each stage into summary statistics and a histogram.
+
+        Returns: Dict, keyed by stage, of summary statistics.  The histogram counts are for the
+            bins given by `histogram_bin_edges_seconds`.
+        """
+        summary = {}
+        timings = self.to_dataframe()
+        for stage, seconds in timings.groupby("stage", sort=False).seconds:
+            seconds = seconds.values
+            counts, bin_edges = np.histogram(
+                np.clip(seconds, HISTOGRAM_BIN_EDGES_SECONDS[0], HISTOGRAM_BIN_EDGES_SECONDS[-1]),
+                bins=HISTOGRAM_BIN_EDGES_SECONDS,
+            )
+            summary[stage] = dict(
+                count=len(seconds),
+                total_seconds=float(seconds.sum()),
+                mean_seconds=float(seconds.mean()),
+                median_seconds=float(np.median(seconds)),
+                p90_seconds=float(np.percentile(seconds, 90)),
+                max_seconds=float(seconds.max()),
+                histogram_bin_edges_seconds=bin_edges.tolist(),
+                histogram_counts=counts.tolist(),
+            )
+        return summary
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the records as a CSV file, and the summary as a JSON file, in `path`.
+
+        Args:
+            path: The folder to save to.  This can be local or in the cloud.
+        """
+        timings_csv_filename = os.path.join(path, TIMINGS_CSV_FILENAME)
+        timings_json_filename = os.path.join(path, TIMINGS_JSON_FILENAME)
+        logger.debug(f"Saving timings to {timings_csv_filename} and {timings_json_filename}")
+
+        with fsspec.open(timings_csv_filename, mode="w") as file:
+            self.to_dataframe().to_csv(file, index=False)
+
+        with fsspec.open(timings_json_filename, mode="w") as file:
+            json.dump(self.summary(), file, indent=2)
@@ -0,0 +1,111 @@
+""" A persistent thread pool for loading examples, which records how busy it is """
+import logging
+import threading
+import time
+from concurrent import futures
+from typing import Any, Callable, Iterable, List, Optional
+
+from nowcasting_dataset import profiling
+
+logger = logging.getLogger(__name__)
+
+
+class ExampleThreadPool:
+    """
+    A thread pool which is created once, and reused for every batch.
+
+    The threads are only started when the pool is first used, and the pool can be pickled (without
+    its threads), so a DataSource holding an ExampleThreadPool can still be sent to another
+    process.
+
+    Attributes:
+      max_workers: The number of threads.
+      thread_name_prefix: The threads are named `<thread_name_prefix>_<n>`, so they can be told
+        apart by profilers like py-spy.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        """Set up the pool, without starting any threads"""
+        assert max_workers > 0
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor: Optional[futures.ThreadPoolExecutor] = None
+        self.reset_utilisation()
+
+    def __getstate__(self) -> dict:
+        """Threads can't be pickled, so leave out the executor"""
+        state = self.__dict__.copy()
+        state["_executor"] = None
+        return state
+
+    def _get_executor(self) -> futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.thread_name_prefix
+            )
+        return self._executor
+
+    def map(
+        self, function: Callable, *iterables: Iterable, max_concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """
+        Like the builtin `map`, but runs `function` in the pool, and returns a list.
+
+        Args:
+            function: The function to run.
+            *iterables: The arguments of each call of `function`.
+            max_concurrency: The maximum number of calls to run at once.  Defaults to
+                `max_workers`.
+
+        Returns: The results, in the same order as the arguments.
+        """
+        max_concurrency = (
+            self.max_workers
+            if max_concurrency is None
+            else max(1, min(max_concurrency, self.max_workers))
+        )
+        executor = self._get_executor()
+        semaphore = threading.BoundedSemaphore(max_concurrency)
+
+        start_time = time.perf_counter()
+        future_results = []
+        for args in zip(*iterables):
+            semaphore.acquire()
+            future = executor.submit(self._run_and_time_it, function, *args)
+            future.add_done_callback(lambda _: semaphore.release())
+            future_results.append(future)
+        results = [future.result() for future in future_results]
+        self.wall_seconds += time.perf_counter() - start_time
+        return results
+
+    def _run_and_time_it(self, function: Callable, *args) -> Any:
+        start_time = time.perf_counter()
+        try:
+            # The threads outlive any Profiler, so they are only profiled whilst running a task.
+            with profiling.profile_task():
+                return function(*args)
+        finally:
+            # Appending to a list is atomic in CPython, so this is safe across threads.
+            self._busy_seconds.append(time.perf_counter() - start_time)
+
+    def reset_utilisation(self) -> None:
+        """Forget how busy the pool has been"""
+        self.wall_seconds = 0.0
+        self._busy_seconds: List[float] = []
+
+    def utilisation(self) -> float:
+        """
+        The fraction of the time that the threads were busy, whilst `map` was running.
+
+        Low utilisation means that the pool has more threads than it can use, for example because
+        the batch size is smaller than the pool, or because `max_concurrency` limits the pool.
+        """
+        if self.wall_seconds == 0:
+            return 0.0
+        return sum(self._busy_seconds) / (self.wall_seconds * self.max_workers)
+
+    def shutdown(self) -> None:
+        """Stop the threads.  The pool starts new threads if it is used again."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
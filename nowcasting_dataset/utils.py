@@ -67,6 +67,12 @@ def get_netcdf_filename(batch_idx: int) -> str:
     return f"{batch_idx:06d}.nc"
 
 
+def get_npy_dirname(batch_idx: int) -> str:
+    """Generate the folder name of one batch saved as `.npy` files, excluding path."""
+    assert 0 <= batch_idx < 1e6
+    return f"{batch_idx:06d}"
+
+
 # TODO: Issue #170. Is this this function still used?
 def to_numpy(value):
     """Change generic data to numpy"""
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""Writes realistic-size synthetic data stores, for load testing without access to the real data.
+
+The stores have the same layout as `tests/data`, so they can be used with
+`scripts/run_benchmarks.py --data_path`, or with a configuration whose paths point at them
+(e.g. `tests/config/test.yaml` with `tests/data` replaced), for `prepare_ml_data.py`.
+
+Please run `./generate_synthetic_data_stores.py --help` for full details!
+"""
+import logging
+
+import click
+import pandas as pd
+
+from nowcasting_dataset.consts import LOG_LEVELS
+from nowcasting_dataset.data_sources.fake import create_synthetic_data_stores
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_chunks(chunks: str):
+    """Parse chunks like "time=1,x=548,y=298,variable=1" into a dict"""
+    if chunks is None:
+        return None
+    return {dim: int(size) for dim, size in (item.split("=") for item in chunks.split(","))}
+
+
+@click.command()
+@click.option("--path", required=True, help="The folder to write the data stores to.")
+@click.option("--start_dt", default="2020-04-01", help="The start of the data.")
+@click.option("--end_dt", default="2020-04-08", help="The end of the data.")
+@click.option("--n_pv_systems", default=10_000, help="The number of PV systems.")
+@click.option("--n_gsp", default=338, help="The number of GSPs, at most 338.")
+@click.option(
+    "--satellite_chunks",
+    default=None,
+    help='The Zarr chunks of the satellite data, e.g. "time=1,x=548,y=298,variable=1".',
+)
+@click.option("--hrvsatellite_chunks", default=None, help="The Zarr chunks of the HRV data.")
+@click.option(
+    "--nwp_chunks",
+    default=None,
+    help='The Zarr chunks of the NWP data, e.g. "variable=1,init_time=1,step=1,y=352,x=274".',
+)
+@click.option(
+    "--gap_fraction",
+    default=0.0,
+    help="The fraction of satellite, PV and GSP timesteps which are missing.",
+)
+@click.option("--gap_length", default=12, help="The number of consecutive timesteps in each gap.")
+@click.option(
+    "--nan_fraction", default=0.0, help="The fraction of NWP, PV and GSP values which are NaN."
+)
+@click.option("--seed", default=1234, help="The seed for the random number generator.")
+@click.option(
+    "--log_level",
+    default="INFO",
+    type=click.Choice(LOG_LEVELS),
+    help="The log level represented as a string.  Defaults to INFO.",
+)
+def main(
+    path,
+    start_dt,
+    end_dt,
+    n_pv_systems,
+    n_gsp,
+    satellite_chunks,
+    hrvsatellite_chunks,
+    nwp_chunks,
+    gap_fraction,
+    gap_length,
+    nan_fraction,
+    seed,
+    log_level,
+):
+    """Write the synthetic data stores"""
+    logging.basicConfig(level=getattr(logging, log_level))
+
+    paths = create_synthetic_data_stores(
+        path=path,
+        start_dt=pd.Timestamp(start_dt),
+        end_dt=pd.Timestamp(end_dt),
+        n_pv_systems=n_pv_systems,
+        n_gsp=n_gsp,
+        satellite_chunks=_parse_chunks(satellite_chunks),
+        hrvsatellite_chunks=_parse_chunks(hrvsatellite_chunks),
+        nwp_chunks=_parse_chunks(nwp_chunks),
+        gap_fraction=gap_fraction,
+        gap_length=gap_length,
+        nan_fraction=nan_fraction,
+        seed=seed,
+    )
+    for name, store_path in paths.items():
+        logger.info(f"Wrote {name} to {store_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,13 @@
 Please run `./prepare_ml_data.py --help` for full details!
 """
 import logging
+from pathlib import Path
 
 import click
 from pathy import Pathy
 
 import nowcasting_dataset
-from nowcasting_dataset import utils
+from nowcasting_dataset import profiling, utils
 from nowcasting_dataset.consts import LOG_LEVELS
 from nowcasting_dataset.data_sources import ALL_DATA_SOURCE_NAMES
 from nowcasting_dataset.manager import Manager
@@ -58,10 +59,51 @@ default_config_filename = Pathy(nowcasting_dataset.__file__).parent / "config" /
     type=click.Choice(LOG_LEVELS),
     help=("The log level represented as a string.  Defaults to DEBUG."),
 )
+@click.option(
+    "--profile",
+    default=None,
+    help=(
+        "Profile the run, and save the profiles to this local folder.  There is one profile for"
+        " the main process, and one for each worker (i.e. each split and DataSource).  These are"
+        " merged into merged.prof, which can be viewed with e.g. `snakeviz` or `pstats`."
+    ),
+)
 @utils.arg_logger
-def main(config_filename: str, data_source: list[str], overwrite_batches: bool, log_level=str):
+def main(
+    config_filename: str,
+    data_source: list[str],
+    overwrite_batches: bool,
+    log_level=str,
+    profile: str = None,
+):
     """Generate pre-prepared batches of data."""
+    if profile is None:
+        prepare_ml_data(config_filename, data_source, overwrite_batches, log_level)
+    else:
+        profile_path = Path(profile)
+        profiling.run_and_profile(
+            prepare_ml_data,
+            profile_path / f"main{profiling.PROFILE_SUFFIX}",
+            config_filename,
+            data_source,
+            overwrite_batches,
+            log_level,
+            profile_path=profile_path,
+        )
+        stats = profiling.merge_profiles_in_folder(profile_path)
+        stats.sort_stats("cumulative").print_stats(30)
+
+
+def prepare_ml_data(
+    config_filename: str,
+    data_source: list[str],
+    overwrite_batches: bool,
+    log_level: str,
+    profile_path: Path = None,
+):
+    """Generate pre-prepared batches of data, optionally profiling each worker."""
     manager = Manager()
+    manager.profile_path = profile_path
     manager.load_yaml_configuration(config_filename)
     manager.configure_loggers(log_level=log_level, names_of_selected_data_sources=data_source)
     manager.initialise_data_sources(names_of_selected_data_sources=data_source)
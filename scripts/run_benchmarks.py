@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""Runs the offline benchmarks, and optionally compares them with earlier results.
+
+Please run `./run_benchmarks.py --help` for full details!
+"""
+import logging
+import sys
+
+import click
+
+from nowcasting_dataset.benchmarks.cases import BENCHMARK_CASES
+from nowcasting_dataset.benchmarks.run import (
+    DEFAULT_DATA_PATH,
+    compare_results,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+from nowcasting_dataset.consts import LOG_LEVELS
+
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "--benchmark",
+    multiple=True,
+    default=tuple(BENCHMARK_CASES.keys()),
+    type=click.Choice(tuple(BENCHMARK_CASES.keys())),
+    help="The benchmark cases to run.  Use --benchmark multiple times to run several cases.",
+)
+@click.option(
+    "--data_path",
+    default=str(DEFAULT_DATA_PATH),
+    help="The folder of input data, with the same layout as tests/data.",
+)
+@click.option("--batch_size", default=4, help="The number of examples in each batch.")
+@click.option("--repeat", default=5, help="The number of times each case is timed.")
+@click.option(
+    "--output_filename",
+    default="benchmark_results.json",
+    help="The json file to save the results to.",
+)
+@click.option(
+    "--baseline_filename",
+    default=None,
+    help="Optional json file of earlier results.  Exits with code 1 if any case has regressed.",
+)
+@click.option(
+    "--threshold",
+    default=1.2,
+    help="A case has regressed if it takes more than this many times the baseline.",
+)
+@click.option(
+    "--log_level",
+    default="INFO",
+    type=click.Choice(LOG_LEVELS),
+    help="The log level represented as a string.  Defaults to INFO.",
+)
+def main(
+    benchmark,
+    data_path,
+    batch_size,
+    repeat,
+    output_filename,
+    baseline_filename,
+    threshold,
+    log_level,
+):
+    """Run the benchmarks, and save the results as json"""
+    logging.basicConfig(level=getattr(logging, log_level))
+
+    results = run_benchmarks(
+        names=benchmark, data_path=data_path, batch_size=batch_size, repeat=repeat
+    )
+    save_results(results, output_filename)
+    logger.info(f"Saved benchmark results to {output_filename}")
+
+    if baseline_filename is not None:
+        regressions = compare_results(
+            baseline=load_results(baseline_filename), current=results, threshold=threshold
+        )
+        for regression in regressions:
+            logger.error(
+                f"{regression['name']} has regressed: {regression['current_seconds']:.4f}s now,"
+                f" {regression['baseline_seconds']:.4f}s before ({regression['ratio']:.2f}x)"
+            )
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
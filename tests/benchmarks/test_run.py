@@ -0,0 +1,63 @@
+"""Test the benchmarks."""
+import os
+import tempfile
+
+import pytest
+
+from nowcasting_dataset.benchmarks.cases import BENCHMARK_CASES
+from nowcasting_dataset.benchmarks.run import (
+    compare_results,
+    load_results,
+    run_benchmarks,
+    save_results,
+)
+
+
+@pytest.mark.parametrize("name", BENCHMARK_CASES.keys())
+def test_run_benchmark(name):  # noqa: D103
+    results = run_benchmarks(names=[name], batch_size=2, repeat=1)
+
+    assert len(results["results"]) == 1
+    result = results["results"][0]
+    assert result["name"] == name
+    if result["status"] == "ok":
+        assert 0 < result["min_seconds"] <= result["max_seconds"]
+    else:
+        assert result["status"] == "skipped"
+        assert "does not exist" in result["reason"]
+
+
+def test_skip_benchmark_with_missing_data():  # noqa: D103
+    with tempfile.TemporaryDirectory() as data_path:
+        results = run_benchmarks(names=["satellite_get_batch"], data_path=data_path, repeat=1)
+
+    assert results["results"][0]["status"] == "skipped"
+
+
+def test_save_and_compare_results():  # noqa: D103
+    baseline = run_benchmarks(names=["time_get_contiguous_time_periods"], repeat=1)
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        filename = os.path.join(dirpath, "results.json")
+        save_results(baseline, filename)
+        assert load_results(filename) == baseline
+
+    assert compare_results(baseline, baseline) == []
+
+    current = load_results_with_min_seconds(baseline, factor=2)
+    regressions = compare_results(baseline, current, threshold=1.5)
+    assert [regression["name"] for regression in regressions] == [
+        "time_get_contiguous_time_periods"
+    ]
+    assert regressions[0]["ratio"] == pytest.approx(2)
+
+
+def load_results_with_min_seconds(results, factor):
+    """Copy `results`, with the fastest call of each case `factor` times slower"""
+    return dict(
+        settings=results["settings"],
+        results=[
+            dict(result, min_seconds=result["min_seconds"] * factor)
+            for result in results["results"]
+        ],
+    )
@@ -2,10 +2,16 @@
 import os
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
+import pytest
+import xarray as xr
 
 import nowcasting_dataset
-from nowcasting_dataset.data_sources.gsp.gsp_data_source import GSPDataSource
+from nowcasting_dataset.data_sources.gsp.gsp_data_source import (
+    GSPDataSource,
+    load_solar_gsp_data,
+)
 from nowcasting_dataset.geospatial import osgb_to_lat_lon
 
 
@@ -111,3 +117,86 @@ def test_gsp_pv_data_source_get_batch():
     assert len(batch.x_coords[1]) == len(batch.y_coords[1])
     assert len(batch.x_coords[2]) > 0
     # assert T0_DT in batch[3].keys()
+
+
+def test_gsp_pv_data_source_get_batch_with_object_ids():
+    """Test that the GSP ids from get_locations_and_object_ids are used without a lookup"""
+    local_path = os.path.dirname(nowcasting_dataset.__file__) + "/.."
+
+    gsp = GSPDataSource(
+        zarr_path=f"{local_path}/tests/data/gsp/test.zarr",
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+
+    batch_size = 10
+    t0_datetimes = gsp.gsp_power.index[batch_size : 2 * batch_size]
+    x_locations, y_locations, gsp_ids = gsp.get_locations_and_object_ids(t0_datetimes)
+    assert len(gsp_ids) == batch_size
+
+    batch = gsp.get_batch(t0_datetimes, x_locations, y_locations, object_ids=gsp_ids)
+    expected = gsp.get_batch(t0_datetimes, x_locations, y_locations)
+    assert (batch.id[:, 0].values == gsp_ids).all()
+    np.testing.assert_array_equal(batch.id.values, expected.id.values)
+    np.testing.assert_array_equal(batch.power_mw.values, expected.power_mw.values)
+
+    # Without the ids, there must be a GSP at exactly each location.
+    x_locations = [x + 100 for x in x_locations]
+    batch = gsp.get_batch(t0_datetimes, x_locations, y_locations, object_ids=gsp_ids)
+    assert (batch.id[:, 0].values == gsp_ids).all()
+    with pytest.raises(NotImplementedError):
+        gsp.get_batch(t0_datetimes, x_locations, y_locations)
+
+
+def test_load_solar_gsp_data():
+    """Test that the GSP data is loaded as float32, clipped, without GSPs with no data"""
+    zarr_path = os.path.dirname(nowcasting_dataset.__file__) + "/../tests/data/gsp/test.zarr"
+    start_dt, end_dt = datetime(2020, 4, 1, 6), datetime(2020, 4, 1, 18)
+
+    gsp_power, gsp_capacity = load_solar_gsp_data(zarr_path, start_dt=start_dt, end_dt=end_dt)
+
+    gsp_data = xr.open_dataset(zarr_path, engine="zarr").sel(datetime_gmt=slice(start_dt, end_dt))
+    has_data = gsp_data["generation_mw"].to_pandas().sort_index(axis="columns").notnull().any()
+    for df, name in ((gsp_power, "generation_mw"), (gsp_capacity, "installedcapacity_mwp")):
+        expected = gsp_data[name].to_pandas().sort_index(axis="columns").clip(lower=0, upper=5e7)
+        expected = expected.loc[:, has_data]
+        expected.columns = expected.columns.astype(int)
+        assert df.dtypes.eq(np.float32).all()
+        pd.testing.assert_frame_equal(df, expected.astype(np.float32), check_names=False)
+    assert len(gsp_power.columns) < len(gsp_data.gsp_id)
+
+
+def test_gsp_data_source_get_time_slice():
+    """Test that the time slice has the GSPs with data at every datetime of the example"""
+    local_path = os.path.dirname(nowcasting_dataset.__file__) + "/.."
+
+    gsp = GSPDataSource(
+        zarr_path=f"{local_path}/tests/data/gsp/test.zarr",
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=60,
+        forecast_minutes=120,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+    gsp.gsp_power.iloc[10, 3] = np.nan
+    gsp.gsp_capacity.iloc[20, 5] = np.nan
+    gsp._gsp_has_data = gsp.gsp_power.notna().values & gsp.gsp_capacity.notna().values
+
+    for t0_dt in gsp.gsp_power.index[2:-4] + pd.Timedelta("15T"):
+        datetimes, power, capacity, gsp_has_data = gsp._get_time_slice(t0_dt)
+
+        start_dt = (t0_dt - pd.Timedelta("60T")).floor("30T")
+        end_dt = t0_dt + pd.Timedelta("120T")
+        expected_power = gsp.gsp_power.loc[start_dt:end_dt]
+        expected_capacity = gsp.gsp_capacity.loc[start_dt:end_dt]
+        pd.testing.assert_index_equal(datetimes, expected_power.index)
+        np.testing.assert_array_equal(power, expected_power.values)
+        np.testing.assert_array_equal(capacity, expected_capacity.values)
+        expected_gsp_has_data = expected_power.notna().all() & expected_capacity.notna().all()
+        np.testing.assert_array_equal(gsp_has_data, expected_gsp_has_data.values)
+        assert len(datetimes) == 7
@@ -0,0 +1,102 @@
+"""Test the cached combined metadata of satellite Zarr stores."""
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+import nowcasting_dataset.data_sources.satellite.satellite_data_source as satellite_data_source
+from nowcasting_dataset.data_sources import SatelliteDataSource
+from nowcasting_dataset.data_sources.fake import create_synthetic_satellite_zarr
+from nowcasting_dataset.data_sources.satellite.satellite_data_source import open_sat_data
+from nowcasting_dataset.data_sources.satellite.satellite_metadata import (
+    SatelliteZarrMetadata,
+    compute_metadata,
+    list_stores,
+)
+
+
+@pytest.fixture
+def monthly_zarr_path(tmp_path):
+    """Two Zarr stores, where the second store repeats the last 3 times of the first store"""
+    for i, (start_dt, end_dt) in enumerate(
+        [("2020-04-01 10:00", "2020-04-01 11:00"), ("2020-04-01 10:50", "2020-04-01 12:00")]
+    ):
+        create_synthetic_satellite_zarr(
+            tmp_path / f"sat_{i}.zarr",
+            datetimes=pd.date_range(start_dt, end_dt, freq="5T"),
+            n_x=160,
+            n_y=140,
+            chunks=dict(time=1, x=40, y=70, variable=1),
+            rng=np.random.default_rng(i),
+        )
+    return str(tmp_path / "sat_*.zarr")
+
+
+def test_metadata_to_and_from_bytes(monthly_zarr_path):  # noqa: D103
+    _, stores = zip(*list_stores(monthly_zarr_path))
+    metadata = compute_metadata(stores, consolidated=True)
+    loaded_metadata = SatelliteZarrMetadata.from_bytes(metadata.to_bytes())
+    for positions, loaded_positions in zip(metadata.time_positions, loaded_metadata.time_positions):
+        np.testing.assert_array_equal(positions, loaded_positions)
+    for name, values in metadata.coords.items():
+        np.testing.assert_array_equal(values, loaded_metadata.coords[name])
+    assert loaded_metadata.coord_attrs == metadata.coord_attrs
+
+
+def test_open_sat_data_drops_duplicated_times(monthly_zarr_path):  # noqa: D103
+    data_array = open_sat_data(monthly_zarr_path, consolidated=True)
+    times = pd.DatetimeIndex(data_array.time.values)
+    pd.testing.assert_index_equal(
+        times, pd.date_range("2020-04-01 10:00", "2020-04-01 12:00", freq="5T"), check_names=False
+    )
+    assert (np.diff(data_array.x.values) > 0).all()
+
+    # The data is the same as opening the stores one at a time.
+    expected = xr.open_dataset(
+        monthly_zarr_path.replace("*", "1"), engine="zarr", chunks="auto"
+    ).stacked_eumetsat_data
+    expected = expected.isel(time=slice(3, None), x=slice(None, None, -1))
+    xr.testing.assert_equal(
+        data_array.sel(time=expected.time), expected.drop_vars("acq_time", errors="ignore")
+    )
+
+
+def test_satellite_data_source_metadata_is_cached(
+    monthly_zarr_path, tmp_path, monkeypatch
+):  # noqa: D103
+    kwargs = dict(
+        zarr_path=monthly_zarr_path,
+        history_minutes=30,
+        forecast_minutes=30,
+        image_size_pixels=16,
+        meters_per_pixel=2000,
+        channels=("IR_016",),
+        disk_cache_dir=str(tmp_path / "cache"),
+    )
+    data_source = SatelliteDataSource(**kwargs)
+    datetimes = data_source.datetime_index(remove_night=False)
+    assert len(datetimes) == 25
+    data_source.open()
+
+    # x is right-to-left, as in the Zarr stores, but the examples are left-to-right.
+    assert (np.diff(data_source.data.x.values) < 0).all()
+    x_locations = np.sort(data_source.data.x.values)[[40, 100]]
+    y_locations = data_source.data.y.values[[40, 100]]
+    t0_datetimes = pd.DatetimeIndex([datetimes[12]] * 2)
+    batch = data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    assert (np.diff(batch.x.values, axis=1) > 0).all()
+
+    expected = open_sat_data(monthly_zarr_path, consolidated=True)
+    example = expected.sel(time=slice(datetimes[6], datetimes[18])).isel(
+        x=slice(40 - 1 - 8, 40 - 1 + 8), y=slice(40 - 1 - 8, 40 - 1 + 8)
+    )
+    np.testing.assert_array_equal(batch.data.values[0], example.values)
+
+    # A new data source, e.g. in the next run, loads the metadata from the disk cache.
+    def compute_metadata_is_not_called(*args, **kwargs):
+        raise AssertionError("compute_metadata was called")
+
+    monkeypatch.setattr(satellite_data_source, "compute_metadata", compute_metadata_is_not_called)
+    data_source = SatelliteDataSource(**kwargs)
+    data_source.open()
+    pd.testing.assert_index_equal(data_source.datetime_index(remove_night=False), datetimes)
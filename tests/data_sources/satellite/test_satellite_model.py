@@ -23,6 +23,16 @@ def test_satellite_validation():  # noqa: D103
         Satellite.model_validation(sat)
 
 
+def test_satellite_validation_single_pass():  # noqa: D103
+    sat = satellite_fake()
+
+    Satellite.model_validation_single_pass(sat)
+
+    sat.data[0, 0] = np.nan
+    with pytest.raises(Exception):
+        Satellite.model_validation_single_pass(sat)
+
+
 def test_satellite_save():  # noqa: D103
 
     with tempfile.TemporaryDirectory() as dirpath:
@@ -2,12 +2,16 @@ import tempfile
 
 import numpy as np
 import pandas as pd
+import xarray as xr
 
 from nowcasting_dataset.data_sources.sun.raw_data_load_save import (
+    calculate_and_save_to_zarr,
     get_azimuth_and_elevation,
     load_from_zarr,
     save_to_zarr,
+    x_y_to_name,
 )
+from nowcasting_dataset.geospatial import calculate_azimuth_and_elevation_angle, osgb_to_lat_lon
 
 
 def test_calculate_azimuth_and_elevation():
@@ -55,3 +59,53 @@ def test_load(test_data_folder):
 
     assert type(azimuth) == pd.DataFrame
     assert type(elevation) == pd.DataFrame
+
+
+def test_get_azimuth_and_elevation_is_the_same_as_pvlib():  # noqa: D103
+    datestamps = pd.date_range("2019-06-01", "2019-06-03", freq="5 min", tz="UTC")
+    x_centers = [200_000, 450_000, 450_000]
+    y_centers = [100_000, 900_000, 900_000]
+
+    azimuth, elevation = get_azimuth_and_elevation(
+        datestamps=datestamps, x_centers=x_centers, y_centers=y_centers, n_datestamps_per_chunk=100
+    )
+
+    # Duplicated locations are dropped.
+    assert list(azimuth.columns) == ["200000,100000", "450000,900000"]
+    assert azimuth.index.tz is None
+    for x, y in zip(x_centers[:2], y_centers[:2]):
+        latitude, longitude = osgb_to_lat_lon(x=x, y=y)
+        expected = calculate_azimuth_and_elevation_angle(
+            latitude=latitude, longitude=longitude, datestamps=datestamps
+        ).round(2)
+        name = x_y_to_name(x, y)
+        np.testing.assert_array_equal(azimuth[name].values, expected["azimuth"].values)
+        np.testing.assert_array_equal(elevation[name].values, expected["elevation"].values)
+
+
+def test_calculate_and_save_to_zarr(tmp_path):  # noqa: D103
+    datestamps = pd.date_range("2019-01-01", "2019-01-02", freq="5 min")
+    rng = np.random.default_rng(1234)
+    x_centers = rng.uniform(100_000, 600_000, size=50)
+    y_centers = rng.uniform(100_000, 1_000_000, size=50)
+
+    azimuth, elevation = get_azimuth_and_elevation(
+        datestamps=datestamps, x_centers=x_centers, y_centers=y_centers
+    )
+    save_to_zarr(
+        azimuth=azimuth.astype(int), elevation=elevation.astype(int), zarr_path=tmp_path / "a.zarr"
+    )
+    calculate_and_save_to_zarr(
+        datestamps=datestamps,
+        x_centers=x_centers,
+        y_centers=y_centers,
+        zarr_path=tmp_path / "b.zarr",
+        dtype=int,
+        n_processes=2,
+        n_datestamps_per_chunk=100,
+    )
+
+    xr.testing.assert_identical(
+        xr.open_dataset(tmp_path / "a.zarr", engine="zarr"),
+        xr.open_dataset(tmp_path / "b.zarr", engine="zarr"),
+    )
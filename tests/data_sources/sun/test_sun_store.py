@@ -0,0 +1,41 @@
+"""Test the compact store of sun angles."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nowcasting_dataset.data_sources.sun.raw_data_load_save import load_from_zarr
+from nowcasting_dataset.data_sources.sun.sun_store import SunStore
+
+
+def test_sun_store_is_the_same_as_load_from_zarr(test_data_folder):  # noqa: D103
+    zarr_path = test_data_folder + "/sun/test.zarr"
+    azimuth, elevation = load_from_zarr(zarr_path=zarr_path)
+    sun_store = SunStore.from_zarr(zarr_path)
+
+    assert sun_store.nbytes < (azimuth.values.nbytes + elevation.values.nbytes) / 3
+    start_dt = pd.Timestamp("2019-04-01 11:30")
+    end_dt = pd.Timestamp("2019-04-01 13:00")
+    for name in azimuth.columns[::500]:
+        x, y = [float(coordinate) for coordinate in name.split(",")]
+        angles = sun_store.get_angles(start_dt=start_dt, end_dt=end_dt, x=x, y=y)
+        np.testing.assert_array_equal(angles.time, azimuth.loc[start_dt:end_dt].index)
+        np.testing.assert_array_equal(angles.azimuth, azimuth.loc[start_dt:end_dt, name])
+        np.testing.assert_array_equal(angles.elevation, elevation.loc[start_dt:end_dt, name])
+
+
+def test_sun_store_location_index():  # noqa: D103
+    n_times = 3
+    sun_store = SunStore(
+        times=pd.date_range("2019-01-01", periods=n_times, freq="5T"),
+        x=np.array([1000.4, 2000.5, 3000.0]),
+        y=np.array([500.0, 600.0, 700.0]),
+        azimuth=np.zeros((n_times, 3), dtype=np.uint16),
+        elevation=np.zeros((n_times, 3), dtype=np.int16),
+    )
+    assert sun_store.location_index(1000.4, 500.0) == 0
+    assert sun_store.location_index(1000.4000001, 500.0) == 0
+    # Close to the location, but rounds to a different meter.
+    assert sun_store.location_index(2000.49, 600.0) == 1
+    assert sun_store.location_index(3000.0, 700.0) == 2
+    with pytest.raises(KeyError):
+        sun_store.location_index(4000.0, 700.0)
@@ -1,4 +1,8 @@
 """ Tests for data_sources """
+import numpy as np
+import pytest
+
+from nowcasting_dataset.data_sources.datasource_output import SINGLE_PASS_BLOCK_SIZE
 from nowcasting_dataset.data_sources.fake import (
     gsp_fake,
     nwp_fake,
@@ -54,3 +58,28 @@ def test_topo():
         batch_size=4,
         image_size_pixels=64,
     )
+
+
+@pytest.mark.parametrize("bad_value", [np.nan, np.inf, -np.inf, -1, 361])
+def test_check_data_single_pass(bad_value):
+    """Test single pass validation finds the same errors as the separate checks"""
+    sun = sun_fake(batch_size=4, seq_length_5=13)
+    sun.check_data_single_pass(data=sun.azimuth, min_value=0, max_value=360)
+
+    sun.azimuth[2, 3] = bad_value
+    with pytest.raises(Exception):
+        sun.check_data_single_pass(data=sun.azimuth, min_value=0, max_value=360)
+
+
+def test_check_data_single_pass_not_equal():
+    """Test single pass validation finds values equal to `not_equal_value` in any block"""
+    sat = satellite_fake(batch_size=4, seq_length_5=13, satellite_image_size_pixels=64)
+    assert sat.data.size > SINGLE_PASS_BLOCK_SIZE
+    sat.check_data_single_pass(data=sat.data, not_equal_value=-1)
+
+    sat.data.values.reshape(-1)[-1] = -1
+    with pytest.raises(Exception):
+        sat.check_data_single_pass(data=sat.data, not_equal_value=-1)
+
+    # Only log a warning if raise_error_if_equal is False
+    sat.check_data_single_pass(data=sat.data, not_equal_value=-1, raise_error_if_equal=False)
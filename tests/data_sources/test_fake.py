@@ -0,0 +1,172 @@
+"""Test the synthetic data stores, by loading them with the data sources."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nowcasting_dataset.data_sources import (
+    GSPDataSource,
+    NWPDataSource,
+    PVDataSource,
+    SatelliteDataSource,
+    SunDataSource,
+)
+from nowcasting_dataset.data_sources.fake import (
+    create_synthetic_gsp_zarr,
+    create_synthetic_nwp_zarr,
+    create_synthetic_pv_metadata,
+    create_synthetic_pv_netcdf,
+    create_synthetic_satellite_zarr,
+    create_synthetic_sun_zarr,
+    datetimes_with_gaps,
+)
+from nowcasting_dataset.time import time_periods_to_datetime_index
+
+START_DT = pd.Timestamp("2020-04-01 10:00")
+END_DT = pd.Timestamp("2020-04-01 14:00")
+
+
+@pytest.fixture
+def rng():  # noqa: D103
+    return np.random.default_rng(1234)
+
+
+def test_datetimes_with_gaps(rng):  # noqa: D103
+    datetimes = datetimes_with_gaps(
+        START_DT, END_DT, freq="5T", gap_fraction=0.5, gap_length=6, rng=rng
+    )
+    all_datetimes = pd.date_range(START_DT, END_DT, freq="5T")
+    assert 0 < len(datetimes) < len(all_datetimes)
+    assert datetimes.isin(all_datetimes).all()
+
+
+def test_synthetic_satellite(tmp_path, rng):  # noqa: D103
+    zarr_path = tmp_path / "sat_data.zarr"
+    create_synthetic_satellite_zarr(
+        zarr_path,
+        datetimes=pd.date_range(START_DT, END_DT, freq="5T"),
+        n_x=160,
+        n_y=140,
+        chunks=dict(time=1, x=80, y=140, variable=1),
+        rng=rng,
+    )
+
+    data_source = SatelliteDataSource(
+        zarr_path=zarr_path,
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=16,
+        meters_per_pixel=2000,
+        channels=("IR_016",),
+    )
+    data_source.open()
+    assert data_source.data.shape == (49, 160, 140, 1)
+
+    t0_datetimes = time_periods_to_datetime_index(
+        data_source.get_contiguous_t0_time_periods(), freq="5T"
+    )
+    x, y = float(data_source.data.x.mean()), float(data_source.data.y.mean())
+    example = data_source.get_example(t0_datetimes[0], x, y)
+    assert example.data.shape == (19, 16, 16, 1)
+
+
+def test_synthetic_nwp(tmp_path, rng):  # noqa: D103
+    zarr_path = tmp_path / "nwp.zarr"
+    create_synthetic_nwp_zarr(
+        zarr_path,
+        init_times=pd.date_range(START_DT, END_DT, freq="3H"),
+        channels=["t", "dswrf"],
+        n_steps=5,
+        n_x=16,
+        n_y=16,
+        nan_fraction=0.1,
+        chunks=dict(variable=1, init_time=1, step=1, y=8, x=8),
+        rng=rng,
+    )
+
+    data_source = NWPDataSource(
+        zarr_path=zarr_path,
+        history_minutes=60,
+        forecast_minutes=60,
+        image_size_pixels=2,
+        meters_per_pixel=2000,
+        channels=["t"],
+    )
+    data_source.open()
+    t0_datetimes = time_periods_to_datetime_index(
+        data_source.get_contiguous_t0_time_periods(), freq="5T"
+    )
+    x, y = float(data_source.data.x.mean()), float(data_source.data.y.mean())
+    example = data_source.get_example(t0_datetimes[0], x, y)
+    assert example.data.shape == (1, 3, 2, 2)
+    assert example.data.dtype == np.float32
+
+
+def test_synthetic_pv_gsp_and_sun(tmp_path, rng):  # noqa: D103
+    # PV
+    pv_metadata_filename = tmp_path / "pv_metadata" / "UK_PV_metadata.csv"
+    pv_filename = tmp_path / "pv_data" / "test.nc"
+    pv_metadata = create_synthetic_pv_metadata(pv_metadata_filename, n_pv_systems=50, rng=rng)
+    create_synthetic_pv_netcdf(
+        pv_filename,
+        datetimes=pd.date_range(START_DT, END_DT, freq="5T"),
+        pv_metadata=pv_metadata,
+        nan_fraction=0.01,
+        n_pv_systems_per_write=20,
+        rng=rng,
+    )
+
+    pv_data_source = PVDataSource(
+        filename=str(pv_filename),
+        metadata_filename=str(pv_metadata_filename),
+        start_dt=START_DT,
+        end_dt=END_DT,
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        load_azimuth_and_elevation=False,
+        load_from_gcs=False,
+    )
+    assert pv_data_source.pv_power.shape[1] == 50
+    t0_datetimes = pv_data_source.pv_power.index[6:8]
+    x_locations, y_locations = pv_data_source.get_locations(t0_datetimes)
+    batch = pv_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    assert batch.power_mw.shape == (2, 19, 128)
+
+    # GSP
+    gsp_zarr_path = tmp_path / "gsp" / "test.zarr"
+    create_synthetic_gsp_zarr(
+        gsp_zarr_path,
+        datetimes=pd.date_range(START_DT, END_DT, freq="30T"),
+        n_gsp=20,
+        nan_fraction=0.01,
+        rng=rng,
+    )
+    gsp_data_source = GSPDataSource(
+        zarr_path=gsp_zarr_path,
+        start_dt=START_DT,
+        end_dt=END_DT,
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+    gsp_data_source.open()
+    assert gsp_data_source.gsp_power.shape == (9, 20)
+
+    # Sun, at the location of the PV systems
+    sun_zarr_path = tmp_path / "sun" / "test.zarr"
+    create_synthetic_sun_zarr(
+        sun_zarr_path,
+        datetimes=pd.date_range(START_DT, END_DT, freq="5T"),
+        x_osgb=x_locations,
+        y_osgb=y_locations,
+    )
+    sun_data_source = SunDataSource(
+        zarr_path=sun_zarr_path, history_minutes=30, forecast_minutes=60
+    )
+    example = sun_data_source.get_example(t0_datetimes[0], x_locations[0], y_locations[0])
+    assert example.elevation.shape == (19,)
+    # Around midday in April, the sun is high in the sky, to the south.
+    assert (example.elevation > 20).all()
+    assert (example.azimuth > 90).all() and (example.azimuth < 270).all()
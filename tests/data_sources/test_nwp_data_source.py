@@ -1,10 +1,17 @@
 # noqa: D100
+import multiprocessing
 import os
+import pickle
+import tempfile
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pytest
 
 import nowcasting_dataset
 from nowcasting_dataset.data_sources.nwp.nwp_data_source import NWPDataSource
+from nowcasting_dataset.dataset.xr_utils import ValidationLevel
 
 PATH = os.path.dirname(nowcasting_dataset.__file__)
 
@@ -54,6 +61,30 @@ def test_nwp_data_source_batch():  # noqa: D103
     assert batch.data.shape == (4, 1, 3, 2, 2)
 
 
+@pytest.mark.parametrize("validation_level", list(ValidationLevel))
+def test_nwp_data_source_batch_validation_level(validation_level):  # noqa: D103
+    nwp = NWPDataSource(
+        zarr_path=NWP_ZARR_PATH,
+        history_minutes=60,
+        forecast_minutes=60,
+        channels=["t"],
+    )
+
+    nwp.open()
+
+    t0_datetimes = [pd.Timestamp(t) for t in nwp._data.init_time[2:6].values]
+    x = nwp._data.x[0:4].values
+    y = nwp._data.y[0:4].values
+
+    batch = nwp.get_batch(
+        t0_datetimes=t0_datetimes,
+        x_locations=x,
+        y_locations=y,
+        validation_level=validation_level,
+    )
+    assert batch.data.shape == (4, 1, 3, 2, 2)
+
+
 def test_nwp_data_source_batch_not_on_hour():  # noqa: D103
     nwp = NWPDataSource(
         zarr_path=NWP_ZARR_PATH,
@@ -105,3 +136,135 @@ def test_nwp_get_contiguous_t0_time_periods():  # noqa: D103
         [{"start_dt": pd.Timestamp("2020-04-01 01:00"), "end_dt": pd.Timestamp("2020-04-02 03:00")}]
     )
     pd.testing.assert_frame_equal(contiguous_time_periods, correct_time_periods)
+
+
+def test_nwp_data_source_create_batches_saves_timings():  # noqa: D103
+    nwp = NWPDataSource(
+        zarr_path=NWP_ZARR_PATH,
+        history_minutes=60,
+        forecast_minutes=60,
+        channels=["t"],
+    )
+    nwp.open()
+
+    locations = pd.DataFrame(
+        dict(
+            t0_datetime_UTC=pd.to_datetime(nwp._data.init_time[2:6].values),
+            x_center_OSGB=nwp._data.x[0:4].values,
+            y_center_OSGB=nwp._data.y[0:4].values,
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as dst_path:
+        nwp.create_batches(
+            spatial_and_temporal_locations_of_each_example=locations,
+            idx_of_first_batch=0,
+            batch_size=2,
+            dst_path=Path(dst_path),
+            local_temp_path=None,
+            upload_every_n_batches=0,
+        )
+
+        assert os.path.exists(os.path.join(dst_path, "000001.nc"))
+        timings = pd.read_csv(os.path.join(dst_path, "timings.csv"))
+
+    assert set(timings.stage) >= {"open", "get_example", "time_slice", "load", "serialization"}
+    assert np.array_equal(timings.loc[timings.stage == "serialization", "batch_idx"], [0, 1])
+
+
+def test_nwp_data_source_create_batches_with_memory_budget():  # noqa: D103
+    nwp = NWPDataSource(
+        zarr_path=NWP_ZARR_PATH,
+        history_minutes=60,
+        forecast_minutes=60,
+        channels=["t"],
+    )
+    nwp.open()
+
+    locations = pd.DataFrame(
+        dict(
+            t0_datetime_UTC=pd.to_datetime(nwp._data.init_time[2:6].values),
+            x_center_OSGB=nwp._data.x[0:4].values,
+            y_center_OSGB=nwp._data.y[0:4].values,
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as dst_path:
+        nwp.create_batches(
+            spatial_and_temporal_locations_of_each_example=locations,
+            idx_of_first_batch=0,
+            batch_size=2,
+            dst_path=Path(dst_path),
+            local_temp_path=None,
+            upload_every_n_batches=0,
+            memory_budget_mb=1e6,
+            trace_memory_allocations=True,
+        )
+
+        assert os.path.exists(os.path.join(dst_path, "000001.nc"))
+        memory = pd.read_csv(os.path.join(dst_path, "memory.csv"))
+
+    assert memory.batch_idx.to_list() == [0, 1]
+    assert (memory.rss_after_mb > 0).all()
+    assert (memory.tracemalloc_peak_mb > 0).all()
+
+
+def test_nwp_data_source_example_thread_pool():  # noqa: D103
+    nwp = NWPDataSource(
+        zarr_path=NWP_ZARR_PATH,
+        history_minutes=60,
+        forecast_minutes=60,
+        channels=["t"],
+    )
+    assert nwp.n_example_threads == NWPDataSource.default_n_example_threads
+    nwp.n_example_threads = 2
+    nwp.open()
+
+    t0_datetimes = pd.to_datetime(nwp._data.init_time[2:6].values)
+    x_locations = nwp._data.x[0:4].values
+    y_locations = nwp._data.y[0:4].values
+    _ = nwp.get_batch(t0_datetimes, x_locations, y_locations)
+    assert nwp.example_thread_pool.max_workers == 2
+    assert nwp.example_thread_pool.utilisation() > 0
+
+    # The data source can still be sent to another process, after its threads have started.
+    nwp = pickle.loads(pickle.dumps(nwp))
+    batch = nwp.get_batch(t0_datetimes, x_locations, y_locations)
+    assert batch.data.shape[0] == 4
+
+
+# Set before forking, so the forked process has a copy of the data source, without pickling it.
+_FORKED_NWP = None
+
+
+def _open_in_forked_process():
+    _FORKED_NWP.open()
+    return _FORKED_NWP.n_times_opened, _FORKED_NWP._opened_data_pid == os.getpid()
+
+
+def test_nwp_data_source_is_opened_once_per_process():  # noqa: D103
+    global _FORKED_NWP
+    nwp = NWPDataSource(
+        zarr_path=NWP_ZARR_PATH,
+        history_minutes=60,
+        forecast_minutes=60,
+        channels=["t"],
+    )
+    nwp.datetime_index()
+    nwp.geospatial_border()
+    nwp.get_contiguous_t0_time_periods()
+    nwp.open()
+    assert nwp.n_times_opened == 1
+
+    # The opened data isn't pickled, so it is opened again in the new process.
+    unpickled_nwp = pickle.loads(pickle.dumps(nwp))
+    assert unpickled_nwp._opened_data is None
+    unpickled_nwp.open()
+    assert unpickled_nwp.n_times_opened == 1
+
+    # A forked process opens the data again, rather than sharing the parent's data.
+    _FORKED_NWP = nwp
+    with multiprocessing.get_context("fork").Pool(1) as pool:
+        assert pool.apply(_open_in_forked_process) == (1, True)
+    _FORKED_NWP = None
+    assert nwp.n_times_opened == 1
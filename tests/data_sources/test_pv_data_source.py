@@ -1,15 +1,21 @@
 """Test PVDataSource."""
 import logging
 import os
+import pickle
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import pytest
+import xarray as xr
 
 import nowcasting_dataset
+from nowcasting_dataset.data_sources.pv import pv_data_source
 from nowcasting_dataset.data_sources.pv.pv_data_source import (
     PVDataSource,
     drop_pv_systems_which_produce_overnight,
+    load_solar_pv_data,
+    resample_and_interpolate,
 )
 from nowcasting_dataset.time import time_periods_to_datetime_index
 
@@ -53,6 +59,76 @@ def test_drop_pv_systems_which_produce_overnight():  # noqa: D103
     _ = drop_pv_systems_which_produce_overnight(pv_power=pv_power)
 
 
+def test_load_solar_pv_data(tmp_path):  # noqa: D103
+    datetimes = pd.date_range("2020-04-01", "2020-04-02", freq="5T")
+    rng = np.random.default_rng(0)
+    power = rng.uniform(-1, 10, size=(len(datetimes), 4)).astype(np.float32)
+    power[rng.random(power.shape) < 0.1] = np.nan
+    power[:, 1] = np.nan
+    pv_power = xr.Dataset(
+        {
+            str(pv_system_id): ("datetime", power[:, i])
+            for i, pv_system_id in enumerate([7, 3, 5, 9])
+        },
+        coords=dict(datetime=datetimes),
+    )
+    filename = tmp_path / "pv.nc"
+    # One PV system is packed into integers, with a scale factor and a fill value.
+    pv_power.to_netcdf(
+        filename,
+        engine="h5netcdf",
+        encoding={"9": dict(dtype="int16", scale_factor=0.01, _FillValue=-9999)},
+    )
+    start_dt, end_dt = datetime(2020, 4, 1, 6), datetime(2020, 4, 1, 18)
+
+    pv_power_df = load_solar_pv_data(filename, start_dt=start_dt, end_dt=end_dt)
+
+    expected = xr.open_dataset(filename, engine="h5netcdf").sel(datetime=slice(start_dt, end_dt))
+    expected = expected.to_dataframe().dropna(axis="columns", how="all").clip(lower=0, upper=5e7)
+    expected.columns = [np.int32(col) for col in expected.columns]
+    expected.index = expected.index.tz_localize("Europe/London").tz_convert("UTC").tz_convert(None)
+    pd.testing.assert_frame_equal(pv_power_df, expected.astype(np.float32))
+    assert pv_power_df.columns.to_list() == [7, 5, 9]
+
+
+@pytest.mark.parametrize("freq", ["5T", "3T", "10T", "30T"])
+@pytest.mark.parametrize("n_threads", [1, 2])
+def test_resample_and_interpolate(freq, n_threads, monkeypatch):  # noqa: D103
+    # Use several blocks of PV systems.
+    monkeypatch.setattr(pv_data_source, "N_VALUES_PER_INTERPOLATION_BLOCK", 100)
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range("2020-04-01", "2020-04-01 06:00", freq=freq)
+    if freq == "5T":
+        # Some datetimes are missing, and the PV power at the others is already resampled.
+        datetimes = datetimes[rng.random(len(datetimes)) < 0.8]
+    power = rng.uniform(0, 10, size=(len(datetimes), 10)).astype(np.float32)
+    power[rng.random(power.shape) < 0.3] = np.nan
+    power[:20, 2] = np.nan
+    power[-20:, 3] = np.nan
+    pv_power = pd.DataFrame(power, index=datetimes, columns=np.arange(10) * 3)
+
+    resampled = resample_and_interpolate(pv_power, freq="5T", limit=3, n_threads=n_threads)
+
+    expected = pv_power.resample("5T").interpolate(method="time", limit=3)
+    pd.testing.assert_frame_equal(resampled, expected)
+
+
+@pytest.mark.parametrize("start", ["2020-04-01 00:03", "2020-04-01 00:00:30"])
+def test_resample_and_interpolate_regular_off_grid(start):  # noqa: D103
+    # The PV power is already 5-minutely, but not at multiples of 5 minutes.
+    rng = np.random.default_rng(0)
+    datetimes = pd.date_range(start, periods=50, freq="5T")
+    power = rng.uniform(0, 10, size=(len(datetimes), 4)).astype(np.float32)
+    power[rng.random(power.shape) < 0.3] = np.nan
+    pv_power = pd.DataFrame(power, index=datetimes, columns=[1, 2, 3, 4])
+
+    resampled = resample_and_interpolate(pv_power, freq="5T", limit=3)
+
+    expected = pv_power.resample("5T").interpolate(method="time", limit=3)
+    pd.testing.assert_frame_equal(resampled, expected)
+    assert resampled.notna().any().all()
+
+
 @pytest.mark.skip("CI does not have access to GCS")
 def test_passive():
     """Test that Passive data source can be used in PVDataSource"""
@@ -83,3 +159,67 @@ def test_passive():
     )
 
     assert example.data.max() > 0
+
+
+def test_get_example_with_object_id():  # noqa: D103
+    path = os.path.dirname(nowcasting_dataset.__file__)
+
+    pv_data_source = PVDataSource(
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        filename=f"{path}/../tests/data/pv_data/test.nc",
+        metadata_filename=f"{path}/../tests/data/pv_metadata/UK_PV_metadata.csv",
+        start_dt=datetime.fromisoformat("2020-04-01 00:00:00.000"),
+        end_dt=datetime.fromisoformat("2020-04-02 00:00:00.000"),
+        load_azimuth_and_elevation=False,
+        load_from_gcs=False,
+    )
+
+    t0_datetimes = pv_data_source.pv_power.index[6:16]
+    x_locations, y_locations, pv_system_ids = pv_data_source.get_locations_and_object_ids(
+        t0_datetimes
+    )
+    batch = pv_data_source.get_batch(
+        t0_datetimes, x_locations, y_locations, object_ids=pv_system_ids
+    )
+
+    # The central PV system is the one which was picked, even if other PV systems are at the
+    # same location.
+    assert (batch.id[:, 0].values == pv_system_ids).all()
+    pv_metadata = pv_data_source.pv_metadata.loc[pv_system_ids]
+    assert (pv_metadata.location_x.values == x_locations).all()
+    assert (pv_metadata.location_y.values == y_locations).all()
+
+
+def test_pickle_shares_pv_power():  # noqa: D103
+    path = os.path.dirname(nowcasting_dataset.__file__)
+
+    pv_data_source = PVDataSource(
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+        filename=f"{path}/../tests/data/pv_data/test.nc",
+        metadata_filename=f"{path}/../tests/data/pv_metadata/UK_PV_metadata.csv",
+        start_dt=datetime.fromisoformat("2020-04-01 00:00:00.000"),
+        end_dt=datetime.fromisoformat("2020-04-02 00:00:00.000"),
+        load_azimuth_and_elevation=False,
+        load_from_gcs=False,
+    )
+
+    # Only the path of the PV power in shared memory is pickled, not the PV power itself.
+    pickled = pickle.dumps(pv_data_source)
+    assert len(pickled) < pv_data_source.pv_power.values.nbytes
+    unpickled = pickle.loads(pickled)
+    pd.testing.assert_frame_equal(unpickled.pv_power, pv_data_source.pv_power)
+
+    t0_datetimes = pv_data_source.pv_power.index[6:16]
+    x_locations, y_locations, pv_system_ids = pv_data_source.get_locations_and_object_ids(
+        t0_datetimes
+    )
+    xr.testing.assert_identical(
+        unpickled.get_batch(t0_datetimes, x_locations, y_locations, object_ids=pv_system_ids),
+        pv_data_source.get_batch(t0_datetimes, x_locations, y_locations, object_ids=pv_system_ids),
+    )
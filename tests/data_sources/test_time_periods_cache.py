@@ -0,0 +1,100 @@
+"""Test the cache of the contiguous t0 time periods of each DataSource."""
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import nowcasting_dataset
+from nowcasting_dataset.data_sources.gsp.gsp_data_source import GSPDataSource
+from nowcasting_dataset.data_sources.sun.sun_data_source import SunDataSource
+from nowcasting_dataset.data_sources.time_periods_cache import get_contiguous_t0_time_periods
+from nowcasting_dataset.manager import Manager
+
+
+@pytest.fixture
+def gsp_kwargs(tmp_path):
+    """The arguments of a GSPDataSource, which reads a copy of the test GSP Zarr"""
+    local_path = Path(nowcasting_dataset.__file__).parent.parent
+    zarr_path = tmp_path / "gsp.zarr"
+    shutil.copytree(local_path / "tests" / "data" / "gsp" / "test.zarr", zarr_path)
+    return dict(
+        zarr_path=str(zarr_path),
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+
+
+def _count_computations(monkeypatch, data_source_class) -> list:
+    """Count the calls of `data_source_class.get_contiguous_t0_time_periods`"""
+    calls = []
+    get_contiguous_t0_time_periods = data_source_class.get_contiguous_t0_time_periods
+
+    def counted_get_contiguous_t0_time_periods(self):
+        calls.append(self)
+        return get_contiguous_t0_time_periods(self)
+
+    monkeypatch.setattr(
+        data_source_class, "get_contiguous_t0_time_periods", counted_get_contiguous_t0_time_periods
+    )
+    return calls
+
+
+def test_time_periods_are_cached(gsp_kwargs, tmp_path, monkeypatch):  # noqa: D103
+    cache_dir = tmp_path / "cache"
+    expected = GSPDataSource(**gsp_kwargs).get_contiguous_t0_time_periods()
+    calls = _count_computations(monkeypatch, GSPDataSource)
+
+    t0_time_periods = get_contiguous_t0_time_periods(GSPDataSource(**gsp_kwargs), cache_dir)
+    pd.testing.assert_frame_equal(t0_time_periods, expected)
+    cached_t0_time_periods = get_contiguous_t0_time_periods(GSPDataSource(**gsp_kwargs), cache_dir)
+    pd.testing.assert_frame_equal(cached_t0_time_periods, expected)
+    assert len(calls) == 1
+
+    # Changing the settings changes the time periods, so they are recomputed.
+    kwargs = dict(gsp_kwargs, forecast_minutes=90)
+    t0_time_periods = get_contiguous_t0_time_periods(GSPDataSource(**kwargs), cache_dir)
+    pd.testing.assert_frame_equal(
+        t0_time_periods, GSPDataSource(**kwargs).get_contiguous_t0_time_periods()
+    )
+    assert len(calls) == 3
+
+    # Modifying the Zarr store invalidates the cache.
+    os.utime(Path(gsp_kwargs["zarr_path"]) / ".zmetadata", (0, 0))
+    get_contiguous_t0_time_periods(GSPDataSource(**gsp_kwargs), cache_dir)
+    assert len(calls) == 4
+
+
+def test_manager_only_recomputes_modified_data_sources(
+    gsp_kwargs, tmp_path, monkeypatch
+):  # noqa: D103
+    local_path = Path(nowcasting_dataset.__file__).parent.parent
+    sun_kwargs = dict(
+        zarr_path=f"{local_path}/tests/data/sun/test.zarr", history_minutes=30, forecast_minutes=60
+    )
+    manager = Manager()
+    manager.data_sources = {"gsp": GSPDataSource(**gsp_kwargs), "sun": SunDataSource(**sun_kwargs)}
+    expected = manager.get_t0_datetimes_across_all_data_sources(freq="30T")
+
+    gsp_calls = _count_computations(monkeypatch, GSPDataSource)
+    sun_calls = _count_computations(monkeypatch, SunDataSource)
+    cache_dir = tmp_path / "cache"
+    for _ in range(2):
+        t0_datetimes = manager.get_t0_datetimes_across_all_data_sources(
+            freq="30T", time_periods_cache_dir=cache_dir
+        )
+        pd.testing.assert_index_equal(t0_datetimes, expected)
+    assert (len(gsp_calls), len(sun_calls)) == (1, 1)
+
+    os.utime(Path(gsp_kwargs["zarr_path"]) / ".zmetadata", (0, 0))
+    t0_datetimes = manager.get_t0_datetimes_across_all_data_sources(
+        freq="30T", time_periods_cache_dir=cache_dir
+    )
+    pd.testing.assert_index_equal(t0_datetimes, expected)
+    assert (len(gsp_calls), len(sun_calls)) == (2, 1)
@@ -2,6 +2,7 @@
 import os
 import tempfile
 
+import numpy as np
 import pytest
 
 from nowcasting_dataset.config.model import Configuration, InputData
@@ -34,3 +35,54 @@ def test_model_load_from_netcdf(configuration):  # noqa: D103
         batch = Batch.load_netcdf(batch_idx=0, local_netcdf_path=dirpath)
 
         assert batch.satellite is not None
+
+
+def test_model_save_and_load_npy(configuration):  # noqa: D103
+    with tempfile.TemporaryDirectory() as dirpath:
+        batch = Batch.fake(configuration=configuration)
+        batch.save_npy(path=dirpath, batch_i=1)
+
+        assert os.path.exists(f"{dirpath}/satellite/000001/data.npy")
+
+        loaded_batch = Batch.load_npy(local_npy_path=dirpath, batch_idx=1)
+
+        assert loaded_batch.batch_size == 4
+        assert loaded_batch.satellite.identical(batch.satellite)
+        assert loaded_batch.metadata.identical(batch.metadata)
+
+        # The arrays wrap the memory-mapped files, without copying
+        data = loaded_batch.satellite.data.data
+        assert isinstance(data.base, np.memmap) or isinstance(data, np.memmap)
+        assert not data.flags.writeable
+
+
+def test_model_save_and_load_npy_string_coordinates(configuration):  # noqa: D103
+    batch = Batch.fake(configuration=configuration)
+    channels = batch.satellite.channels.values
+    assert channels.dtype.kind == "U"
+    with tempfile.TemporaryDirectory() as dirpath:
+        # Strings in an object array are saved as numpy strings.
+        dims = batch.satellite.channels.dims
+        batch.satellite = batch.satellite.assign_coords(channels=(dims, channels.astype(object)))
+        batch.save_npy(path=dirpath, batch_i=0)
+        loaded_batch = Batch.load_npy(local_npy_path=dirpath, batch_idx=0)
+        np.testing.assert_array_equal(loaded_batch.satellite.channels.values, channels)
+        assert loaded_batch.nwp.channels.dtype.kind == "U"
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        # Other objects can't be saved, and the error isn't swallowed by the thread pool.
+        batch.satellite = batch.satellite.assign_coords(
+            channels=(dims, np.full(channels.shape, None, dtype=object))
+        )
+        with pytest.raises(ValueError, match="object dtype"):
+            batch.save_npy(path=dirpath, batch_i=0)
+
+
+def test_model_load_npy_subset(configuration):  # noqa: D103
+    with tempfile.TemporaryDirectory() as dirpath:
+        Batch.fake(configuration=configuration).save_npy(path=dirpath, batch_i=0)
+
+        batch = Batch.load_npy(local_npy_path=dirpath, batch_idx=0, data_sources_names=["pv"])
+
+        assert batch.pv is not None
+        assert batch.satellite is None
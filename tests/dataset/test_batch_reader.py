@@ -0,0 +1,83 @@
+"""Test BatchReader."""
+import os
+import tempfile
+
+import fsspec
+import pytest
+
+from nowcasting_dataset.config.model import Configuration, InputData
+from nowcasting_dataset.dataset.batch import Batch
+from nowcasting_dataset.dataset.batch_reader import BatchReader
+
+
+@pytest.fixture(scope="module")
+def saved_batches_path():
+    """Save 3 fake batches, where the metadata label is the batch index"""
+    configuration = Configuration()
+    configuration.input_data = InputData.set_all_to_defaults()
+    configuration.process.batch_size = 4
+    with tempfile.TemporaryDirectory() as dirpath:
+        for batch_idx in range(3):
+            batch = Batch.fake(configuration=configuration)
+            batch.metadata["object_at_center_label"][:] = batch_idx
+            batch.save_netcdf(path=dirpath, batch_i=batch_idx)
+        yield dirpath
+
+
+@pytest.mark.parametrize("n_prefetch", [0, 1, 5])
+def test_batch_reader(saved_batches_path, n_prefetch):  # noqa: D103
+    reader = BatchReader(
+        path=saved_batches_path,
+        batch_indices=[2, 0, 1],
+        data_sources_names=["metadata", "satellite"],
+        n_prefetch=n_prefetch,
+    )
+    batches = list(reader)
+
+    assert len(batches) == len(reader) == 3
+    for batch_idx, batch in zip([2, 0, 1], batches):
+        assert batch.batch_size == 4
+        assert (batch.metadata.object_at_center_label == batch_idx).all()
+        assert batch.satellite is not None
+        assert batch.nwp is None
+
+
+def test_batch_reader_processes(saved_batches_path):  # noqa: D103
+    reader = BatchReader(
+        path=saved_batches_path,
+        batch_indices=[0, 1],
+        data_sources_names=["gsp"],
+        use_processes=True,
+        max_workers=2,
+    )
+    batches = list(reader)
+
+    assert len(batches) == 2
+    assert batches[0].gsp is not None
+    assert batches[0].metadata is None
+
+
+def test_batch_reader_remote_with_cache(saved_batches_path):  # noqa: D103
+    filesystem = fsspec.filesystem("memory")
+    filesystem.put(saved_batches_path, "memory://batches", recursive=True)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        reader = BatchReader(
+            path="memory://batches",
+            batch_indices=[1],
+            data_sources_names=["metadata", "pv"],
+            cache_dir=cache_dir,
+        )
+        batch = next(iter(reader))
+        assert (batch.metadata.object_at_center_label == 1).all()
+        assert len(os.listdir(cache_dir)) > 0
+
+        # The second read comes from the local cache
+        filesystem.rm("memory://batches", recursive=True)
+        batch = next(iter(reader))
+        assert batch.pv is not None
+
+
+def test_batch_reader_unknown_data_source(saved_batches_path):  # noqa: D103
+    with pytest.raises(AssertionError):
+        BatchReader(path=saved_batches_path, batch_indices=[0], data_sources_names=["foo"])
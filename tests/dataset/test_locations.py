@@ -0,0 +1,43 @@
+"""Test saving and loading the locations of each example."""
+import numpy as np
+import pandas as pd
+
+from nowcasting_dataset.dataset.locations import (
+    load_locations_from_csv,
+    load_locations_from_npz,
+    save_locations_to_npz,
+)
+
+
+def _locations(n_examples: int = 100) -> pd.DataFrame:
+    rng = np.random.default_rng(1234)
+    return pd.DataFrame(
+        dict(
+            t0_datetime_UTC=pd.date_range("2020-04-01", periods=n_examples, freq="5T"),
+            x_center_OSGB=rng.uniform(0, 700_000, size=n_examples),
+            y_center_OSGB=rng.uniform(0, 1_200_000, size=n_examples),
+        ),
+        index=np.arange(10, 10 + n_examples),
+    )
+
+
+def test_save_and_load_locations_npz(tmp_path):  # noqa: D103
+    locations = _locations()
+    locations["object_id"] = np.arange(len(locations), dtype=np.int64)
+    filename = tmp_path / "locations.npz"
+
+    save_locations_to_npz(locations, filename)
+    loaded_locations = load_locations_from_npz(filename)
+
+    # The values are exactly the same, including the float coordinates.
+    pd.testing.assert_frame_equal(loaded_locations, locations, check_exact=True)
+
+
+def test_load_locations_from_csv(tmp_path):  # noqa: D103
+    locations = _locations()
+    filename = tmp_path / "locations.csv"
+    locations.to_csv(filename)
+
+    loaded_locations = load_locations_from_csv(filename)
+
+    pd.testing.assert_frame_equal(loaded_locations, locations, check_freq=False)
@@ -2,6 +2,7 @@ import numpy as np
 import pandas as pd
 import pytest
 
+from nowcasting_dataset.dataset.split.method import _period_codes, split_method
 from nowcasting_dataset.dataset.split.model import TrainValidationTestSpecific
 from nowcasting_dataset.dataset.split.split import SplitMethod, split_data
 
@@ -326,3 +327,37 @@ def test_split_day_random_test_date():
     assert (train_df < pd.Timestamp("2021-07-01")).sum() == len(train_df)
     assert (validation_df < pd.Timestamp("2021-07-01")).sum() == len(validation_df)
     assert (test >= pd.Timestamp("2021-07-01")).sum() == len(test)
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "M", "Y"])
+def test_period_codes_are_the_same_as_pandas_periods(freq):  # noqa: D103
+    rng = np.random.default_rng(1234)
+    # Include datetimes before 1970, which have negative epoch nanoseconds.
+    datetimes = pd.DatetimeIndex(
+        rng.integers(
+            pd.Timestamp("1965-01-01").value, pd.Timestamp("2025-01-01").value, size=10_000
+        )
+    )
+
+    codes, _ = pd.factorize(_period_codes(datetimes, freq=freq))
+    expected_codes, _ = pd.factorize(datetimes.to_period(freq))
+    np.testing.assert_array_equal(codes, expected_codes)
+
+
+def test_split_method_specific_only_matches_the_start_of_periods():  # noqa: D103
+    datetimes = pd.date_range("2020-01-01", "2022-01-01", freq="1H")
+    train_test_validation_specific = TrainValidationTestSpecific(
+        train=["2020-01-01"], validation=["2021-06-01"], test=["2022-01-01"]
+    )
+
+    train, validation, test = split_method(
+        datetimes=datetimes,
+        method="specific",
+        freq="Y",
+        train_test_validation_specific=train_test_validation_specific,
+    )
+
+    assert (train.year == 2020).all() and len(train) == 366 * 24
+    # "2021-06-01" is not the start of a year.
+    assert len(validation) == 0
+    assert len(test) == 1
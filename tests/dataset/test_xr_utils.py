@@ -0,0 +1,72 @@
+"""Tests for xr_utils"""
+import timeit
+
+import numpy as np
+import pytest
+import xarray as xr
+
+from nowcasting_dataset.data_sources.fake import (
+    create_gsp_pv_dataset,
+    create_image_array,
+    create_sun_dataset,
+)
+from nowcasting_dataset.dataset.xr_utils import convert_coordinates_to_indexes
+
+
+def _convert_coordinates_to_indexes_one_dim_at_a_time(dataset: xr.Dataset) -> xr.Dataset:
+    """Reference implementation, which rebuilds the Dataset for every dimension"""
+    dataset = dataset.copy()
+    for original_dim_name in dataset.dims:
+        original_coords = dataset[original_dim_name]
+        new_index_coords = np.arange(len(original_coords))
+        new_index_dim_name = f"{original_dim_name}_index"
+        dataset[original_dim_name] = new_index_coords
+        dataset = dataset.rename({original_dim_name: new_index_dim_name})
+        dataset[original_dim_name] = xr.DataArray(
+            original_coords,
+            coords=[new_index_coords],
+            dims=[new_index_dim_name],
+        )
+    return dataset
+
+
+def _satellite_example() -> xr.Dataset:
+    return create_image_array(seq_length_5=19, image_size_pixels=64).to_dataset()
+
+
+def _pv_example() -> xr.Dataset:
+    return create_gsp_pv_dataset(seq_length=19, number_of_systems=128)
+
+
+@pytest.mark.parametrize(
+    "make_example",
+    [
+        _satellite_example,
+        _pv_example,
+        create_sun_dataset,
+        lambda: xr.Dataset({"data": (("time", "x"), np.zeros((3, 4)))}),
+    ],
+)
+def test_convert_coordinates_to_indexes(make_example):  # noqa: D103
+    example = make_example()
+    expected = _convert_coordinates_to_indexes_one_dim_at_a_time(example)
+
+    converted = convert_coordinates_to_indexes(example)
+
+    xr.testing.assert_identical(converted, expected)
+    assert set(converted.data_vars) == set(expected.data_vars)
+    assert set(converted.coords) == set(expected.coords)
+
+
+@pytest.mark.parametrize("make_example", [_satellite_example, _pv_example])
+def test_convert_coordinates_to_indexes_benchmark(make_example):
+    """Check the single pass conversion is not slower than rebuilding per dimension"""
+    example = make_example()
+
+    def best_time(function) -> float:
+        return min(timeit.repeat(lambda: function(example), number=20, repeat=5))
+
+    fast = best_time(convert_coordinates_to_indexes)
+    slow = best_time(_convert_coordinates_to_indexes_one_dim_at_a_time)
+
+    assert fast < slow, f"single pass took {fast:.4f}s, one dim at a time took {slow:.4f}s"
@@ -0,0 +1,126 @@
+"""Test the local disk cache of remote Zarr chunks."""
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from nowcasting_dataset.data_sources import SatelliteDataSource
+from nowcasting_dataset.data_sources.fake import create_synthetic_satellite_zarr
+from nowcasting_dataset.filesystem.disk_cache import DiskCache
+from nowcasting_dataset.filesystem.zarr_prefetch import PrefetchStore
+
+
+def test_disk_cache_get_and_put(tmp_path):  # noqa: D103
+    disk_cache = DiskCache(tmp_path / "cache", max_size_mb=1)
+    assert disk_cache.get("a") is None
+    disk_cache.put("a", b"abc")
+    assert disk_cache.get("a") == b"abc"
+    assert disk_cache.size_bytes() == 3
+
+    # The cache can be used by a different DiskCache, e.g. in another process.
+    assert DiskCache(tmp_path / "cache", max_size_mb=1).get("a") == b"abc"
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):  # noqa: D103
+    disk_cache = DiskCache(tmp_path, max_size_mb=0.001)  # 1,000 bytes
+    value = bytes(300)
+    for key in ["a", "b", "c"]:
+        disk_cache.put(key, value)
+        time.sleep(0.01)
+
+    # Reading "a" makes it the most recently used, so "b" is evicted first.
+    assert disk_cache.get("a") == value
+    time.sleep(0.01)
+    disk_cache.put("d", value)
+
+    assert disk_cache.get("b") is None
+    for key in ["a", "c", "d"]:
+        assert disk_cache.get(key) == value
+    assert disk_cache.size_bytes() <= 1_000
+
+
+def _put_and_get(args) -> bool:
+    cache_dir, process_idx = args
+    disk_cache = DiskCache(cache_dir, max_size_mb=0.01)
+    rng = np.random.default_rng(process_idx)
+    for key in rng.integers(0, 50, size=200):
+        value = str(key).encode() * 100
+        disk_cache.put(str(key), value)
+        cached_value = disk_cache.get(str(key))
+        # The value might have been evicted by another process, but is never partially written.
+        if cached_value is not None and cached_value != value:
+            return False
+    return True
+
+
+def test_disk_cache_shared_by_processes(tmp_path):  # noqa: D103
+    with multiprocessing.Pool(4) as pool:
+        assert all(pool.map(_put_and_get, [(str(tmp_path), i) for i in range(4)]))
+    disk_cache = DiskCache(tmp_path, max_size_mb=0.01)
+    disk_cache.evict()
+    assert disk_cache.size_bytes() <= 10_000
+    assert not any(filename.endswith(".tmp") for filename in os.listdir(tmp_path))
+
+
+def test_satellite_disk_cache(tmp_path):  # noqa: D103
+    zarr_path = tmp_path / "sat_data.zarr"
+    start_dt = pd.Timestamp("2020-04-01 10:00")
+    create_synthetic_satellite_zarr(
+        zarr_path,
+        datetimes=pd.date_range(start_dt, "2020-04-01 12:00", freq="5T"),
+        n_x=160,
+        n_y=140,
+        chunks=dict(time=1, x=40, y=70, variable=1),
+        rng=np.random.default_rng(1234),
+    )
+    kwargs = dict(
+        zarr_path=zarr_path,
+        history_minutes=30,
+        forecast_minutes=30,
+        image_size_pixels=16,
+        meters_per_pixel=2000,
+        channels=("IR_016",),
+    )
+    data_source = SatelliteDataSource(**kwargs)
+    cached_data_source = SatelliteDataSource(disk_cache_dir=str(tmp_path / "cache"), **kwargs)
+    data_source.open()
+    cached_data_source.open()
+    assert isinstance(cached_data_source._zarr_store(), PrefetchStore)
+
+    t0_datetimes = pd.DatetimeIndex([start_dt + pd.Timedelta("1H")] * 2)
+    x_locations = data_source.data.x.values[[40, 100]]
+    y_locations = data_source.data.y.values[[40, 100]]
+    batch = data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    cached_batch = cached_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    xr.testing.assert_identical(batch.data, cached_batch.data)
+    n_cached_chunks = len(os.listdir(tmp_path / "cache"))
+    assert n_cached_chunks > 0
+
+    # Once cached, the chunks aren't read from the Zarr store again.
+    for chunk_filename in (zarr_path / "stacked_eumetsat_data").iterdir():
+        if not chunk_filename.name.startswith("."):
+            chunk_filename.write_bytes(b"")
+    cached_batch = cached_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    xr.testing.assert_identical(batch.data, cached_batch.data)
+    assert len(os.listdir(tmp_path / "cache")) == n_cached_chunks
+
+    # Rewriting the Zarr store changes the version of its arrays, so the old chunks aren't used.
+    create_synthetic_satellite_zarr(
+        zarr_path,
+        datetimes=pd.date_range(start_dt, "2020-04-01 12:00", freq="5T"),
+        n_x=160,
+        n_y=140,
+        chunks=dict(time=1, x=40, y=70, variable=1),
+        rng=np.random.default_rng(5678),
+    )
+    data_source = SatelliteDataSource(**kwargs)
+    cached_data_source = SatelliteDataSource(disk_cache_dir=str(tmp_path / "cache"), **kwargs)
+    data_source.open()
+    cached_data_source.open()
+    new_batch = data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    assert not new_batch.data.equals(batch.data)
+    cached_batch = cached_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    xr.testing.assert_identical(new_batch.data, cached_batch.data)
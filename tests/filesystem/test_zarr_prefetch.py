@@ -0,0 +1,171 @@
+"""Test fetching the Zarr chunks of a batch concurrently."""
+import functools
+import http.server
+import threading
+
+import fsspec
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from nowcasting_dataset.data_sources import NWPDataSource, SatelliteDataSource
+from nowcasting_dataset.data_sources.fake import (
+    create_synthetic_nwp_zarr,
+    create_synthetic_satellite_zarr,
+)
+from nowcasting_dataset.filesystem.zarr_prefetch import PrefetchStore, ZarrChunkIndex
+
+START_DT = pd.Timestamp("2020-04-01 10:00")
+END_DT = pd.Timestamp("2020-04-01 12:00")
+
+
+@pytest.fixture
+def sat_zarr_path(tmp_path):  # noqa: D103
+    zarr_path = tmp_path / "sat_data.zarr"
+    create_synthetic_satellite_zarr(
+        zarr_path,
+        datetimes=pd.date_range(START_DT, END_DT, freq="5T"),
+        n_x=160,
+        n_y=140,
+        chunks=dict(time=1, x=40, y=70, variable=1),
+        rng=np.random.default_rng(1234),
+    )
+    return zarr_path
+
+
+@pytest.fixture
+def http_url(tmp_path):
+    """Serve `tmp_path` over HTTP, so the async HTTP filesystem of fsspec can be used"""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_prefetch_store_http(sat_zarr_path, http_url):  # noqa: D103
+    store = PrefetchStore(f"{http_url}/sat_data.zarr", max_concurrent_requests=4)
+    assert store.fs.async_impl
+
+    keys = ["stacked_eumetsat_data/0.0.0.0", "stacked_eumetsat_data/1.1.1.0", ".zmetadata"]
+    store.prefetch(keys + ["does_not_exist"])
+    for key in keys:
+        assert store[key] == (sat_zarr_path / key).read_bytes()
+    assert "does_not_exist" not in store
+    with pytest.raises(KeyError):
+        store["does_not_exist"]
+
+    # Keys which haven't been prefetched are fetched when needed.
+    store.clear_prefetched()
+    assert store[keys[0]] == (sat_zarr_path / keys[0]).read_bytes()
+
+
+def test_zarr_chunk_index(sat_zarr_path):  # noqa: D103
+    store = PrefetchStore(str(sat_zarr_path))
+    chunk_index = ZarrChunkIndex(store, variable_name="stacked_eumetsat_data")
+
+    data_array = xr.open_dataset(store, engine="zarr", chunks={})["stacked_eumetsat_data"]
+    selection = data_array.isel(time=slice(2, 4), x=slice(30, 50), y=[0], variable=[0])
+    assert chunk_index.chunk_keys(selection) == {
+        f"stacked_eumetsat_data/{time}.{x}.0.0" for time in (2, 3) for x in (0, 1)
+    }
+
+    # Reversing a coordinate, as open_sat_data does, doesn't change the chunks.
+    selection = selection.reindex(x=selection.x[::-1])
+    assert len(chunk_index.chunk_keys(selection)) == 4
+
+    # The chunks can't be found without all the coordinates.
+    assert chunk_index.chunk_keys(selection.drop_vars("x")) is None
+
+
+def test_satellite_async_chunk_reads(sat_zarr_path, http_url):  # noqa: D103
+    kwargs = dict(
+        history_minutes=30,
+        forecast_minutes=30,
+        image_size_pixels=16,
+        meters_per_pixel=2000,
+        channels=("IR_016",),
+    )
+    data_source = SatelliteDataSource(zarr_path=sat_zarr_path, **kwargs)
+    async_data_source = SatelliteDataSource(
+        zarr_path=f"{http_url}/sat_data.zarr", async_chunk_reads=True, **kwargs
+    )
+    data_source.open()
+    async_data_source.open()
+    assert isinstance(async_data_source._prefetch_store, PrefetchStore)
+
+    t0_datetimes = pd.DatetimeIndex([START_DT + pd.Timedelta("1H")] * 2)
+    x_locations = data_source.data.x.values[[40, 100]]
+    y_locations = data_source.data.y.values[[40, 100]]
+    batch = data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    async_batch = async_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    xr.testing.assert_identical(batch.data, async_batch.data)
+
+    # The prefetched chunks are dropped after each batch.
+    assert async_data_source._prefetch_store._prefetched == {}
+    assert "prefetch" in set(async_data_source.stage_timer.to_dataframe().stage)
+
+
+def test_nwp_async_chunk_reads_memory_filesystem(tmp_path):  # noqa: D103
+    zarr_path = tmp_path / "nwp.zarr"
+    create_synthetic_nwp_zarr(
+        zarr_path,
+        init_times=pd.date_range(START_DT, END_DT, freq="1H"),
+        channels=["t", "dswrf"],
+        n_steps=5,
+        n_x=16,
+        n_y=16,
+        chunks=dict(variable=1, init_time=1, step=1, y=8, x=8),
+        rng=np.random.default_rng(1234),
+    )
+    memory_fs = fsspec.filesystem("memory")
+    memory_fs.put(str(zarr_path), "/nwp.zarr", recursive=True)
+
+    kwargs = dict(
+        history_minutes=60,
+        forecast_minutes=60,
+        image_size_pixels=2,
+        meters_per_pixel=2000,
+        channels=["t"],
+    )
+    data_source = NWPDataSource(zarr_path=zarr_path, **kwargs)
+    async_data_source = NWPDataSource(
+        zarr_path="memory://nwp.zarr", async_chunk_reads=True, **kwargs
+    )
+    data_source.open()
+    async_data_source.open()
+
+    fetched_keys = []
+    store = async_data_source._prefetch_store
+    original_prefetch = store.prefetch
+
+    def prefetch_and_record_keys(keys):
+        fetched_keys.extend(keys)
+        original_prefetch(keys)
+
+    store.prefetch = prefetch_and_record_keys
+
+    t0_datetimes = pd.DatetimeIndex([START_DT + pd.Timedelta("1H")] * 2)
+    x_locations = data_source.data.x.values[[4, 12]]
+    y_locations = data_source.data.y.values[[4, 12]]
+    batch = data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    async_batch = async_data_source.get_batch(t0_datetimes, x_locations, y_locations)
+    xr.testing.assert_identical(batch.data, async_batch.data)
+
+    # Both examples are in different spatial chunks, of one channel and one init time.
+    assert len(fetched_keys) > 0
+    assert all(key.startswith("UKV/0.") for key in fetched_keys)
+    assert len({key.split(".")[-2:][0] for key in fetched_keys}) == 2
+
+    # With low_memory (e.g. over the memory budget), the chunks of the batch aren't prefetched.
+    fetched_keys.clear()
+    low_memory_batch = async_data_source.get_batch(
+        t0_datetimes, x_locations, y_locations, low_memory=True
+    )
+    xr.testing.assert_identical(batch.data, low_memory_batch.data)
+    assert fetched_keys == []
+
+    memory_fs.rm("/nwp.zarr", recursive=True)
@@ -1,6 +1,7 @@
 """ Test for geospatial functions """
 import numpy as np
 import pandas as pd
+import pvlib
 
 from nowcasting_dataset import geospatial
 
@@ -43,6 +44,32 @@ def test_calculate_azimuth_and_elevation_angle():
     assert 60 < s["elevation"][0] < 65
 
 
+def test_calculate_azimuth_and_elevation_angles():
+    """The angles of many locations are the same as pvlib's, one location at a time"""
+    datestamps = pd.date_range("2021-01-01", "2022-01-01", freq="7H", tz="UTC")
+    latitudes = np.array([49.9, 51.5, 55.0, 60.8])
+    longitudes = np.array([-6.3, -0.1, -3.2, -0.9])
+
+    azimuth, elevation = geospatial.calculate_azimuth_and_elevation_angles(
+        latitudes=latitudes, longitudes=longitudes, datestamps=datestamps
+    )
+
+    assert azimuth.shape == elevation.shape == (len(datestamps), len(latitudes))
+    for location_idx, (latitude, longitude) in enumerate(zip(latitudes, longitudes)):
+        expected = pvlib.solarposition.get_solarposition(
+            datestamps, latitude, longitude, method="nrel_numpy"
+        )
+        np.testing.assert_allclose(azimuth[:, location_idx], expected["azimuth"], atol=1e-8)
+        np.testing.assert_allclose(elevation[:, location_idx], expected["elevation"], atol=1e-8)
+
+    # Datestamps without a timezone are UTC.
+    azimuth_utc, elevation_utc = geospatial.calculate_azimuth_and_elevation_angles(
+        latitudes=latitudes, longitudes=longitudes, datestamps=datestamps.tz_localize(None)
+    )
+    np.testing.assert_array_equal(azimuth_utc, azimuth)
+    np.testing.assert_array_equal(elevation_utc, elevation)
+
+
 def test_get_osgb_center_from_osgb():
     """Test get OSGB center"""
     x_osgb = np.random.randint(0, 100, 10)
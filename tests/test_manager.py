@@ -60,8 +60,17 @@ def test_sample_spatial_and_temporal_locations_for_examples():  # noqa: D103
         t0_datetimes=t0_datetimes, n_examples=10
     )
 
-    assert locations.columns.to_list() == ["t0_datetime_UTC", "x_center_OSGB", "y_center_OSGB"]
+    assert locations.columns.to_list() == [
+        "t0_datetime_UTC",
+        "x_center_OSGB",
+        "y_center_OSGB",
+        "object_id",
+    ]
     assert len(locations) == 10
+    # The object ids are the GSPs at the locations.
+    metadata = gsp.metadata.loc[locations["object_id"]]
+    assert (metadata.location_x.values == locations["x_center_OSGB"].values).all()
+    assert (metadata.location_y.values == locations["y_center_OSGB"].values).all()
     assert (t0_datetimes[0] <= locations["t0_datetime_UTC"]).all()
     assert (t0_datetimes[-1] >= locations["t0_datetime_UTC"]).all()
 
@@ -174,6 +183,8 @@ def test_batches():
         assert os.path.exists(f"{dst_path}/train/sat/000001.nc")
         assert os.path.exists(f"{dst_path}/train/hrvsat/000001.nc")
         assert os.path.exists(f"{dst_path}/train/hrvsat/000000.nc")
+        assert os.path.exists(f"{dst_path}/train/gsp/timings.csv")
+        assert os.path.exists(f"{dst_path}/train/gsp/timings.json")
 
 
 def test_save_config():
@@ -214,3 +225,35 @@ def test_run():
 
         manager.create_files_specifying_spatial_and_temporal_locations_of_each_example_if_necessary()  # noqa 101
         manager.create_batches(overwrite_batches=True)
+
+
+def test_locations_are_saved_as_csv_and_npz():  # noqa: D103
+    local_path = Path(nowcasting_dataset.__file__).parent.parent
+    gsp = GSPDataSource(
+        zarr_path=local_path / "tests" / "data" / "gsp" / "test.zarr",
+        start_dt=datetime(2020, 4, 1),
+        end_dt=datetime(2020, 4, 2),
+        history_minutes=30,
+        forecast_minutes=60,
+        image_size_pixels=64,
+        meters_per_pixel=2000,
+    )
+    manager = Manager()
+    manager.load_yaml_configuration(filename=local_path / "tests" / "config" / "test.yaml")
+    manager.data_sources = {"gsp": gsp}
+    manager.data_source_which_defines_geospatial_locations = gsp
+
+    with tempfile.TemporaryDirectory() as dst_path:
+        manager.config.output_data.filepath = Path(dst_path)
+        manager.create_files_specifying_spatial_and_temporal_locations_of_each_example_if_necessary()  # noqa 101
+
+        locations = manager._load_locations("train")
+        assert os.path.exists(manager._filename_of_locations_npz_file("train"))
+        assert len(locations) == (
+            manager.config.process.n_train_batches * manager.config.process.batch_size
+        )
+        assert "object_id" in locations.columns
+
+        # The CSV file has the same locations, and is loaded if there is no .npz file.
+        os.remove(manager._filename_of_locations_npz_file("train"))
+        pd.testing.assert_frame_equal(manager._load_locations("train"), locations)
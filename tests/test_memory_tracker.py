@@ -0,0 +1,76 @@
+"""Test MemoryTracker."""
+import mmap
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from nowcasting_dataset import memory_tracker
+from nowcasting_dataset.memory_tracker import MemoryTracker, get_private_bytes, get_rss_bytes
+
+
+def test_get_rss_bytes():  # noqa: D103
+    assert get_rss_bytes() > 0
+
+
+def test_memory_tracker():  # noqa: D103
+    tracker = MemoryTracker(trace_allocations=True)
+    for batch_idx in range(2):
+        with tracker.track_batch(batch_idx):
+            data = np.ones(10_000_000, dtype=np.uint8)
+            del data
+
+    memory = tracker.to_dataframe()
+    assert memory.batch_idx.to_list() == [0, 1]
+    assert (memory.rss_after_mb > 0).all()
+    assert (memory.private_after_mb <= memory.rss_after_mb).all()
+    assert (memory.tracemalloc_peak_mb >= 10).all()
+    assert not tracemalloc.is_tracing()
+
+    with tempfile.TemporaryDirectory() as path:
+        tracker.save(path)
+        saved = pd.read_csv(os.path.join(path, memory_tracker.MEMORY_CSV_FILENAME))
+    assert saved.batch_idx.to_list() == [0, 1]
+
+
+def test_memory_tracker_without_tracemalloc():  # noqa: D103
+    tracker = MemoryTracker()
+    with tracker.track_batch(0):
+        pass
+    assert tracker.to_dataframe().tracemalloc_peak_mb.isnull().all()
+
+
+def test_n_threads():  # noqa: D103
+    assert MemoryTracker().n_threads(max_threads=32) == 32
+
+    private_mb = get_private_bytes() / memory_tracker.BYTES_PER_MB
+    assert MemoryTracker(budget_mb=private_mb * 10).n_threads(max_threads=32) == 32
+    assert MemoryTracker(budget_mb=private_mb / 2).n_threads(max_threads=32) == 1
+    # Halfway between the soft limit and the budget.
+    tracker = MemoryTracker(budget_mb=private_mb / 0.9)
+    assert 8 <= tracker.n_threads(max_threads=32) <= 24
+
+
+def test_get_private_bytes(tmp_path):  # noqa: D103
+    private_bytes = get_private_bytes()
+    assert 0 < private_bytes <= get_rss_bytes()
+
+    # Reading a shared file increases the RSS, but not the private memory.
+    nbytes = 50_000_000
+    path = tmp_path / "shared"
+    path.write_bytes(b"\x01" * nbytes)
+    with open(path, "rb") as file:
+        shared = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    rss_bytes = get_rss_bytes()
+    assert np.frombuffer(shared, dtype=np.uint8).sum() == nbytes
+    assert get_rss_bytes() - rss_bytes > nbytes / 2
+    assert get_private_bytes() - private_bytes < nbytes / 2
+
+
+def test_is_over_budget():  # noqa: D103
+    assert not MemoryTracker().is_over_budget()
+    private_mb = get_private_bytes() / memory_tracker.BYTES_PER_MB
+    assert not MemoryTracker(budget_mb=private_mb * 10).is_over_budget()
+    assert MemoryTracker(budget_mb=private_mb / 2).is_over_budget()
@@ -0,0 +1,111 @@
+"""Test profiling."""
+import pstats
+import threading
+from concurrent import futures
+
+import pytest
+
+from nowcasting_dataset import profiling
+from nowcasting_dataset.thread_pool import ExampleThreadPool
+
+
+def _work_in_thread():
+    return sum(range(1000))
+
+
+def _work(n_threads: int = 2) -> int:
+    with futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+        results = [executor.submit(_work_in_thread) for _ in range(n_threads)]
+        return sum(result.result() for result in results)
+
+
+def _work_after_profiling(_) -> int:
+    return sum(range(10))
+
+
+def _wait_in_thread(stop: threading.Event) -> None:
+    stop.wait()
+
+
+def _function_names(stats: pstats.Stats) -> set:
+    return {function_name for _, _, function_name in stats.stats.keys()}
+
+
+def test_profiler_includes_threads():  # noqa: D103
+    with profiling.Profiler() as profiler:
+        _work()
+
+    function_names = _function_names(profiler.stats())
+    assert "_work" in function_names
+    assert "_work_in_thread" in function_names
+
+
+def test_profiler_stops_profiling_thread_pool():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=2)
+    try:
+        with profiling.Profiler() as profiler:
+            pool.map(lambda _: _work_in_thread(), range(4))
+        # The threads of the pool outlive the profiler, but aren't profiled after it stops.
+        pool.map(_work_after_profiling, range(4))
+        function_names = _function_names(profiler.stats())
+        assert "_work_in_thread" in function_names
+        assert "_work_after_profiling" not in function_names
+
+        # Threads started before profiling are profiled whilst running tasks.
+        with profiling.Profiler() as profiler:
+            pool.map(_work_after_profiling, range(4))
+        pool.map(lambda _: _work_in_thread(), range(4))
+        function_names = _function_names(profiler.stats())
+        assert "_work_after_profiling" in function_names
+        assert "_work_in_thread" not in function_names
+    finally:
+        pool.shutdown()
+
+
+def test_profiler_leaves_out_running_threads():  # noqa: D103
+    stop = threading.Event()
+    with profiling.Profiler() as profiler:
+        thread = threading.Thread(target=_wait_in_thread, args=(stop,))
+        thread.start()
+        _work()
+    try:
+        # The profiler of the thread is still running, so can't be read.
+        function_names = _function_names(profiler.stats())
+        assert "_work_in_thread" in function_names
+        assert "_wait_in_thread" not in function_names
+    finally:
+        stop.set()
+        thread.join()
+    assert "_wait_in_thread" in _function_names(profiler.stats())
+
+
+def test_run_and_profile(tmp_path):  # noqa: D103
+    filename = tmp_path / "profiles" / "worker.prof"
+    assert profiling.run_and_profile(_work, filename, n_threads=3) == 3 * sum(range(1000))
+    assert "_work_in_thread" in _function_names(pstats.Stats(str(filename)))
+
+
+def test_run_and_profile_saves_on_exception(tmp_path):  # noqa: D103
+    filename = tmp_path / "worker.prof"
+    with pytest.raises(ZeroDivisionError):
+        profiling.run_and_profile(lambda: 1 / 0, filename)
+    assert filename.exists()
+
+
+def test_merge_profiles_in_folder(tmp_path):  # noqa: D103
+    profiling.run_and_profile(_work, tmp_path / "train_pv_worker_0.prof")
+    profiling.run_and_profile(_work_in_thread, tmp_path / "train_gsp_worker_1.prof")
+
+    stats = profiling.merge_profiles_in_folder(tmp_path)
+
+    assert (tmp_path / profiling.MERGED_PROFILE_FILENAME).exists()
+    # `_work_in_thread` is called twice by `_work`, and once directly.
+    n_calls = {
+        function_name: n_calls
+        for (_, _, function_name), (_, n_calls, _, _, _) in stats.stats.items()
+    }
+    assert n_calls["_work_in_thread"] == 3
+
+    # Merging again doesn't include the old merged profile.
+    stats = profiling.merge_profiles_in_folder(tmp_path)
+    assert len(stats.files) == 2
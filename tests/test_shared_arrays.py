@@ -0,0 +1,112 @@
+"""Test sharing the arrays of DataSources with other processes."""
+import gc
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from nowcasting_dataset import shared_arrays
+
+
+class _Data:
+    """An object with some large attributes"""
+
+    def __init__(self):
+        self.array = np.arange(12, dtype=np.int16).reshape(3, 4)
+        self.dataframe = pd.DataFrame(
+            np.asfortranarray(np.random.rand(5, 3).astype(np.float32)),
+            index=pd.date_range("2020-01-01", periods=5, freq="5T"),
+            columns=[10, 11, 12],
+        )
+        self.series = pd.Series([1.0, 2.0, np.nan], index=[3, 4, 5], name="capacity")
+        self.data_array = xr.DataArray(
+            np.ones((2, 3), dtype=np.float32),
+            coords={"y": [1, 2], "x": [1, 2, 3]},
+            dims=("y", "x"),
+            attrs={"crs": 27700},
+        )
+        self.empty = np.zeros((0, 3))
+        self.small = 1
+
+    def __getstate__(self) -> dict:
+        return shared_arrays.get_state(self)
+
+    def __setstate__(self, state: dict) -> None:
+        shared_arrays.set_state(self, state)
+
+
+ATTRIBUTE_NAMES = ["array", "dataframe", "series", "data_array", "empty"]
+
+
+def _sum_dataframe(data: _Data) -> float:
+    return float(data.dataframe.values.sum())
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    """Put the shared files in a temporary directory"""
+    monkeypatch.setattr(shared_arrays, "SHARED_MEMORY_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_move_to_shared_memory(shared_dir):  # noqa: D103
+    data = _Data()
+    expected = _Data()
+    expected.dataframe = data.dataframe.copy()
+    shared_arrays.move_to_shared_memory(data, ATTRIBUTE_NAMES)
+    # Empty arrays aren't shared.
+    assert len(os.listdir(shared_dir)) == 4
+
+    np.testing.assert_array_equal(data.array, expected.array)
+    pd.testing.assert_frame_equal(data.dataframe, expected.dataframe)
+    assert data.dataframe.values.flags.f_contiguous
+    pd.testing.assert_series_equal(data.series, expected.series)
+    xr.testing.assert_identical(data.data_array, expected.data_array)
+
+    pickled = pickle.dumps(data)
+    assert len(pickled) < 5_000
+    unpickled = pickle.loads(pickled)
+    np.testing.assert_array_equal(unpickled.array, expected.array)
+    pd.testing.assert_frame_equal(unpickled.dataframe, expected.dataframe)
+    pd.testing.assert_series_equal(unpickled.series, expected.series)
+    xr.testing.assert_identical(unpickled.data_array, expected.data_array)
+    assert unpickled.empty.shape == (0, 3)
+    assert unpickled.small == 1
+
+    # The unpickled copy reads the same memory, but can't write to it.
+    data.array[0, 0] = 100
+    assert unpickled.array[0, 0] == 100
+    with pytest.raises(ValueError):
+        unpickled.array[0, 0] = 0
+
+    # Attributes which are replaced are pickled as usual.
+    data.array = np.array([1, 2, 3])
+    np.testing.assert_array_equal(pickle.loads(pickle.dumps(data)).array, [1, 2, 3])
+
+    # The files are deleted when the original object is deleted, but the copy can still read them.
+    del data
+    gc.collect()
+    assert os.listdir(shared_dir) == []
+    pd.testing.assert_frame_equal(unpickled.dataframe, expected.dataframe)
+
+
+def test_share_with_other_processes(shared_dir):  # noqa: D103
+    data = _Data()
+    shared_arrays.move_to_shared_memory(data, ["dataframe"])
+    expected = _sum_dataframe(data)
+    with multiprocessing.get_context("spawn").Pool(processes=2) as pool:
+        results = pool.map(_sum_dataframe, [data] * 4)
+    assert results == pytest.approx([expected] * 4)
+
+
+def test_no_room(shared_dir, monkeypatch):  # noqa: D103
+    monkeypatch.setattr(shared_arrays, "_get_directory", lambda nbytes: None)
+    data = _Data()
+    dataframe = data.dataframe
+    shared_arrays.move_to_shared_memory(data, ["dataframe"])
+    assert data.dataframe is dataframe
+    pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(data)).dataframe, dataframe)
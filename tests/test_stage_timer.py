@@ -0,0 +1,49 @@
+"""Test StageTimer."""
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from nowcasting_dataset.stage_timer import StageTimer
+
+
+def test_stage_timer():  # noqa: D103
+    stage_timer = StageTimer()
+    for batch_idx in range(3):
+        stage_timer.batch_idx = batch_idx
+        with stage_timer.time_stage("load"):
+            pass
+        with stage_timer.time_stage("concat") as record:
+            assert record["seconds"] is None
+        assert record["seconds"] >= 0
+
+    timings = stage_timer.to_dataframe()
+    assert len(timings) == 6
+    assert (timings.seconds >= 0).all()
+    assert timings.batch_idx.to_list() == [0, 0, 1, 1, 2, 2]
+
+    summary = stage_timer.summary()
+    assert list(summary.keys()) == ["load", "concat"]
+    assert summary["load"]["count"] == 3
+    assert sum(summary["load"]["histogram_counts"]) == 3
+
+    stage_timer.reset()
+    assert len(stage_timer.to_dataframe()) == 0
+
+
+def test_stage_timer_save():  # noqa: D103
+    stage_timer = StageTimer()
+    stage_timer.batch_idx = 0
+    with stage_timer.time_stage("serialization"):
+        pass
+
+    with tempfile.TemporaryDirectory() as dirpath:
+        stage_timer.save(dirpath)
+
+        timings = pd.read_csv(os.path.join(dirpath, "timings.csv"))
+        assert timings.stage.to_list() == ["serialization"]
+
+        with open(os.path.join(dirpath, "timings.json")) as file:
+            summary = json.load(file)
+        assert summary["serialization"]["count"] == 1
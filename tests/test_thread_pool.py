@@ -0,0 +1,61 @@
+"""Test ExampleThreadPool."""
+import pickle
+import threading
+import time
+
+import pytest
+
+from nowcasting_dataset.thread_pool import ExampleThreadPool
+
+
+def test_map():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=4, thread_name_prefix="test")
+    assert pool.map(lambda x, y: x * y, range(10), range(10)) == [x * x for x in range(10)]
+
+    # The same threads are reused.
+    thread_names = set(pool.map(lambda _: threading.current_thread().name, range(20)))
+    assert len(thread_names) <= 4
+    assert all(name.startswith("test_") for name in thread_names)
+    pool.shutdown()
+
+
+def test_max_concurrency():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=8)
+    running = []
+    max_running = []
+
+    def _work(_):
+        running.append(1)
+        max_running.append(len(running))
+        time.sleep(0.01)
+        running.pop()
+
+    pool.map(_work, range(16), max_concurrency=2)
+    assert max(max_running) <= 2
+
+
+def test_exception():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=2)
+    with pytest.raises(ZeroDivisionError):
+        pool.map(lambda x: 1 / x, [1, 0, 2])
+    # The pool still works after an exception.
+    assert pool.map(lambda x: x, [1, 2]) == [1, 2]
+
+
+def test_utilisation():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=4)
+    assert pool.utilisation() == 0
+
+    # Only 2 calls, so at most half of the 4 threads are busy.
+    pool.map(time.sleep, [0.05, 0.05])
+    assert 0.3 < pool.utilisation() <= 0.5
+
+    pool.reset_utilisation()
+    assert pool.utilisation() == 0
+
+
+def test_pickle():  # noqa: D103
+    pool = ExampleThreadPool(max_workers=2)
+    pool.map(abs, [-1])
+    unpickled_pool = pickle.loads(pickle.dumps(pool))
+    assert unpickled_pool.map(abs, [-1, -2]) == [1, 2]